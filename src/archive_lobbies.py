@@ -0,0 +1,78 @@
+'''
+2026-10-19
+How to run:
+   python ./src/archive_lobbies.py [--debug] [--finished-after-min 10] [--abandoned-after-h 6]
+                                   [--rate-mb 4] [--dry-run] [--watch-min 60]
+
+Packs finished (and abandoned) lobbies into per-day zips under data/archive/<runtime|debug>/,
+adds them to index.jsonl there, and deletes their folders (see utils.archiver). Runs once, or
+every --watch-min minutes.
+'''
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from utils.archiver import LobbyArchiver
+from utils.lobby_registry import debug_registry, runtime_registry
+from utils.logging_utils import MasterLogger
+
+ARCHIVE_BASE = os.path.join("data", "archive")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Archive and remove old lobby folders.")
+    parser.add_argument("--debug", action="store_true", help="Collect data/debug/lobbies instead of data/runtime/lobbies")
+    parser.add_argument("--finished-after-min", type=float, default=10.0,
+                        help="Minutes a finished lobby must be idle before it is archived")
+    parser.add_argument("--abandoned-after-h", type=float, default=6.0,
+                        help="Hours of inactivity after which an unfinished lobby counts as abandoned")
+    parser.add_argument("--rate-mb", type=float, default=4.0,
+                        help="Disk read/write budget in MB/s (0 = unlimited)")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the lobbies that would be archived")
+    parser.add_argument("--watch-min", type=float, default=None,
+                        help="Keep running and archive every this many minutes")
+    return parser.parse_args()
+
+def build_archiver(debug: bool, finished_after: float = 600.0, abandoned_after: float = 6 * 3600.0,
+                   rate_mb: float = 4.0, dry_run: bool = False) -> LobbyArchiver:
+    registry = debug_registry if debug else runtime_registry
+    return LobbyArchiver(
+        registry,
+        os.path.join(ARCHIVE_BASE, "debug" if debug else "runtime"),
+        finished_after=finished_after,
+        abandoned_after=abandoned_after,
+        max_bytes_per_sec=rate_mb * 1024 * 1024 if rate_mb > 0 else None,
+        dry_run=dry_run,
+    )
+
+def main():
+    args = parse_args()
+    MasterLogger(
+        init=True,
+        clear=False,
+        log_path="./logs/_archiver.log"
+    )
+    archiver = build_archiver(
+        args.debug,
+        finished_after=args.finished_after_min * 60,
+        abandoned_after=args.abandoned_after_h * 3600,
+        rate_mb=args.rate_mb,
+        dry_run=args.dry_run,
+    )
+    if args.watch_min:
+        asyncio.run(archiver.run_forever(args.watch_min * 60))
+        return
+    report = archiver.run_once()
+    verb = "Would archive" if args.dry_run else "Archived"
+    print(f"{verb} {len(report.archived)} finished lobbies: {report.archived}")
+    print(f"{verb} {len(report.abandoned)} abandoned lobbies: {report.abandoned}")
+    if report.skipped:
+        print(f"Skipped {len(report.skipped)}: {report.skipped}")
+    print(f"{report.bytes_archived / 1024:.1f} KiB in {report.seconds:.2f}s -> {archiver.archive_dir}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
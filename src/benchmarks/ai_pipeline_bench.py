@@ -0,0 +1,210 @@
+'''
+2026-10-19
+How to run:
+   python ./src/benchmarks/ai_pipeline_bench.py --transcript-lines 10 100 400 1600 --concurrency 1 4 16 \
+                                                [--llm-latency-ms 300] [--dialogues 5] [--json out.json]
+
+Baseline for the AI pipeline (`AIPlayer.handle_dialogue`: decide_to_respond → respond →
+stylizer). AI players are built from the debug templates in data/debug/templates/ and fed
+synthetic transcripts of increasing length. The LLM is the offline mock
+(utils.prompting.mock_client) with a configurable latency, so the numbers show the pipeline's
+own cost and how it grows with the transcript, not the network's.
+
+For every transcript length and concurrency (AIs answering at the same time, each in its own
+worker thread like `game.ai_response`, so the default executor's size, which depends on the CPU
+count, caps how many run at once), it reports:
+- end-to-end `handle_dialogue` latency and throughput (dialogues per second)
+- per stage: completion latency, prompt size (characters, ~4 per token) and the CPU time spent
+  building the prompt (`_build_messages`)
+- process CPU time per dialogue
+Results are written as JSON (see benchmarks.results).
+'''
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import sys
+import threading
+import time
+from dataclasses import replace
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+TEMPLATE_GLOB = os.path.join("data", "debug", "templates", "*_player", "players.json")
+SPEAKERS = ("OTTER", "PANDA", "FALCON", "MOOSE")
+PHRASES = ("lol same", "wait who said that", "i like pizza more tbh", "my dog is named max",
+           "soccer after school anyone", "that's kinda sus", "idk i just like drawing", "nah cats are better")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the AI response pipeline against a mock LLM.")
+    parser.add_argument("--transcript-lines", type=int, nargs="+", default=[10, 100, 400, 1600],
+                        help="Transcript lengths to replay")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16],
+                        help="Numbers of AIs answering at the same time")
+    parser.add_argument("--dialogues", type=int, default=5, help="handle_dialogue calls per AI per run")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="Mean mock completion time")
+    parser.add_argument("--llm-jitter-ms", type=float, default=50.0, help="+/- spread of the mock completion time")
+    parser.add_argument("--json", default=None, help="Where to write the results (default data/benchmarks/ai_pipeline_bench.json)")
+    return parser.parse_args()
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """Selects the mock LLM; must run before the AI modules are imported."""
+    os.environ["DOPPELBOT_LLM_BACKEND"] = "mock"
+    os.environ["DOPPELBOT_MOCK_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["DOPPELBOT_MOCK_JITTER_MS"] = str(args.llm_jitter_ms)
+    os.environ["DOPPELBOT_MOCK_RESPOND_RATE"] = "1"   # every dialogue runs all three stages
+    os.environ["DOPPELBOT_AI_ROUND_TOKENS"] = "0"     # no budget cut-backs: measure the full pipeline
+    os.environ["DOPPELBOT_LOBBY_ROUND_TOKENS"] = "0"
+
+class StageRecorder:
+    """Times the completions of an AIPlayer's prompters (wrapping them on the instance)."""
+
+    def __init__(self):
+        self.samples: Dict[str, Dict[str, List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.samples = {}
+
+    def _add(self, stage: str, key: str, value: float) -> None:
+        with self._lock:
+            self.samples.setdefault(stage, {}).setdefault(key, []).append(value)
+
+    def instrument(self, ai) -> None:
+        for stage, prompter in ai.prompter_dict.items():
+            self._wrap(stage, prompter)
+
+    def _wrap(self, stage: str, prompter) -> None:
+        build_messages = prompter._build_messages
+        get_completion = prompter.get_completion
+
+        def timed_build(input_texts):
+            cpu_start = time.thread_time()
+            messages = build_messages(input_texts)
+            self._add(stage, "build_cpu", time.thread_time() - cpu_start)
+            self._add(stage, "prompt_chars", sum(len(m["content"]) for m in messages if isinstance(m["content"], str)))
+            return messages
+
+        def timed_completion(input_texts, **kwargs):
+            start = time.perf_counter()
+            try:
+                return get_completion(input_texts, **kwargs)
+            finally:
+                self._add(stage, "latency", time.perf_counter() - start)
+
+        prompter._build_messages = timed_build
+        prompter.get_completion = timed_completion
+
+def load_template_players() -> list:
+    from utils.states import PlayerState
+    players = []
+    for path in sorted(glob.glob(TEMPLATE_GLOB)):
+        with open(path, "r", encoding="utf-8") as f:
+            players.extend(PlayerState.from_record(entry) for entry in json.load(f))
+    if not players:
+        raise FileNotFoundError(f"No debug templates found at {TEMPLATE_GLOB}")
+    return players
+
+def build_ais(count: int, recorder: StageRecorder) -> list:
+    """
+    AIs imitating the template players. Personas are restored rather than bound, so no code
+    names or colors are taken from the shared assigners.
+    """
+    from utils.chatbot.ai_v5 import AIPlayer
+    templates = load_template_players()
+    ais = []
+    for i in range(count):
+        human = templates[i % len(templates)]
+        ai = AIPlayer()
+        ai_state = replace(human, code_name=f"BOT{i}", is_human=False, written_to_file=True)
+        ai.restore_state({
+            "stolen_player_code_name": human.code_name,
+            "player_state": ai_state.to_record(),
+            "persona": None,
+            "humans_messages": [human.extra_info],
+            "is_voted_out": False,
+        })
+        ai.persona = ai._build_persona()
+        recorder.instrument(ai)
+        ais.append(ai)
+    return ais
+
+def make_transcript(lines: int, rng: random.Random) -> List[str]:
+    from utils.chatbot.ai_v5 import GM_PREFIX
+    transcript = [f"{GM_PREFIX} If you could have any superpower, what would it be?"]
+    while len(transcript) < lines:
+        transcript.append(f"{rng.choice(SPEAKERS)}: {rng.choice(PHRASES)}")
+    return transcript
+
+async def run_case(ais: list, transcript: List[str], dialogues: int) -> dict:
+    latencies: List[float] = []
+
+    def converse(ai) -> None:
+        for _ in range(dialogues):
+            start = time.perf_counter()
+            ai.handle_dialogue(list(transcript))
+            latencies.append(time.perf_counter() - start)
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(asyncio.to_thread(converse, ai) for ai in ais))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    return {
+        "wall_s": round(wall, 3),
+        "dialogues": len(latencies),
+        "throughput_per_s": round(len(latencies) / wall, 2),
+        "cpu_ms_per_dialogue": round(cpu / len(latencies) * 1000, 3),
+        "end_to_end": latencies,
+    }
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    from benchmarks.results import RESULTS_DIR, write_results
+    from server.simulation import summarize
+    from utils.logging_utils import MasterLogger
+    MasterLogger(
+        init=True,
+        clear=True,
+        log_path="./logs/_ai_pipeline_bench.log"
+    )
+
+    recorder = StageRecorder()
+    ais = build_ais(max(args.concurrency), recorder)
+    rng = random.Random(0)
+    runs = []
+    print(f"{'lines':>6} | {'AIs':>4} | {'e2e p50 ms':>10} | {'e2e p99 ms':>10} | {'dialogues/s':>11} | "
+          f"{'cpu ms/dlg':>10} | {'prompt chars dtr/resp/style':>27} | {'build us dtr/resp/style':>23}")
+    for lines in args.transcript_lines:
+        transcript = make_transcript(lines, rng)
+        for concurrency in args.concurrency:
+            recorder.reset()
+            result = asyncio.run(run_case(ais[:concurrency], transcript, args.dialogues))
+            stages = {}
+            for stage, samples in recorder.samples.items():
+                stages[stage] = {
+                    "latency": summarize(samples.get("latency", [])),
+                    "prompt_chars": round(sum(samples["prompt_chars"]) / len(samples["prompt_chars"])),
+                    "build_cpu_us": round(sum(samples["build_cpu"]) / len(samples["build_cpu"]) * 1e6, 1),
+                }
+            run = {"transcript_lines": lines, "concurrency": concurrency,
+                   **result, "end_to_end": summarize(result["end_to_end"]), "stages": stages}
+            runs.append(run)
+
+            order = ("decide_to_respond", "respond", "stylizer")
+            chars = "/".join(str(stages[s]["prompt_chars"]) if s in stages else "-" for s in order)
+            build = "/".join(f"{stages[s]['build_cpu_us']:.0f}" if s in stages else "-" for s in order)
+            e2e = run["end_to_end"]
+            print(f"{lines:>6} | {concurrency:>4} | {e2e['p50_ms']:>10.1f} | {e2e['p99_ms']:>10.1f} | "
+                  f"{run['throughput_per_s']:>11.2f} | {run['cpu_ms_per_dialogue']:>10.2f} | {chars:>27} | {build:>23}")
+
+    path = args.json or os.path.join(RESULTS_DIR, "ai_pipeline_bench.json")
+    write_results(path, "ai_pipeline", vars(args), runs=runs)
+    print(f"\nResults written to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+'''
+2026-10-19
+How to run:
+   python ./src/benchmarks/chat_io_bench.py --log-lines 0 1000 10000 --writers 1 4 16 \
+                                            --poll-interval 0.1 0.5 --seconds 5 [--json out.json]
+
+Benchmarks the file-polling chat:
+- micro: `read_new_messages`, the chat log read done by `ai_response`, and the append done by
+  `user_input`, per call, for each chat log size
+- loop: terminals running the real `refresh_messages` and `user_input` coroutines against one
+  chat log, for every combination of log size, writer count and poll interval. Each terminal
+  types `--rate` lines per second. Reported: write-to-display latency distribution (line
+  typed until another terminal prints it), CPU time per terminal, and read/write syscalls
+  and bytes per second (from /proc/self/io; Linux only, null elsewhere).
+
+All terminals run in this process, each with its own console (`utils.console`), like lobbies in
+server mode. Results are written as JSON (with the git commit and platform) so runs can be
+compared release to release.
+'''
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from benchmarks.results import RESULTS_DIR, write_results
+from game import refresh_messages, user_input
+from server.simulation import summarize
+from utils.console import Console, set_console
+from utils.constants import blank_game_state, blank_player_state
+from utils.file_io import read_new_messages
+from utils.task_group import TaskGroup
+
+TOKEN = re.compile(r"\bbench(\d+)\b")
+DEFAULT_JSON = os.path.join(RESULTS_DIR, "chat_io_bench.json")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the file-polling chat I/O paths.")
+    parser.add_argument("--log-lines", type=int, nargs="+", default=[0, 1000, 10000],
+                        help="Chat log sizes (lines already in the log) to benchmark")
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 4, 16],
+                        help="Numbers of terminals typing into the same chat log")
+    parser.add_argument("--poll-interval", type=float, nargs="+", default=[0.1, 0.5],
+                        help="refresh_messages delays (seconds) to benchmark")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Length of each loop run")
+    parser.add_argument("--rate", type=float, default=0.5, help="Lines typed per second per terminal")
+    parser.add_argument("--repeat", type=int, default=200, help="Calls per micro-benchmark")
+    parser.add_argument("--json", default=DEFAULT_JSON, help="Where to write the results")
+    return parser.parse_args()
+
+# --- Measurements ---
+
+def proc_io() -> Optional[Dict[str, int]]:
+    """This process's I/O counters (syscr, syscw, rchar, wchar), or None if unavailable."""
+    try:
+        with open("/proc/self/io", "r") as f:
+            return {k: int(v) for k, v in (line.split(": ") for line in f.read().splitlines())}
+    except OSError:
+        return None
+
+def io_rates(before: Optional[dict], after: Optional[dict], seconds: float) -> Optional[dict]:
+    if before is None or after is None:
+        return None
+    return {
+        "read_syscalls_per_s": round((after["syscr"] - before["syscr"]) / seconds, 1),
+        "write_syscalls_per_s": round((after["syscw"] - before["syscw"]) / seconds, 1),
+        "read_bytes_per_s": round((after["rchar"] - before["rchar"]) / seconds, 1),
+        "write_bytes_per_s": round((after["wchar"] - before["wchar"]) / seconds, 1),
+    }
+
+def fill_log(path: str, lines: int) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(f"FILLER{i % 8}: an older message number {i}\n" for i in range(lines))
+
+def time_call(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6  # microseconds
+
+# --- Micro-benchmarks ---
+
+def ai_response_read(path: str) -> List[str]:
+    """The chat log read `game.ai_response` does before every AI turn."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f.readlines()]
+
+def user_input_append(path: str, line: str) -> None:
+    """The chat log append `game.user_input` does for every typed line."""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line)
+
+def bench_micro(workdir: str, log_lines: int, repeat: int) -> dict:
+    path = os.path.join(workdir, "micro_chat_log.txt")
+    fill_log(path, log_lines)
+    result = {
+        "log_lines": log_lines,
+        "read_new_messages_us": time_call(lambda: read_new_messages(path, max(0, log_lines - 1)), repeat),
+        "ai_response_read_us": time_call(lambda: ai_response_read(path), repeat),
+    }
+    # Appends grow the log, so they are measured last
+    result["user_input_append_us"] = time_call(lambda: user_input_append(path, "BENCH: a new line\n"), repeat)
+    return {k: round(v, 2) if isinstance(v, float) else v for k, v in result.items()}
+
+# --- Loop benchmark ---
+
+class BenchConsole(Console):
+    """A terminal's console: typed lines come from a schedule, printed lines are timestamped."""
+
+    def __init__(self, name: str, sent: Dict[str, tuple], latencies: List[float], rate: float,
+                 rng: random.Random, counter):
+        self.name = name
+        self.sent = sent
+        self.latencies = latencies
+        self.rate = rate
+        self.rng = rng
+        self.counter = counter
+
+    async def input(self, prompt: str = "") -> str:
+        if self.rate <= 0:  # a terminal that only reads
+            await asyncio.Event().wait()
+        await asyncio.sleep(self.rng.expovariate(self.rate))
+        token = f"bench{next(self.counter)}"
+        self.sent[token] = (time.perf_counter(), self.name)
+        return f"hello {token}"
+
+    def print(self, *values, sep: str = " ", end: str = "\n", flush: bool = False) -> None:
+        now = time.perf_counter()
+        for token in TOKEN.findall(sep.join(str(v) for v in values)):
+            sent = self.sent.get(f"bench{token}")
+            if sent is not None and sent[1] != self.name:
+                self.latencies.append(now - sent[0])
+
+    def clear(self) -> None:
+        pass
+
+async def run_terminal(chat_log: str, console: BenchConsole, poll_interval: float) -> None:
+    set_console(console)
+    gs = blank_game_state()
+    ps = blank_player_state()
+    ps.code_name = console.name
+    async with TaskGroup() as tg:
+        tg.create_task(refresh_messages(chat_log, gs, ps, delay=poll_interval))
+        tg.create_task(user_input(chat_log, ps))
+
+async def bench_loop(workdir: str, log_lines: int, writers: int, poll_interval: float,
+                     seconds: float, rate: float) -> dict:
+    chat_log = os.path.join(workdir, "chat_log.txt")
+    fill_log(chat_log, log_lines)
+    sent: Dict[str, tuple] = {}
+    latencies: List[float] = []
+    counter = itertools.count(1)
+    rng = random.Random(log_lines * 1000 + writers)
+    consoles = [BenchConsole(f"T{i}", sent, latencies, rate, random.Random(rng.random()), counter)
+                for i in range(writers)]
+    # With one writer, a listening terminal is needed to display its lines
+    if writers == 1:
+        consoles.append(BenchConsole("LISTENER", sent, latencies, 0.0, random.Random(0), counter))
+
+    io_before, cpu_before, wall_before = proc_io(), time.process_time(), time.perf_counter()
+    tasks = [asyncio.create_task(run_terminal(chat_log, c, poll_interval)) for c in consoles]
+    await asyncio.sleep(seconds)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    wall = time.perf_counter() - wall_before
+    cpu = time.process_time() - cpu_before
+    return {
+        "log_lines": log_lines,
+        "writers": writers,
+        "terminals": len(consoles),
+        "poll_interval": poll_interval,
+        "seconds": round(wall, 3),
+        "lines_typed": len(sent),
+        "cpu_ms_per_terminal_per_s": round(cpu / len(consoles) / wall * 1000, 3),
+        "io": io_rates(io_before, proc_io(), wall),
+        "write_to_display": summarize(latencies),
+    }
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="chat_io_bench_")
+    try:
+        print(f"{'log lines':>9} | {'read_new_messages':>17} | {'ai_response read':>16} | {'user_input append':>17}  (us/call)")
+        micro = []
+        for log_lines in args.log_lines:
+            r = bench_micro(workdir, log_lines, args.repeat)
+            micro.append(r)
+            print(f"{log_lines:>9} | {r['read_new_messages_us']:>17.1f} | {r['ai_response_read_us']:>16.1f} | "
+                  f"{r['user_input_append_us']:>17.1f}")
+        print()
+
+        print(f"{'log lines':>9} | {'writers':>7} | {'poll s':>6} | {'cpu ms/term/s':>13} | {'syscalls/s':>10} | "
+              f"{'p50 ms':>8} | {'p99 ms':>8} | {'max ms':>8}")
+        loops = []
+        for log_lines in args.log_lines:
+            for writers in args.writers:
+                for poll_interval in args.poll_interval:
+                    r = asyncio.run(bench_loop(workdir, log_lines, writers, poll_interval, args.seconds, args.rate))
+                    loops.append(r)
+                    lat = r["write_to_display"]
+                    syscalls = (r["io"]["read_syscalls_per_s"] + r["io"]["write_syscalls_per_s"]) if r["io"] else float("nan")
+                    print(f"{log_lines:>9} | {writers:>7} | {poll_interval:>6} | {r['cpu_ms_per_terminal_per_s']:>13.2f} | "
+                          f"{syscalls:>10.0f} | {lat.get('p50_ms', float('nan')):>8.1f} | "
+                          f"{lat.get('p99_ms', float('nan')):>8.1f} | {lat.get('max_ms', float('nan')):>8.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    write_results(args.json, "chat_io", vars(args), micro=micro, loop=loops)
+    print(f"\nResults written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Saving benchmark results as JSON, tagged with the commit and platform they were measured on,
+so runs can be compared release to release.
+"""
+import datetime
+import json
+import os
+import platform
+import subprocess
+from typing import Optional
+
+RESULTS_DIR = os.path.join("data", "benchmarks")
+
+def git_commit() -> Optional[str]:
+    """The checked-out commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def write_results(path: str, benchmark: str, settings: dict, **sections) -> None:
+    """
+    Writes one benchmark run to `path`.
+
+    Args:
+        path (str): Output file.
+        benchmark (str): Name of the benchmark.
+        settings (dict): The run's parameters (e.g. `vars(args)`).
+        **sections: The measurements, one key per section.
+    """
+    results = {
+        "benchmark": benchmark,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": settings,
+        **sections,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
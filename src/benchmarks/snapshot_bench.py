@@ -0,0 +1,106 @@
+'''
+2026-10-19
+How to run:
+   python ./src/benchmarks/snapshot_bench.py --players 6 60 600 --repeat 200
+
+Compares the compact snapshot format (utils/snapshot.py) with the previous players.json path
+(`asdict` + indented `json.dump`, `json.load` + `PlayerState(**p)`):
+- memory per player for slotted vs. plain (__dict__) dataclass instances
+- encode / decode time per snapshot and encoded size
+'''
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import MISSING, asdict, fields, make_dataclass
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.states import PlayerState
+from utils.snapshot import decode_players, encode_players
+
+# A non-slotted replica of PlayerState, i.e. what every player cost before slots
+LegacyPlayerState = make_dataclass(
+    "LegacyPlayerState",
+    [
+        (f.name, f.type) if f.default is MISSING else (f.name, f.type, f.default)
+        for f in fields(PlayerState)
+    ],
+)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the players.json snapshot format.")
+    parser.add_argument("--players", type=int, nargs="+", default=[6, 60, 600],
+                        help="Lobby sizes (number of players) to benchmark")
+    parser.add_argument("--repeat", type=int, default=200,
+                        help="Encode/decode iterations per lobby size")
+    return parser.parse_args()
+
+def make_players(cls, n: int) -> list:
+    return [
+        cls(
+            lobby_id="12", first_name=f"Player{i}", last_initial="Q", code_name=f"CODE{i}",
+            grade="7", favorite_food="Pizza", favorite_animal="Otters", hobby="Chess",
+            extra_info="i like building lego sets with my little brother", is_human=i % 2 == 0,
+            color_name="CYAN",
+        )
+        for i in range(n)
+    ]
+
+def bytes_per_instance(cls, n: int = 10_000) -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    players = make_players(cls, n)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del players
+    return total / n
+
+def time_it(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6  # microseconds
+
+def bench_size(n: int, repeat: int) -> dict:
+    players = make_players(PlayerState, n)
+
+    legacy_text = json.dumps([asdict(p) for p in players], indent=2)
+    packed_text = encode_players(players)
+
+    return {
+        "players": n,
+        "legacy_bytes": len(legacy_text.encode("utf-8")),
+        "packed_bytes": len(packed_text.encode("utf-8")),
+        "legacy_encode_us": time_it(lambda: json.dumps([asdict(p) for p in players], indent=2), repeat),
+        "packed_encode_us": time_it(lambda: encode_players(players), repeat),
+        "legacy_decode_us": time_it(lambda: [PlayerState(**p) for p in json.loads(legacy_text)], repeat),
+        "packed_decode_us": time_it(lambda: decode_players(packed_text), repeat),
+    }
+
+def main():
+    args = parse_args()
+
+    legacy_mem = bytes_per_instance(LegacyPlayerState)
+    slotted_mem = bytes_per_instance(PlayerState)
+    print("Memory per player (bytes, including field values):")
+    print(f"  plain dataclass:   {legacy_mem:8.1f}")
+    print(f"  slotted dataclass: {slotted_mem:8.1f}  ({(1 - slotted_mem / legacy_mem) * 100:.1f}% less)")
+    print()
+
+    header = f"{'players':>8} | {'size legacy/packed (B)':>24} | {'encode legacy/packed (us)':>26} | {'decode legacy/packed (us)':>26}"
+    print(header)
+    print("-" * len(header))
+    for n in args.players:
+        r = bench_size(n, args.repeat)
+        print(
+            f"{r['players']:>8} | "
+            f"{r['legacy_bytes']:>11} / {r['packed_bytes']:<10} | "
+            f"{r['legacy_encode_us']:>12.1f} / {r['packed_encode_us']:<11.1f} | "
+            f"{r['legacy_decode_us']:>12.1f} / {r['packed_decode_us']:<11.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
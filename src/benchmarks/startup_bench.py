@@ -0,0 +1,78 @@
+'''
+2026-10-19
+How to run:
+   python ./src/benchmarks/startup_bench.py --repeat 10 --budget-ms 500
+
+Measures how long a fresh `python src/main.py` takes to become interactive: interpreter start,
+importing main, loading the first screen's handler and prompt_toolkit (needed to draw the
+first prompt). Each run is a new process, timed from launch until it reports ready. Fails
+(exit code 1) if the median exceeds the budget, or if any of main.HEAVY_PACKAGES were
+imported before the first screen.
+'''
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+REPO_ROOT = os.path.join(SRC_DIR, "..")
+
+CHILD_CODE = """
+import sys
+import main
+main.load_handler(main.ScreenEnum.{screen})
+import prompt_toolkit
+heavy = [name for name in main.HEAVY_PACKAGES if name in sys.modules]
+print("READY", ",".join(heavy), flush=True)
+"""
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark time-to-interactive of src/main.py.")
+    parser.add_argument("--repeat", type=int, default=10,
+                        help="Number of fresh processes to launch")
+    parser.add_argument("--budget-ms", type=float, default=500.0,
+                        help="Maximum allowed median time-to-interactive in milliseconds")
+    parser.add_argument("--debug", action="store_true",
+                        help="Measure the --debug startup path (first screen DEBUG) instead of SETUP")
+    return parser.parse_args()
+
+def time_to_interactive(screen: str) -> tuple:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.abspath(SRC_DIR), env.get("PYTHONPATH")]))
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", CHILD_CODE.format(screen=screen)],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+    line = proc.stdout.readline()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    _, stderr = proc.communicate()
+    if not line.startswith("READY"):
+        raise RuntimeError(f"Startup failed:\n{stderr}")
+    _, _, loaded = line.strip().partition(" ")
+    return elapsed_ms, [name for name in loaded.split(",") if name]
+
+def main():
+    args = parse_args()
+    screen = "DEBUG" if args.debug else "SETUP"
+
+    timings, heavy = [], set()
+    for _ in range(args.repeat):
+        elapsed_ms, loaded = time_to_interactive(screen)
+        timings.append(elapsed_ms)
+        heavy.update(loaded)
+
+    median = statistics.median(timings)
+    print(f"First screen: {screen} ({args.repeat} runs)")
+    print(f"  time to interactive (ms): min {min(timings):.1f} | median {median:.1f} | max {max(timings):.1f}")
+    print(f"  budget (ms):              {args.budget_ms:.1f}")
+    print(f"  heavy packages loaded:    {', '.join(sorted(heavy)) or 'none'}")
+
+    failed = median > args.budget_ms or (heavy and not args.debug)
+    print("FAIL" if failed else "PASS")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+'''
+2026-10-19
+How to run:
+   python ./src/client.py ws://127.0.0.1:8080/ws
+
+Terminal client for the WebSocket gateway (see server.gateway): plays a game on a server
+started with `serve.py --http-port` without a shell on the server host. Lines typed here are
+sent as input; the screens' output is printed as it arrives.
+'''
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from server.websocket import WebSocket, WebSocketError, accept_key, read_http_head
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Play DoppelBot through the WebSocket gateway.")
+    parser.add_argument("url", nargs="?", default="ws://127.0.0.1:8080/ws", help="Gateway WebSocket URL")
+    return parser.parse_args()
+
+async def connect(url: str) -> WebSocket:
+    """Opens a WebSocket connection to `url` (ws:// only)."""
+    parts = urlsplit(url)
+    if parts.scheme != "ws":
+        raise ValueError(f"Unsupported URL scheme: {parts.scheme!r} (expected ws://)")
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    key = base64.b64encode(os.urandom(16)).decode("ascii")
+    writer.write(
+        f"GET {parts.path or '/'} HTTP/1.1\r\n"
+        f"Host: {parts.netloc}\r\n"
+        "Upgrade: websocket\r\n"
+        "Connection: Upgrade\r\n"
+        f"Sec-WebSocket-Key: {key}\r\n"
+        "Sec-WebSocket-Version: 13\r\n\r\n".encode("latin-1")
+    )
+    await writer.drain()
+    status, headers = await read_http_head(reader)
+    if " 101 " not in status or headers.get("sec-websocket-accept") != accept_key(key):
+        writer.close()
+        raise WebSocketError(f"Handshake failed: {status}")
+    return WebSocket(reader, writer, client_side=True)
+
+async def main():
+    args = parse_args()
+    ws = await connect(args.url)
+
+    async def send_lines():
+        while True:
+            line = await asyncio.to_thread(sys.stdin.readline)
+            if not line:
+                await ws.close()
+                return
+            await ws.send(json.dumps({"type": "input", "text": line.rstrip("\r\n")}))
+
+    sender = asyncio.create_task(send_lines())
+    try:
+        while True:
+            message = await ws.recv()
+            if message is None:
+                break
+            event = json.loads(message)
+            if event["type"] == "output":
+                sys.stdout.write(event["text"])
+                sys.stdout.flush()
+            elif event["type"] == "closed":
+                print(f"\n[disconnected: {event['reason']}]")
+    finally:
+        sender.cancel()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except (KeyboardInterrupt, ConnectionError):
+        pass
+    # The stdin reader thread may still be blocked on readline
+    os._exit(0)
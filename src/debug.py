@@ -1,5 +1,4 @@
 import json, os, shutil
-from time import sleep
 from datetime import datetime
 from colorama import Fore, Style
 from utils.states import GameState, PlayerState, ScreenEnum
@@ -12,36 +11,13 @@ from utils.file_io import (
     synchronize_start_time_debug
 )
 from utils.constants import COLOR_DICT
+from utils.console import ainput, cprint
+from utils.json_cache import wait_for_change
+from utils.lobby_registry import debug_registry
 
 TEMPLATE_BASE = "./data/debug/templates"
-DEBUG_LOBBY_BASE = "./data/debug/lobbies"
 
-def get_next_lobby_id() -> int:
-    """
-    Scans the debug lobby directory and determines the next available lobby ID.
-
-    Returns:
-        int: The next sequential lobby ID based on existing 'lobby_x' folders.
-    """
-
-    existing = [int(d.split("_")[-1]) for d in os.listdir(DEBUG_LOBBY_BASE) if d.startswith("lobby_")]
-    return max(existing, default=-1) + 1
-
-def create_lobby_dir(lobby_id: int) -> str:
-    """
-    Creates a new directory for the specified debug lobby ID.
-
-    Args:
-        lobby_id (int): The ID of the lobby to create.
-
-    Returns:
-        str: The full path to the created lobby directory.
-    """
-    lobby_path = os.path.join(DEBUG_LOBBY_BASE, f"lobby_{lobby_id}")
-    os.makedirs(lobby_path, exist_ok=True)
-    return lobby_path
-
-def debug_setup(ss: ScreenEnum, gs: GameState, ps: PlayerState, num_players: int, player_number: int, print_prompts:bool) -> tuple:
+async def debug_setup(ss: ScreenEnum, gs: GameState, ps: PlayerState, num_players: int, player_number: int, print_prompts:bool) -> tuple:
     """
     Initializes the debug setup for a single player using pre-defined template data.
 
@@ -76,23 +52,12 @@ def debug_setup(ss: ScreenEnum, gs: GameState, ps: PlayerState, num_players: int
     ps.timekeeper = player_number == 0
 
     if ps.timekeeper:
-        lobby_id = get_next_lobby_id()
-        lobby_path = create_lobby_dir(lobby_id)
-
-        # Optionally clear old contents
-        for fname in os.listdir(lobby_path):
-            os.remove(os.path.join(lobby_path, fname))
+        lobby_id = debug_registry.allocate(size=len(all_players))
         # print(Fore.GREEN + f"[DEBUG] Timekeeper creating lobby_{lobby_id}" + Style.RESET_ALL)
     else:
-        # Wait for timekeeper to create lobby
-        while True:
-            lobby_ids = sorted([int(d.split("_")[-1]) for d in os.listdir(DEBUG_LOBBY_BASE) if d.startswith("lobby_")])
-            if lobby_ids:
-                lobby_id = max(lobby_ids)
-                lobby_path = os.path.join(DEBUG_LOBBY_BASE, f"lobby_{lobby_id}")
-                if os.path.exists(os.path.join(lobby_path, "players.json")):
-                    break
-            sleep(1)
+        # Wait for the timekeeper to allocate its lobby and join it
+        lobby_id = await debug_registry.wait_for_latest(min_joined=1)
+    lobby_path = debug_registry.lobby_dir(lobby_id)
 
     # Build paths and GameState
     gs.chat_log_path = os.path.join(lobby_path, "chat_log.txt")
@@ -123,11 +88,16 @@ def debug_setup(ss: ScreenEnum, gs: GameState, ps: PlayerState, num_players: int
 
     # Save players
     save_player_to_lobby_file(ps, debug=True)
+    debug_registry.note_join(lobby_id, ps.code_name)
     ps.ai_doppleganger = AIPlayer(player_to_steal=ps, debug_bool=print_prompts)
     save_player_to_lobby_file(ps.ai_doppleganger.player_state, debug=True)
 
+    # The first icebreaker is the same in every lobby (the deck cut below keeps it first), so the
+    # AI can start on its answer while the other players join and get ready
+    ps.ai_doppleganger.start_icebreaker_prefetch(gs.icebreakers[0], [])
+
     # Timekeeper sets start time
-    synchronize_start_time_debug(gs, ps)
+    await synchronize_start_time_debug(gs, ps)
 
     # Load full player list
     gs.players = sorted(load_players_from_lobby(gs), key=lambda p: p.code_name)
@@ -150,19 +120,20 @@ def debug_setup(ss: ScreenEnum, gs: GameState, ps: PlayerState, num_players: int
 
     # Synchronize the player list once all players are ready
     print_str = ''
-    while len([p for p in gs.players if p.is_human]) < gs.number_of_human_players:
-        sleep(1)
+    seen = None
+    while gs.players.num_humans < gs.number_of_human_players:
+        # Wait (without blocking the event loop) until someone writes to the lobby file
+        seen = await wait_for_change(gs.player_path, seen, timeout=1)
         # Load the players from the lobby once all players are set up
         gs.players = load_players_from_lobby(gs)
-        human_players = [p for p in gs.players if p.is_human]
-        new_str = f"{len(human_players)}/{gs.number_of_human_players} players are ready."
+        new_str = f"{gs.players.num_humans}/{gs.number_of_human_players} players are ready."
         if print_str != new_str:
-            print(new_str)
+            cprint(new_str)
             print_str = new_str
 
-    print(Fore.GREEN + "All players are ready!" + Style.RESET_ALL)
+    cprint(Fore.GREEN + "All players are ready!" + Style.RESET_ALL)
     gs.players.append(ps)
     # gs.players.append(ps.ai_doppleganger.player_state)
 
-    input(Fore.MAGENTA + "Press Enter to continue to the chat phase..." + Style.RESET_ALL)
+    await ainput(Fore.MAGENTA + "Press Enter to continue to the chat phase..." + Style.RESET_ALL)
     return ScreenEnum.CHAT, gs, ps
@@ -1,11 +1,26 @@
 import asyncio
-from datetime import datetime
 import os
-from prompt_toolkit.shortcuts import PromptSession
+import re
+from typing import Awaitable, Callable, Dict, List, Optional
 from colorama import Fore, Style
 from utils.asthetics import format_gm_message
+from utils.console import ainput, cprint, emit_event
 from utils.states import GameState, PlayerState, ScreenEnum
 from utils.constants import COLOR_DICT, ROUND_DURATION
+from utils.clock import get_clock
+from utils.clock_sync import schedule_at_shared_time
+from utils.lobby_registry import LobbyStatus, report_status
+from utils.task_group import TaskGroup
+from utils.tracing import span
+from utils.metrics import CHAT_MESSAGES, LOG_BYTES
+
+_chat_log_bytes = LOG_BYTES.labels("chat")
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+
+def record_chat_line(source: str, line: str) -> None:
+    """Counts a line appended to a chat log ("human", "ai" or "gm") in the metrics."""
+    CHAT_MESSAGES.labels(source).inc()
+    _chat_log_bytes.inc(len(line.encode("utf-8")))
 
 def ask_icebreaker(gs, ps, chat_log):
     """
@@ -20,22 +35,27 @@ def ask_icebreaker(gs, ps, chat_log):
         ps (PlayerState): The player initiating the action (typically the timekeeper).
         chat_log (str): Path to the shared chat log file.
     """
-    intro_msg = format_gm_message(gs.icebreakers[0])
+    question = gs.icebreakers[0]
+    intro_msg = format_gm_message(question)
     if ps.timekeeper:
         with open(chat_log, "a", encoding="utf-8") as f:
             f.write(intro_msg)
             f.flush()
+        record_chat_line("gm", intro_msg)
     gs.ice_asked += 1
     gs.icebreakers.pop(0)
-    print(intro_msg.strip())
+    cprint(intro_msg.strip())
+    emit_event("round_start", round=gs.round_number, icebreaker=question)
 
 async def countdown_timer(duration: int, gs: GameState, ps: PlayerState, chat_log: str):
     """
     Starts an asynchronous countdown timer for the current round.
 
-    Calculates the remaining time based on the player's `starttime`, sleeps until time is up,
-    and updates the game state to mark the round as complete. If the player is the timekeeper,
-    a "Time's up" message is written to the chat log.
+    The round ends at `ps.starttime + duration` on the lobby's shared clock. That deadline is
+    converted to a delay (compensating for this terminal's `gs.clock_offset`) and scheduled on
+    the game clock (`utils.clock`; the event loop's monotonic clock in real play), so every
+    terminal ends the round at the same instant. The game state is then marked as complete. If
+    the player is the timekeeper, a "Time's up" message is written to the chat log.
 
     Args:
         duration (int): Total round duration in seconds.
@@ -43,18 +63,21 @@ async def countdown_timer(duration: int, gs: GameState, ps: PlayerState, chat_lo
         ps (PlayerState): The player running the timer (used to check timekeeper role).
         chat_log (str): Path to the shared chat log file.
     """
-    elapsed = (datetime.now() - ps.starttime).total_seconds()
-    remaining = max(0, duration - int(elapsed))
-
-    if remaining > 0:
-        await asyncio.sleep(remaining)
+    round_over = asyncio.Event()
+    handle = schedule_at_shared_time(ps.starttime + duration, gs.clock_offset, round_over.set)
+    try:
+        await round_over.wait()
+    finally:
+        handle.cancel()
 
     gs.round_complete = True
 
     if ps.timekeeper:
+        times_up = format_gm_message("Time's up! Moving to the next round.")
         with open(chat_log, "a", encoding="utf-8") as f:
-            f.write(format_gm_message("Time's up! Moving to the next round."))
+            f.write(times_up)
             f.flush()
+        record_chat_line("gm", times_up)
 
 async def refresh_messages(chat_log, gs: GameState, ps: PlayerState, delay=0.5):
     """
@@ -71,6 +94,7 @@ async def refresh_messages(chat_log, gs: GameState, ps: PlayerState, delay=0.5):
         delay (float): Optional delay (in seconds) between refresh cycles. Default is 0.5.
     """
 
+    clock = get_clock()
     num_lines = 0
     # Check if the file already exists
     if os.path.isfile(chat_log):
@@ -78,7 +102,7 @@ async def refresh_messages(chat_log, gs: GameState, ps: PlayerState, delay=0.5):
         with open(chat_log, "r", encoding="utf-8") as f:
             num_lines = len(f.readlines())
     while True:
-        await asyncio.sleep(delay)
+        await clock.sleep(delay)
         try:
             with open(chat_log, "r", encoding="utf-8") as f:
                 messages = f.readlines()
@@ -95,7 +119,7 @@ async def refresh_messages(chat_log, gs: GameState, ps: PlayerState, delay=0.5):
                                 # print("Not a GM message, checking player code name...")
                                 code_name = msg.split(":", 1)[0].strip()
                                 # print(code_name)
-                                player = next((p for p in gs.players if p.code_name == code_name), None)
+                                player = gs.find_player(code_name)
                                 # print(player)
                                 if player:
                                     # print("inside player check")
@@ -105,47 +129,77 @@ async def refresh_messages(chat_log, gs: GameState, ps: PlayerState, delay=0.5):
                                     colored_msg = msg.strip()
 
                             color_formatted_messages.append(colored_msg)
+                            chat_event(msg)
                         except Exception as e:
-                            print(f"Error formatting message: {msg}, Error: {e}")
+                            cprint(f"Error formatting message: {msg}, Error: {e}")
                             continue
 
-                    print("\n".join(color_formatted_messages))
+                    cprint("\n".join(color_formatted_messages))
                     num_lines = len(messages)
 
         except FileNotFoundError:
-            print("Chat log file not found. Please start a chat session.")
+            cprint("Chat log file not found. Please start a chat session.")
             return
         except IOError as e:
-            print(f"Error reading messages: {e}")
-
-ai_response_lock = asyncio.Lock()
-async def ai_response(chat_log, ps: PlayerState, delay=4.0):
+            cprint(f"Error reading messages: {e}")
+
+def chat_event(line: str) -> None:
+    """Reports one chat log line as a "chat" event (GAME MASTER lines have sender "GAME MASTER")."""
+    text = ANSI_ESCAPE.sub("", line).strip().strip("*").strip()
+    if not text:
+        return  # a GAME MASTER banner's border
+    sender, sep, body = text.partition(":")
+    if sep:
+        emit_event("chat", sender=sender.strip(), text=body.strip())
+    else:
+        emit_event("chat", sender="", text=text)
+
+# One lock per lobby (keyed by chat log path): AI responses in a lobby are serialized, but
+# lobbies hosted by the same process (server mode) do not wait on each other.
+_ai_response_locks: Dict[str, asyncio.Lock] = {}
+
+def ai_response_lock_for(chat_log: str) -> asyncio.Lock:
+    """Returns the AI response lock of the lobby that owns `chat_log`."""
+    return _ai_response_locks.setdefault(os.path.abspath(chat_log), asyncio.Lock())
+
+def drop_ai_response_lock(chat_log: str) -> None:
+    """Forgets a finished lobby's AI response lock."""
+    _ai_response_locks.pop(os.path.abspath(chat_log), None)
+
+async def ai_response(chat_log, ps: PlayerState, delay=4.0, first_delay=0.75):
     """
     Monitors the chat log and generates AI responses when appropriate.
 
     This asynchronous loop continuously checks the latest chat message and, if the message
     was not authored by the AI, prompts the AI doppelgänger to respond using its
     `handle_dialogue` method. If the response is valid, it is appended to the chat log.
-    The function uses an async lock to prevent concurrent AI responses across multiple threads.
+    The function uses a per-lobby async lock to prevent concurrent AI responses in the same lobby.
+
+    The first check comes after `first_delay` so that a prefetched icebreaker answer shows up
+    right after the GAME MASTER's question.
 
     Args:
         chat_log (str): Path to the shared chat log file.
         ps (PlayerState): The player whose AI doppelgänger should respond.
-        delay (float): Time in seconds to wait between each check. Default is 1.0.
+        delay (float): Time in seconds to wait between each check. Default is 4.0.
+        first_delay (float): Time in seconds before the first check. Default is 0.75.
     """
     ai = ps.ai_doppleganger
     ai_name = ai.player_state.code_name
     ai.logger.info(f"AI {ai_name} is inside async def ai_response")
 
+    clock = get_clock()
+    wait = first_delay
     while True:
-        await asyncio.sleep(delay)
+        await clock.sleep(wait)
+        wait = delay
 
         if not ai.player_state.still_in_game:
             ai.logger.info(f"{ai_name} is no longer in the game. Exiting response loop.")
             return
 
         # try:
-        with open(chat_log, "r", encoding="utf-8") as f:
+        with span("read chat log", "disk"), open(chat_log, "r", encoding="utf-8") as f:
             messages = [line.strip() for line in f.readlines()]
 
         last_line = messages[-1] if messages else ""
@@ -155,9 +209,10 @@ async def ai_response(chat_log, ps: PlayerState, delay=4.0):
             # ai.logger.info(f"Last message was from 'ME' {ai_name}, skipping response.")
             continue  # Avoid self-reply
 
-        async with ai_response_lock:
+        async with ai_response_lock_for(chat_log):
             try:
-                response = await asyncio.to_thread(ai.handle_dialogue, messages)
+                with span("ai dialogue", "llm", ai=ai_name):
+                    response = await asyncio.to_thread(ai.handle_dialogue, messages)
                 ai.logger.info(f"AI response: {response}")
 
                 if response not in ["STAY SILENT", "ERROR", "No response needed."]:
@@ -168,9 +223,10 @@ async def ai_response(chat_log, ps: PlayerState, delay=4.0):
                     # logger.info(f"AI {self.player_state.code_name} is waiting {delay:.2f} seconds before responding.")
                     # time.sleep(delay)
 
-                    with open(chat_log, "a", encoding="utf-8") as f:
+                    with span("write chat line", "disk"), open(chat_log, "a", encoding="utf-8") as f:
                         f.write(ai_msg)
                         f.flush()
+                    record_chat_line("ai", ai_msg)
                     ai.logger.info("AI response written to chat log.")
                 else:
                     ai.logger.info(f"AI {ai_name} chose not to respond.")
@@ -186,7 +242,7 @@ async def user_input(chat_log, ps: PlayerState):
     """
     Captures real-time user input and writes it to the chat log.
 
-    This function runs in an asynchronous loop using a prompt session to receive user input
+    This function runs in an asynchronous loop using the current console to receive user input
     without blocking the main event loop. Each message is formatted with the player's code name
     and written to the shared chat log. It also clears the input line visually for cleaner UX.
 
@@ -195,19 +251,142 @@ async def user_input(chat_log, ps: PlayerState):
         ps (PlayerState): The player providing the input.
     """
 
-    session = PromptSession()
     while True:
         try:
-            user_message = await session.prompt_async("")
+            user_message = await ainput("")
             formatted_message = f"{ps.code_name}: {user_message}\n"
-            with open(chat_log, "a", encoding="utf-8") as f:
+            with span("write chat line", "disk"), open(chat_log, "a", encoding="utf-8") as f:
                 f.write(formatted_message)
+            record_chat_line("human", formatted_message)
             # Move the cursor up and clear the line to avoid "You: You:"
-            print("\033[A" + " " * len(formatted_message) + "\033[A")
+            cprint("\033[A" + " " * len(formatted_message) + "\033[A")
         except Exception as e:
             pass
             # print(f"Error getting user input: {e}")
 
+RoundHook = Callable[[GameState, PlayerState], Awaitable[None]]
+
+async def prefetch_next_icebreaker(gs: GameState, ps: PlayerState):
+    """
+    Round hook: starts generating the AI doppelgänger's answer to the next icebreaker.
+
+    Used both before the chat starts (so the answer is ready early) and after it ends (so the
+    answer reflects the whole round; this one runs while players vote). The work runs in the
+    background and does not delay the round.
+
+    Args:
+        gs (GameState): The game state; `gs.icebreakers[0]` is the next round's question.
+        ps (PlayerState): The player whose AI doppelgänger should prepare an answer.
+    """
+    ai = ps.ai_doppleganger
+    if ai is None or not gs.icebreakers or not ai.player_state.still_in_game:
+        return
+    try:
+        with open(gs.chat_log_path, "r", encoding="utf-8") as f:
+            minutes = [line.strip() for line in f.readlines()]
+    except FileNotFoundError:
+        minutes = []
+    ai.start_icebreaker_prefetch(gs.icebreakers[0], minutes)
+
+async def flush_token_usage(gs: GameState, ps: PlayerState):
+    """
+    Round hook: adds the AI doppelgänger's token usage of the round to the lobby's ledger
+    (one write per round; see utils.prompting.budget).
+
+    Args:
+        gs (GameState): The game state (unused; keeps the hook signature).
+        ps (PlayerState): The player whose AI doppelgänger's usage is written.
+    """
+    ai = ps.ai_doppleganger
+    if ai is None:
+        return
+    try:
+        await asyncio.to_thread(ai.accountant.flush)
+    except OSError as e:
+        ai.logger.warning(f"Could not write the token ledger: {e!r}")
+
+class RoundController:
+    """
+    Owns everything that runs during one chat round and tears it down deterministically.
+
+    The countdown timer, message display, AI responder and user input run as children of one
+    task group. The timer signals the end of the round through an `asyncio.Event`. When it
+    fires, the other children are cancelled and awaited before `run` returns. No task outlives
+    its round.
+
+    Pre-round hooks run after the icebreaker is asked and before the chat tasks start (e.g.
+    prefetching). Post-round hooks always run once the round's tasks are gone (cleanup), even
+    if the round was cancelled.
+    """
+
+    def __init__(
+            self,
+            gs: GameState,
+            ps: PlayerState,
+            duration: int = ROUND_DURATION,
+            pre_round_hooks: Optional[List[RoundHook]] = None,
+            post_round_hooks: Optional[List[RoundHook]] = None):
+        """
+        Args:
+            gs (GameState): The shared game state, including chat paths and player data.
+            ps (PlayerState): The current player's state.
+            duration (int): Round length in seconds, measured from `ps.starttime`.
+            pre_round_hooks (List[RoundHook]): Awaited with (gs, ps) before the chat starts.
+            post_round_hooks (List[RoundHook]): Awaited with (gs, ps) after the chat ends.
+        """
+        self.gs = gs
+        self.ps = ps
+        self.duration = duration
+        self.pre_round_hooks = list(pre_round_hooks or [])
+        self.post_round_hooks = list(post_round_hooks or [])
+        self.round_over = asyncio.Event()
+
+    def end_round(self) -> None:
+        """Ends the round early (the same path the timer takes)."""
+        self.round_over.set()
+
+    async def _run_timer(self) -> None:
+        await countdown_timer(self.duration, self.gs, self.ps, self.gs.chat_log_path)
+        self.round_over.set()
+
+    async def run(self) -> None:
+        """Runs the round until the timer (or `end_round`) ends it."""
+        gs, ps = self.gs, self.ps
+        chat_log = gs.chat_log_path
+        # Check if the file already exists
+        if not os.path.isfile(chat_log):
+            # Ensure the directory exists
+            os.makedirs(os.path.dirname(chat_log), exist_ok=True)
+            # Create the file
+            with open(chat_log, "w") as f:
+                f.write("")
+
+        # Ask the icebreaker if you are the timekeeper (to avoid duplicate prints)
+        if gs.ice_asked <= gs.round_number: # just a safe guard. 
+            ask_icebreaker(gs, ps, chat_log)
+
+        try:
+            for hook in self.pre_round_hooks:
+                await hook(gs, ps)
+
+            async with TaskGroup() as tg:
+                tasks = [
+                    tg.create_task(self._run_timer(), name="round-timer"),
+                    tg.create_task(refresh_messages(chat_log, gs, ps), name="round-display"),
+                    tg.create_task(ai_response(chat_log, ps), name="round-ai"),
+                    tg.create_task(user_input(chat_log, ps), name="round-input"),
+                ]
+                await self.round_over.wait()
+
+                # QUIT ANY ACTIVE AI RESPONSES SO THAT THEY DON'T SHOW UP LATER
+                for task in tasks:
+                    task.cancel()
+            # Leaving the task group has awaited every cancelled task
+            gs.round_complete = True
+        finally:
+            for hook in self.post_round_hooks:
+                await hook(gs, ps)
+
 async def play_game(ss: ScreenEnum, gs: GameState, ps: PlayerState) -> tuple[ScreenEnum, GameState, PlayerState]:
     """
     Runs the main game loop for a single round of chat-based interaction.
@@ -215,9 +394,11 @@ async def play_game(ss: ScreenEnum, gs: GameState, ps: PlayerState) -> tuple[Scr
     This function:
     - Initializes the chat log file if it doesn't exist.
     - Asks the current icebreaker question (if the round has just started).
-    - Launches asynchronous tasks for message display, AI responses, and user input.
-    - Runs a countdown timer and monitors for round completion.
-    - Gracefully cancels all active tasks once the round ends.
+    - Runs the round through a RoundController, which owns the countdown timer and the
+      message display, AI response and user input tasks.
+    - Has the AI doppelgänger prefetch its answer to the next icebreaker in the background.
+    - Writes the AI doppelgänger's token usage of the round to the lobby's ledger.
+    - Returns once the round has ended and all of its tasks have been torn down.
 
     Args:
         ss (ScreenEnum): The current screen state (not updated in this function).
@@ -228,49 +409,19 @@ async def play_game(ss: ScreenEnum, gs: GameState, ps: PlayerState) -> tuple[Scr
         tuple: A tuple of (ScreenEnum.VOTE, updated GameState, updated PlayerState).
     """
 
-    chat_log = gs.chat_log_path
-    # Check if the file already exists
-    if not os.path.isfile(chat_log):
-        # Ensure the directory exists
-        os.makedirs(os.path.dirname(chat_log), exist_ok=True)
-        # Create the file
-        with open(chat_log, "w") as f:
-            f.write("")
-
-    # Ask the icebreaker if you are the timekeeper (to avoid duplicate prints)
-    if gs.ice_asked <= gs.round_number: # just a safe guard. 
-        ask_icebreaker(gs, ps, chat_log)
-
+    report_status(gs, LobbyStatus.PLAYING)
+    controller = RoundController(
+        gs, ps,
+        pre_round_hooks=[prefetch_next_icebreaker],
+        post_round_hooks=[prefetch_next_icebreaker, flush_token_usage],
+    )
     try:
-        # Start the countdown timer without awaiting it
-        asyncio.create_task(countdown_timer(ROUND_DURATION, gs, ps, chat_log))
-
-        # Create independent tasks for each asynchronous function
-        message_task = asyncio.create_task(refresh_messages(chat_log, gs, ps))
-        ai_task = asyncio.create_task(ai_response(chat_log, ps))
-        user_input_task = asyncio.create_task(user_input(chat_log, ps))
-
-        # Continuously check if the round is complete
-        while not gs.round_complete:
-            await asyncio.sleep(0.1)  # Small delay to prevent busy-waiting
-
-        # Cancel the ongoing tasks since the round is over
-        for task in [message_task, ai_task, user_input_task]:
-            task.cancel()
-            try:
-                await task  # Wait for the cancellation to complete
-            except asyncio.CancelledError:
-                # print(f"Task {task} successfully cancelled.")
-                pass
-
-        # Log the end of the round        
-        # QUIT ANY ACTIVE AI RESPONSES SO THAT THEY DON'T SHOW UP LATER
-        for task in [message_task, ai_task, user_input_task]:
-            task.cancel()
-        # MOVE ONTO VOTING SCREEN
-        return ScreenEnum.VOTE, gs, ps
-
+        await controller.run()
     except asyncio.CancelledError:
-        print("\nChat room closed gracefully.")
+        cprint("\nChat room closed gracefully.")
+        raise
     except Exception as e:
-        print(f"Unexpected error: {e}")
\ No newline at end of file
+        cprint(f"Unexpected error: {e}")
+
+    # MOVE ONTO VOTING SCREEN
+    return ScreenEnum.VOTE, gs, ps
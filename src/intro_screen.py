@@ -1,13 +1,14 @@
-import time
+import asyncio
 from colorama import Fore, Style, init
 from utils.asthetics import clear_screen
+from utils.console import ainput, cprint
 from utils.logging_utils import MasterLogger
 from utils.states import ScreenEnum, PlayerState, GameState
 
 # Initialize Colorama
 init(autoreset=True)
 
-def play_intro(ss: ScreenEnum, gs: GameState, ps: PlayerState) -> tuple[ScreenEnum, GameState, PlayerState]:
+async def play_intro(ss: ScreenEnum, gs: GameState, ps: PlayerState) -> tuple[ScreenEnum, GameState, PlayerState]:
     """
     Welcome players to the game with an engaging introduction screen.
     This function displays the game's premise, rules, and objectives in a colorful and interactive manner.
@@ -70,12 +71,12 @@ Your job? Figure out who's real and who's not before it's too late."""),
     ]
 
     for color, section in intro_sections:
-        print(color + section)  # Print the section in the specified color
-        print("\n\n")
-        input(Fore.MAGENTA + "Press Enter to continue...")
-        time.sleep(0.1)
+        cprint(color + section)  # Print the section in the specified color
+        cprint("\n\n")
+        await ainput(Fore.MAGENTA + "Press Enter to continue...")
+        await asyncio.sleep(0.1)
 
 #     print(Fore.GREEN + "Intro section complete! Let's Play!")
-#     input(Fore.MAGENTA + "Press Enter to continue...")
+#     await ainput(Fore.MAGENTA + "Press Enter to continue...")
     clear_screen()
     return ScreenEnum.SETUP, gs, ps
\ No newline at end of file
@@ -1,24 +1,64 @@
 import asyncio
-import inspect
+import importlib
 import json
+import os
 import random
 import argparse
-from debug import debug_setup
-from utils.chatbot.ai_v5 import AIPlayer
-from utils.states import PlayerState, ScreenEnum
-from setup import collect_player_data
-from intro_screen import play_intro
-from game import play_game    # New screen uses curses for separate input spot
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from utils.console import cprint
+from utils.states import GameState, PlayerState, ScreenEnum
 # from game_MVP_NEW import play_game
 # from fake_chat import play_game # FOR DEBUGGING
-from score import score_screen
-import inspect
-from voting import voting_round
 # import signal
 
 # Importing constants and logging
 from utils.constants import BLANK_GS, BLANK_PS, ICEBREAKERS
 from utils.logging_utils import MasterLogger
+from utils.profiling import Diagnostics
+from utils.metrics import ACTIVE_PLAYERS, dump_periodically, start_http_server
+
+# Screen handlers are imported the first time their screen is shown. The debug and chat screens
+# pull in the LLM stack (openai, pydantic, yaml), which is not needed to draw the first screen.
+SCREEN_HANDLERS: Dict[ScreenEnum, Tuple[str, str]] = {
+    ScreenEnum.INTRO: ("intro_screen", "play_intro"),
+    ScreenEnum.SETUP: ("setup", "collect_player_data"),
+    ScreenEnum.DEBUG: ("debug", "debug_setup"),
+    ScreenEnum.CHAT: ("game", "play_game"),
+    ScreenEnum.SCORE: ("score", "score_screen"),
+    ScreenEnum.VOTE: ("voting", "voting_round"),
+}
+
+# Packages that should not be imported before the first screen is interactive
+HEAVY_PACKAGES = ("openai", "pydantic", "yaml", "dotenv", "httpx", "tqdm")
+
+_loaded_handlers: Dict[ScreenEnum, Callable] = {}
+
+Checkpoint = Callable[[ScreenEnum, ScreenEnum, GameState, PlayerState], Awaitable[bool]]
+
+def load_handler(ss: ScreenEnum) -> Callable:
+    """
+    Returns the handler coroutine for a screen, importing its module on first use.
+
+    Args:
+        ss (ScreenEnum): The screen to show.
+
+    Returns:
+        Callable: The screen's handler.
+    """
+    if ss not in _loaded_handlers:
+        module_name, func_name = SCREEN_HANDLERS[ss]
+        _loaded_handlers[ss] = getattr(importlib.import_module(module_name), func_name)
+    return _loaded_handlers[ss]
+
+def profile_startup(debug: bool) -> None:
+    """Prints an import-time breakdown of everything loaded before the first screen."""
+    from utils.startup_profile import format_report, profile_imports
+    first_screen = "DEBUG" if debug else "SETUP"
+    profile = profile_imports(
+        f"import main; main.load_handler(main.ScreenEnum.{first_screen})",
+        src_dir=os.path.dirname(os.path.abspath(__file__)),
+    )
+    print(format_report(profile, heavy=HEAVY_PACKAGES))
 
 def parse_args():
     """
@@ -50,19 +90,115 @@ def parse_args():
         "--print_prompts", action="store_true",
         help="If set, shows the prompts that the LLMs process during chat"
     )
+    parser.add_argument(
+        "--profile-startup", action="store_true",
+        help="Print an import-time breakdown of game startup and exit"
+    )
+    parser.add_argument(
+        "--profile-screens", action="store_true",
+        help="Dump a cProfile of every screen to the lobby's log folder"
+    )
+    parser.add_argument(
+        "--trace-malloc", type=float, default=None, metavar="SECONDS",
+        help="Log the top memory allocation growth every SECONDS to the lobby's log folder"
+    )
+    parser.add_argument(
+        "--loop-lag-ms", type=float, default=None, metavar="MS",
+        help="Log every event loop block longer than MS, with its call site, to the lobby's log folder"
+    )
+    parser.add_argument(
+        "--trace", action="store_true",
+        help="Record a Chrome trace (screens, LLM stages, disk, barriers) to the lobby's log folder"
+    )
+    parser.add_argument(
+        "--metrics-port", type=int, default=None,
+        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics"
+    )
+    parser.add_argument(
+        "--metrics-file", default=None,
+        help="Rewrite this file with the Prometheus metrics every few seconds"
+    )
     return parser.parse_args()
 
+async def run_screens(
+        ss: ScreenEnum, gs: GameState, ps: PlayerState, master_logger: MasterLogger,
+        handler_kwargs: Optional[Dict[ScreenEnum, dict]] = None,
+        stop_after: Optional[ScreenEnum] = None,
+        checkpoint: Optional[Checkpoint] = None,
+        diagnostics: Optional[Diagnostics] = None) -> Tuple[GameState, PlayerState]:
+    """
+    Runs the screen state machine for one player until it ends.
+
+    Used by the terminal game (which never stops) and by the headless server (which stops a
+    player's session after the score screen).
+
+    Args:
+        ss (ScreenEnum): The first screen to show.
+        gs (GameState): This player's game state.
+        ps (PlayerState): This player's state.
+        master_logger (MasterLogger): Logger for screen transitions.
+        handler_kwargs (Optional[Dict[ScreenEnum, dict]]): Extra keyword arguments for specific
+            screens' handlers (e.g. the debug options for DEBUG).
+        stop_after (Optional[ScreenEnum]): Return once this screen has finished.
+        checkpoint (Optional[Checkpoint]): Awaited with (finished screen, next screen, gs, ps)
+            after every transition; returning False stops the loop before the next screen
+            (the server uses this to hand a lobby to another process between rounds).
+        diagnostics (Optional[Diagnostics]): Profiling tools to run the screens under (see
+            utils.profiling); their output follows the player into their lobby's folder.
+
+    Returns:
+        Tuple[GameState, PlayerState]: The final states.
+    """
+    handler_kwargs = handler_kwargs or {}
+
+    # Main game loop
+    while True:
+        # make sure the game state is in a valid state
+        if ss in SCREEN_HANDLERS:
+            # find out which handler to use based on the current game state (imported on first use)
+            handler = load_handler(ss)
+
+            # Every screen handler is a coroutine, so background tasks keep running during every screen.
+            finished = ss
+            screen = handler(ss, gs, ps, **handler_kwargs.get(ss, {}))
+            if diagnostics is not None:
+                screen = diagnostics.run_screen(ss, gs, screen)
+            next_state, next_gs, next_ps = await screen
+
+            ss = next_state
+            gs = next_gs
+            ps = next_ps
+            # Log the transition to the next state
+
+            master_logger.log(f"Transitioned to state: {ss}")
+            if diagnostics is not None:
+                diagnostics.bind(gs, ps)
+            if finished == stop_after:
+                return gs, ps
+            if checkpoint is not None and not await checkpoint(finished, ss, gs, ps):
+                return gs, ps
+
+        # if the game state is not valid, log an error and break the loop
+        else:
+            master_logger.error(f"Invalid game state encountered: {ss}")
+            cprint("Invalid game state")
+            return gs, ps
+
 async def main():
     '''
     This is the main entry point for the game.
 
     It initializes the game state, sets up the master logger, and starts the main game loop.
     The game loop handles transitions between different game states, such as the intro screen, player setup, game play, scoring, and voting rounds.
-    The game states are managed using a dictionary that maps each state to its corresponding handler function.
+    The game states are managed using a dictionary that maps each state to the module and function of its handler;
+    a screen's module is only imported when that screen is first shown.
     The game can be run in debug mode, which allows for skipping the intro and setup phases and going straight to the chat phase.
     The game state and player state are initialized to blank states, and the icebreakers are shuffled for the game.
     '''
     args = parse_args()
+    if args.profile_startup:
+        profile_startup(args.debug)
+        return
 
     master_logger = MasterLogger(
         init=True,
@@ -71,16 +207,6 @@ async def main():
     )
     master_logger.log("Game started - Initializing master logger")
 
-    # Dictionary mapping game states to their corresponding handler functions.
-    state_handler = {
-        ScreenEnum.INTRO: play_intro,
-        ScreenEnum.SETUP: collect_player_data,
-        ScreenEnum.DEBUG: debug_setup,
-        ScreenEnum.CHAT: play_game,
-        ScreenEnum.SCORE: score_screen,
-        ScreenEnum.VOTE: voting_round,
-    }
-
     # if debugging set up the game to go straight to the chat phase by going through debug.py
     if args.debug: 
         ss = ScreenEnum.DEBUG
@@ -95,38 +221,39 @@ async def main():
     gs.icebreakers = ICEBREAKERS
     ps = BLANK_PS
 
-    # Main game loop
-    while True:
-        # make sure the game state is in a valid state
-        if ss in state_handler:
-            # find out which handler to use based on the current game state
-            handler = state_handler[ss]
-
-            # If we're in debug mode and in DEBUG state, we need to pass extra args
-            if args.debug and ss == ScreenEnum.DEBUG:
-                #                              # handler = debug_setup
-                next_state, next_gs, next_ps = handler(ss, gs, ps, args.num_players, args.player_number, args.print_prompts)
-            
-            # If the handler is a coroutine function, await it to get the next state, game state, and player state.
-            elif inspect.iscoroutinefunction(handler):
-                next_state, next_gs, next_ps = await handler(ss, gs, ps)
-
-            # If the handler is a regular function, call it to get the next state, game state, and player state.
-            else:
-                next_state, next_gs, next_ps = handler(ss, gs, ps)
+    handler_kwargs = {}
+    if args.debug:
+        handler_kwargs[ScreenEnum.DEBUG] = {
+            "num_players": args.num_players,
+            "player_number": args.player_number,
+            "print_prompts": args.print_prompts,
+        }
 
-            ss = next_state
-            gs = next_gs
-            ps = next_ps
-            # Log the transition to the next state
-
-            master_logger.log(f"Transitioned to state: {ss}")
+    diagnostics = Diagnostics(
+        profile_screens=args.profile_screens,
+        malloc_interval=args.trace_malloc,
+        lag_threshold=args.loop_lag_ms / 1000 if args.loop_lag_ms is not None else None,
+        trace=args.trace,
+    )
+    if diagnostics.enabled:
+        master_logger.log("Profiling enabled - output goes to the lobby's logs folder")
+        diagnostics.start()
+    if args.metrics_port is not None:
+        start_http_server(args.metrics_port)
+        master_logger.log(f"Serving metrics on http://127.0.0.1:{args.metrics_port}/metrics")
+    metrics_dump = asyncio.create_task(dump_periodically(args.metrics_file)) if args.metrics_file else None
 
-        # if the game state is not valid, log an error and break the loop
-        else:
-            master_logger.error(f"Invalid game state encountered: {ss}")
-            print("Invalid game state")
-            break
+    ACTIVE_PLAYERS.inc()
+    try:
+        await run_screens(ss, gs, ps, master_logger, handler_kwargs,
+                          diagnostics=diagnostics if diagnostics.enabled else None)
+    finally:
+        ACTIVE_PLAYERS.dec()
+        if diagnostics.enabled:
+            await diagnostics.stop()
+        if metrics_dump is not None:
+            metrics_dump.cancel()
+            await asyncio.gather(metrics_dump, return_exceptions=True)
 
 if __name__ == "__main__":
     # Run the main game loop using asyncio for asynchronous operations.
@@ -0,0 +1,52 @@
+'''
+2026-10-19
+How to run:
+   python ./src/merge_traces.py ./data/runtime/lobbies/lobby_3 [-o lobby_3_trace.json]
+   python ./src/merge_traces.py path/to/OTTER/trace.json path/to/PANDA/trace.json -o round.json
+
+Merges the Chrome traces written by `main.py --trace` (one per terminal) into one timeline,
+aligned on the lobby's shared clock (see utils.tracing). Give it trace files, or lobby folders
+to pick up every `logs/<code_name>/trace.json` in them. Open the result in Perfetto
+(https://ui.perfetto.dev) or chrome://tracing.
+'''
+import argparse
+import glob
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from utils.tracing import merge_traces
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Merge per-terminal traces onto one timeline.")
+    parser.add_argument("paths", nargs="+", help="trace.json files or lobby folders")
+    parser.add_argument("-o", "--output", default="merged_trace.json", help="Where to write the merged trace")
+    return parser.parse_args()
+
+def find_traces(paths: list) -> list:
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(sorted(glob.glob(os.path.join(path, "logs", "*", "trace.json"))))
+        else:
+            found.append(path)
+    return found
+
+def main():
+    args = parse_args()
+    trace_paths = find_traces(args.paths)
+    if not trace_paths:
+        sys.exit(f"No traces found in {', '.join(args.paths)}")
+    traces = []
+    for path in trace_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            traces.append(json.load(f))
+    merged = merge_traces(traces)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(merged, f)
+    spans = sum(1 for e in merged["traceEvents"] if e.get("ph") == "X")
+    print(f"Merged {len(traces)} traces ({spans} spans) into {args.output}")
+
+if __name__ == "__main__":
+    main()
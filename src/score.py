@@ -1,8 +1,25 @@
 from colorama import Fore, Style
 from utils.states import ScreenEnum, PlayerState, GameState
 from utils.asthetics import clear_screen
+from utils.console import ainput, cprint
+from utils.lobby_registry import LobbyStatus, report_status
+from utils.logging_utils import MasterLogger
+from utils.prompting.budget import game_cost_report, lobby_ledger_path
 
-def score_screen(
+def log_game_cost(gs: GameState) -> None:
+    """Writes the lobby's per-round, per-AI token usage and cost to the master log."""
+    logger = MasterLogger.get_instance()
+    if logger is None or not gs.chat_log_path:
+        return
+    report = game_cost_report(lobby_ledger_path(gs.chat_log_path))
+    if not report:
+        logger.info("Game cost: no LLM usage recorded")
+        return
+    logger.info("Game cost (LLM tokens per round and AI):")
+    for line in report:
+        logger.info(f"  {line}")
+
+async def score_screen(
         ss: ScreenEnum, gs: GameState, ps: PlayerState
     ) -> tuple[ScreenEnum, GameState, PlayerState]:
     """
@@ -14,6 +31,7 @@ def score_screen(
     - Calculate and display the bot detection success rate.
     - Determine and display the winning team (humans or bots).
     - Share insights into the AI bots' behavior and prompt strategies.
+    - Log the game's LLM token usage and cost (from the lobby's token ledger).
 
     Args:
         ss (ScreenEnum): The current screen state (unused in this function).
@@ -25,8 +43,12 @@ def score_screen(
         the unchanged GameState and PlayerState.
     """
 
+    report_status(gs, LobbyStatus.FINISHED)
+    if ps.ai_doppleganger is not None:
+        ps.ai_doppleganger.accountant.flush()  # anything recorded after the last round's flush
+    log_game_cost(gs)
     clear_screen()
-    print(Fore.YELLOW + "=== 🏆 FINAL SCOREBOARD 🏆 ===\n" + Style.RESET_ALL)
+    cprint(Fore.YELLOW + "=== 🏆 FINAL SCOREBOARD 🏆 ===\n" + Style.RESET_ALL)
 
     # Combine active and voted off players
     all_players = gs.players + gs.players_voted_off
@@ -35,17 +57,17 @@ def score_screen(
     all_players = sorted(all_players, key=lambda p: p.code_name)
 
     # Display Players and Teams with enhanced formatting
-    print(Fore.CYAN + "👥 Players and Teams:" + Style.RESET_ALL)
-    print("─" * 50)
+    cprint(Fore.CYAN + "👥 Players and Teams:" + Style.RESET_ALL)
+    cprint("─" * 50)
     for player in all_players:
         team = "👤 Human" if player.is_human else "🤖 Bot"
         status = "✅ Active" if player.still_in_game else "❌ Voted Out"
-        print(f"{player.code_name:<15} | {team:<10} | {status:<12} | {player.color_name}")
-    print("─" * 50 + "\n")
+        cprint(f"{player.code_name:<15} | {team:<10} | {status:<12} | {player.color_name}")
+    cprint("─" * 50 + "\n")
 
     # Display Game Statistics
-    print(Fore.CYAN + "📊 Game Statistics:" + Style.RESET_ALL)
-    print("─" * 50)
+    cprint(Fore.CYAN + "📊 Game Statistics:" + Style.RESET_ALL)
+    cprint("─" * 50)
     
     # Calculate statistics
     total_players = len(all_players)
@@ -54,35 +76,35 @@ def score_screen(
     voted_out_humans = len([p for p in gs.players_voted_off if p.is_human])
     voted_out_bots = len([p for p in gs.players_voted_off if not p.is_human])
     
-    print(f"Total Rounds Played: {gs.round_number}")
-    print(f"Total Players: {total_players} ({total_humans} humans, {total_bots} bots)")
-    print(f"Players Voted Out: {len(gs.players_voted_off)} ({voted_out_humans} humans, {voted_out_bots} bots)")
+    cprint(f"Total Rounds Played: {gs.round_number}")
+    cprint(f"Total Players: {total_players} ({total_humans} humans, {total_bots} bots)")
+    cprint(f"Players Voted Out: {len(gs.players_voted_off)} ({voted_out_humans} humans, {voted_out_bots} bots)")
     
     # Calculate success rates
     bot_detection_rate = (voted_out_bots / total_bots * 100) if total_bots > 0 else 0
-    print(f"Bot Detection Rate: {bot_detection_rate:.1f}%")
-    print("─" * 50 + "\n")
+    cprint(f"Bot Detection Rate: {bot_detection_rate:.1f}%")
+    cprint("─" * 50 + "\n")
 
     # Display Final Game Outcome
-    print(Fore.CYAN + "🎯 Game Outcome:" + Style.RESET_ALL)
-    print("─" * 50)
+    cprint(Fore.CYAN + "🎯 Game Outcome:" + Style.RESET_ALL)
+    cprint("─" * 50)
     if bot_detection_rate >= 50:
-        print(Fore.GREEN + "🎉 Humans win! Successfully identified majority of bots!" + Style.RESET_ALL)
+        cprint(Fore.GREEN + "🎉 Humans win! Successfully identified majority of bots!" + Style.RESET_ALL)
     else:
-        print(Fore.RED + "😔 Bots win! Less than 50% of bots were detected." + Style.RESET_ALL)
-    print("─" * 50 + "\n")
+        cprint(Fore.RED + "😔 Bots win! Less than 50% of bots were detected." + Style.RESET_ALL)
+    cprint("─" * 50 + "\n")
 
     # Display Prompt Engineering Insight
-    print(Fore.CYAN + "💡 Prompt Engineering Insight:" + Style.RESET_ALL)
-    print("─" * 50)
-    print("The AI bots used these strategies to mimic human behavior:")
-    print("• Incorporated personal info from player profiles")
-    print("• Generated contextually relevant responses")
-    print("• Maintained consistent personality traits")
-    print("• Used natural language patterns and casual chat style")
-    print("─" * 50)
+    cprint(Fore.CYAN + "💡 Prompt Engineering Insight:" + Style.RESET_ALL)
+    cprint("─" * 50)
+    cprint("The AI bots used these strategies to mimic human behavior:")
+    cprint("• Incorporated personal info from player profiles")
+    cprint("• Generated contextually relevant responses")
+    cprint("• Maintained consistent personality traits")
+    cprint("• Used natural language patterns and casual chat style")
+    cprint("─" * 50)
 
-    print()
-    input(Fore.MAGENTA + "Press Enter to return to the intro screen..." + Style.RESET_ALL)
+    cprint()
+    await ainput(Fore.MAGENTA + "Press Enter to return to the intro screen..." + Style.RESET_ALL)
 
     return ScreenEnum.INTRO, gs, ps
\ No newline at end of file
@@ -0,0 +1,142 @@
+'''
+2026-10-19
+How to run:
+   python ./src/serve.py --host 0.0.0.0 --port 7777 --lobby-size 3 [--workers 4] [--http-port 8080]
+Then each player connects with a plain line-based client, e.g.:
+   nc <server-host> 7777
+or, with --http-port, opens http://<server-host>:8080/ in a browser, or runs:
+   python ./src/client.py ws://<server-host>:8080/ws
+
+Headless mode: hosts many lobbies in one asyncio process instead of one terminal process per
+player. Each TCP connection is one player; players are seated in lobbies of --lobby-size as
+they connect. With --workers N the lobbies are spread over N worker processes (see
+server.sharding); the connections themselves stay in this process. --http-port adds the
+HTTP/WebSocket gateway (see server.gateway) next to the raw TCP port. --archive-every archives
+finished lobbies in the background (see utils.archiver). --metrics-port / --metrics-file publish
+Prometheus metrics (see utils.metrics); with --workers each worker writes its own
+`<metrics-file>.worker<n>` next to the supervisor's file.
+'''
+import argparse
+import asyncio
+import os
+import sys
+from typing import Union
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from server.game_server import GameServer
+from server.gateway import Gateway
+from server.sharding import ShardSupervisor
+from server.session import ClientSession
+from archive_lobbies import build_archiver
+from utils.logging_utils import MasterLogger
+from utils.metrics import METRICS_FILE_ENV, dump_periodically, start_http_server
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the headless multi-lobby game server.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=7777, help="TCP port to listen on")
+    parser.add_argument("--lobby-size", type=int, default=3, help="Human players per lobby")
+    parser.add_argument("--max-concurrent-llm", type=int, default=None,
+                        help="Process-wide cap on in-flight LLM completions (per worker with --workers)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Worker processes to run lobbies in (0: run them in this process)")
+    parser.add_argument("--http-port", type=int, default=None,
+                        help="Also serve the browser client and WebSocket gateway on this port")
+    parser.add_argument("--max-pending-input", type=int, default=32,
+                        help="Unread lines per player before the server stops reading from them")
+    parser.add_argument("--max-pending-output", type=int, default=2048,
+                        help="Unsent output chunks per player before they are disconnected as too slow")
+    parser.add_argument("--archive-every", type=float, default=0,
+                        help="Archive finished lobbies every this many minutes (0: never)")
+    parser.add_argument("--rebalance-interval", type=float, default=10.0,
+                        help="Seconds between worker load checks (with --workers)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Serve Prometheus metrics on http://HOST:PORT/metrics")
+    parser.add_argument("--metrics-file", default=None,
+                        help="Rewrite this file with the Prometheus metrics every few seconds")
+    return parser.parse_args()
+
+async def handle_connection(server: Union[GameServer, ShardSupervisor], reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter, args: argparse.Namespace):
+    """Bridges one TCP connection to a ClientSession: lines in, screen output out."""
+    session = ClientSession(max_pending_input=args.max_pending_input, max_pending_output=args.max_pending_output)
+
+    async def pump_output():
+        while True:
+            text = await session.read_output_batch()
+            if text is None:
+                # Session closed (game over or lobby closed): hang up, which also ends the read loop
+                writer.close()
+                break
+            writer.write(text.replace("\n", "\r\n").encode("utf-8"))
+            await writer.drain()
+
+    output_task = asyncio.create_task(pump_output())
+    try:
+        await server.join(session)
+        while not session.closed.is_set():
+            line = await reader.readline()
+            if not line:
+                break
+            await session.submit(line.decode("utf-8", errors="replace").rstrip("\r\n"))
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        session.close()
+        await asyncio.gather(output_task, return_exceptions=True)
+        writer.close()
+
+async def main():
+    args = parse_args()
+    master_logger = MasterLogger(
+        init=True,
+        clear=False,
+        log_path="./logs/_server.log"
+    )
+    master_logger.log("Server started - Initializing master logger")
+    if args.metrics_file:
+        os.environ[METRICS_FILE_ENV] = args.metrics_file   # inherited by worker processes
+
+    if args.workers > 0:
+        server = ShardSupervisor(
+            num_workers=args.workers,
+            lobby_size=args.lobby_size,
+            max_concurrent_llm=args.max_concurrent_llm,
+            rebalance_interval=args.rebalance_interval,
+        )
+    else:
+        server = GameServer(lobby_size=args.lobby_size, max_concurrent_llm=args.max_concurrent_llm)
+    listener = await asyncio.start_server(
+        lambda r, w: handle_connection(server, r, w, args), host=args.host, port=args.port
+    )
+    workers = f", {args.workers} workers" if args.workers > 0 else ""
+    print(f"Serving on {args.host}:{args.port} (lobbies of {args.lobby_size}{workers})")
+    if args.http_port is not None:
+        gateway = Gateway(server, args.max_pending_input, args.max_pending_output)
+        http_listener = await asyncio.start_server(gateway.handle, host=args.host, port=args.http_port)
+        print(f"Browser client on http://{args.host}:{args.http_port}/")
+    else:
+        http_listener = None
+    if args.metrics_port is not None:
+        start_http_server(args.metrics_port, host=args.host)
+        print(f"Metrics on http://{args.host}:{args.metrics_port}/metrics")
+    background = []
+    if args.archive_every > 0:
+        background.append(asyncio.create_task(build_archiver(debug=False).run_forever(args.archive_every * 60)))
+    if args.metrics_file:
+        background.append(asyncio.create_task(dump_periodically(args.metrics_file)))
+    async with listener:
+        try:
+            await server.serve()
+        finally:
+            server.stop()
+            for task in background:
+                task.cancel()
+            if http_listener is not None:
+                http_listener.close()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
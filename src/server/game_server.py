@@ -0,0 +1,96 @@
+"""
+Headless game server: many lobbies in one asyncio process.
+
+Joining clients are seated in the first lobby that is still forming; a new lobby is opened when
+none has room. Each lobby runs in its own task group (see `server.lobby`), so a failing lobby
+never takes down the others. Everything else is shared process-wide: the OpenAI client and its
+connection pool, the limit on concurrent completions, and the parsed prompt YAML cache
+(`utils.prompting.prompter`).
+"""
+import asyncio
+import os
+from typing import Dict, List, Optional
+
+from server.lobby import Lobby
+from server.session import ClientSession
+from utils.lobby_registry import runtime_registry
+from utils.logging_utils import MasterLogger
+from utils.prompting.prompter import completion_limiter
+from utils.task_group import TaskGroup
+
+class GameServer:
+    """Seats clients into lobbies and runs those lobbies concurrently."""
+
+    def __init__(self, lobby_size: int = 3, max_concurrent_llm: Optional[int] = None,
+                 first_lobby_id: Optional[int] = None):
+        """
+        Args:
+            lobby_size (int): Human players per lobby.
+            max_concurrent_llm (Optional[int]): Process-wide cap on in-flight completions
+                (defaults to DOPPELBOT_MAX_CONCURRENT_LLM or 32).
+            first_lobby_id (Optional[int]): Lowest lobby number to hand out. Ids always come
+                from the lobby registry (`utils.lobby_registry`), so old lobbies are never reused.
+        """
+        self.lobby_size = lobby_size
+        if max_concurrent_llm is not None:
+            completion_limiter.configure(max_concurrent_llm)
+        self.lobbies: Dict[int, Lobby] = {}
+        self.first_lobby_id = first_lobby_id
+        self._forming: Optional[Lobby] = None
+        self._tg = None
+        self._ready = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self.logger = MasterLogger.get_instance()
+
+    async def join(self, session: Optional[ClientSession] = None) -> ClientSession:
+        """
+        Seats a client in a lobby and starts its game.
+
+        Args:
+            session (Optional[ClientSession]): The client's session (a new one if not given).
+
+        Returns:
+            ClientSession: The seated session.
+        """
+        await self._ready.wait()
+        session = session or ClientSession()
+        lobby = self._forming
+        if lobby is None or lobby.is_full or lobby.finished.is_set():
+            lobby = self._open_lobby()
+        await lobby.add(session)
+        if lobby.is_full:
+            self._forming = None
+        self.logger.info(f"Session {session.session_id} joined lobby {lobby.lobby_id} ({len(lobby.sessions)}/{lobby.size})")
+        return session
+
+    def _open_lobby(self) -> Lobby:
+        lobby = Lobby(runtime_registry.allocate(self.lobby_size, minimum=self.first_lobby_id), self.lobby_size)
+        self.lobbies[lobby.lobby_id] = lobby
+        self._forming = lobby
+        task = self._tg.create_task(lobby.run(), name=f"lobby-{lobby.lobby_id}")
+        task.add_done_callback(lambda _: self.lobbies.pop(lobby.lobby_id, None))
+        self.logger.info(f"Opened lobby {lobby.lobby_id}")
+        return lobby
+
+    def health(self) -> List[dict]:
+        """Load report in the same shape as `ShardSupervisor.health` (one in-process worker)."""
+        return [{
+            "worker": 0,
+            "alive": True,
+            "pid": os.getpid(),
+            "lobbies": sorted(self.lobbies),
+            "sessions": sum(len(lobby.sessions) for lobby in self.lobbies.values()),
+        }]
+
+    async def serve(self) -> None:
+        """Runs until `stop` is called; then closes every lobby and waits for them to finish."""
+        async with TaskGroup() as tg:
+            self._tg = tg
+            self._ready.set()
+            await self._stopping.wait()
+            for lobby in list(self.lobbies.values()):
+                lobby.cancel()
+
+    def stop(self) -> None:
+        """Asks `serve` to shut down."""
+        self._stopping.set()
@@ -0,0 +1,168 @@
+"""
+HTTP + WebSocket gateway: players join from a browser (or `src/client.py`) instead of a shell.
+
+Routes:
+    GET /        a small browser client (`gateway_client.html`)
+    GET /ws      WebSocket: one connection is one player, seated like a TCP client
+    GET /health  JSON load report (`server.health()` plus gateway counters)
+
+Messages are JSON text frames. The server pushes the game as typed events:
+    {"type": "welcome", "session": "s3", "lobby": 2}
+    {"type": "round_start", "round": 1, "icebreaker": "..."}
+    {"type": "chat", "sender": "LION", "text": "..."}        sender "GAME MASTER" for announcements
+    {"type": "vote_prompt", "round": 1, "options": [{"choice": 1, "code_name": "LION"}, ...]}
+    {"type": "vote_result", "round": 1, "voted_out": "LION", "outcome": "..."}   voted_out may be null
+    {"type": "closed", "reason": "..."}
+and, in order with them, the terminal text of every screen (setup questions, prompts, scores;
+with ANSI colour codes) for clients that show a terminal:
+    {"type": "output", "text": "..."}
+and accepts:
+    {"type": "input", "text": "..."}         a line typed at the current prompt
+    {"type": "chat", "text": "..."}          same as input; named for clients with a chat box
+    {"type": "vote", "choice": 2}            the number to enter at the voting prompt
+A plain (non-JSON) text frame is treated as input.
+
+Backpressure is per connection: output chunks are batched and each frame waits for the socket
+to drain, a client that stops reading is dropped once its session's output queue is full, and
+the gateway stops reading from a client while its unread input queue is full.
+"""
+import asyncio
+import json
+import os
+from typing import Optional
+
+from server.session import ClientSession
+from server.websocket import WebSocket, WebSocketError, accept_key, read_http_head
+from utils.logging_utils import MasterLogger
+
+CLIENT_PAGE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gateway_client.html")
+
+class Gateway:
+    """Serves the HTTP routes and bridges WebSocket clients to a game server."""
+
+    def __init__(self, server, max_pending_input: int = 32, max_pending_output: int = 2048):
+        """
+        Args:
+            server: A `GameServer` or `ShardSupervisor`.
+            max_pending_input (int): Unread lines per player before the gateway stops reading.
+            max_pending_output (int): Unsent output chunks per player before it is disconnected.
+        """
+        self.server = server
+        self.max_pending_input = max_pending_input
+        self.max_pending_output = max_pending_output
+        self.connections = 0
+        self.slow_disconnects = 0
+        self._client_page: Optional[bytes] = None
+        self.logger = MasterLogger.get_instance()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Handles one HTTP connection (one request, or one WebSocket session)."""
+        try:
+            request_line, headers = await read_http_head(reader)
+            method, path, _ = (request_line.split(" ", 2) + ["", ""])[:3]
+            path = path.split("?", 1)[0]
+            if method != "GET":
+                await self._respond(writer, 405, "text/plain", b"Method not allowed")
+            elif path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                await self._websocket(reader, writer, headers)
+            elif path == "/":
+                await self._respond(writer, 200, "text/html; charset=utf-8", self._page())
+            elif path == "/health":
+                await self._respond(writer, 200, "application/json", json.dumps(self.health()).encode("utf-8"))
+            else:
+                await self._respond(writer, 404, "text/plain", b"Not found")
+        except (WebSocketError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def health(self) -> dict:
+        return {
+            "connections": self.connections,
+            "slow_disconnects": self.slow_disconnects,
+            "workers": self.server.health(),
+        }
+
+    def _page(self) -> bytes:
+        if self._client_page is None:
+            with open(CLIENT_PAGE_PATH, "rb") as f:
+                self._client_page = f.read()
+        return self._client_page
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, content_type: str, body: bytes) -> None:
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}[status]
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    async def _websocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, headers: dict) -> None:
+        key = headers.get("sec-websocket-key")
+        if not key or headers.get("sec-websocket-version") != "13":
+            await self._respond(writer, 400, "text/plain", b"Bad WebSocket handshake")
+            return
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+
+        ws = WebSocket(reader, writer)
+        session = ClientSession(max_pending_input=self.max_pending_input, max_pending_output=self.max_pending_output,
+                                events=True)
+        self.connections += 1
+        output_task = asyncio.create_task(self._pump_output(ws, session))
+        try:
+            await self.server.join(session)
+            await ws.send(json.dumps({"type": "welcome", "session": session.session_id, "lobby": session.lobby_id}))
+            while not session.closed.is_set():
+                message = await ws.recv()
+                if message is None:
+                    break
+                for line in self._input_lines(message):
+                    await session.submit(line)
+        except (WebSocketError, ConnectionError):
+            pass
+        finally:
+            self.connections -= 1
+            session.close()
+            await asyncio.gather(output_task, return_exceptions=True)
+            if session.overflowed:
+                self.slow_disconnects += 1
+                self.logger.warning(f"Session {session.session_id} dropped: client not reading its output")
+            await ws.close()
+
+    @staticmethod
+    async def _pump_output(ws: WebSocket, session: ClientSession) -> None:
+        while True:
+            output = await session.read_output_batch()
+            if output is None:
+                break
+            if isinstance(output, dict):
+                await ws.send(json.dumps(output))
+            else:
+                await ws.send(json.dumps({"type": "output", "text": output}))
+        reason = "too slow" if session.overflowed else "game over"
+        await ws.send(json.dumps({"type": "closed", "reason": reason}))
+        await ws.close()  # also ends the read loop
+
+    @staticmethod
+    def _input_lines(message: str) -> list:
+        """The input lines carried by one client message (see the module docstring)."""
+        try:
+            data = json.loads(message)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            return message.splitlines() or [""]
+        if data.get("type") == "vote":
+            return [str(data.get("choice", ""))]
+        if data.get("type") in ("input", "chat"):
+            return str(data.get("text", "")).splitlines() or [""]
+        return []
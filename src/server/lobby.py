@@ -0,0 +1,214 @@
+"""
+A lobby hosted by the headless server.
+
+Every player in the lobby runs the same screen loop as the terminal game (`main.run_screens`),
+each with its own GameState/PlayerState and AI doppelganger. The players still coordinate
+through the lobby's files, exactly like separate terminals. All of a lobby's player tasks live
+in one task group: if a player disconnects or a screen fails, the rest of that lobby is
+cancelled and its sessions are closed. Other lobbies are not affected.
+
+A lobby can also be handed to another process between rounds (see `server.sharding`): after
+`request_migration`, the players stop where voting hands over to the next chat round, and
+`export_snapshot` captures everything needed to resume the players elsewhere. Players reach
+that boundary at different times, so the first one to reach it decides for the whole lobby
+whether it is a hand-off: they all stop there, or all play on (and stop at the next one).
+"""
+import asyncio
+import os
+from typing import Dict, List, Optional, Tuple
+
+from main import run_screens
+from game import drop_ai_response_lock
+from server.session import ClientSession, SessionClosed
+from utils.console import set_console
+from utils.constants import ICEBREAKERS, blank_game_state, blank_player_state
+from utils.lobby_registry import runtime_registry
+from utils.logging_utils import MasterLogger
+from utils.metrics import ACTIVE_LOBBIES, ACTIVE_PLAYERS
+from utils.snapshot import decode_game_state, encode_game_state
+from utils.states import GameState, PlayerState, ScreenEnum
+from utils.task_group import TaskGroup
+
+# A player's screen loop, stopped at a round boundary: (next screen, game state, player state)
+ParkedPlayer = Tuple[ScreenEnum, GameState, PlayerState]
+
+def restore_player(entry: dict) -> ParkedPlayer:
+    """
+    Rebuilds one player exported by `Lobby.export_snapshot`, including its AI doppelganger.
+
+    Blocking (builds the AI's prompters); run it in a worker thread.
+    """
+    from utils.chatbot.ai_v5 import AIPlayer
+
+    gs = decode_game_state(entry["gs"]).to_game_state()
+    ps = PlayerState.from_record(entry["ps"])
+    ps.logger = MasterLogger.get_instance()
+    if entry.get("ai"):
+        ai = AIPlayer()
+        ai.restore_state(entry["ai"])
+        ai.initialize_game_state(gs)
+        ps.ai_doppleganger = ai
+    return ScreenEnum[entry["screen"]], gs, ps
+
+class Lobby:
+    """A group of `size` human players who play one game together."""
+
+    def __init__(self, lobby_id: int, size: int):
+        """
+        Args:
+            lobby_id (int): Lobby number (also the lobby directory, `lobby_<id>`).
+            size (int): Number of human players the game waits for.
+        """
+        self.lobby_id = lobby_id
+        self.size = size
+        self.sessions: List[ClientSession] = []
+        self.started = False
+        self.finished = asyncio.Event()
+        self.parked: Dict[str, ParkedPlayer] = {}
+        self._migrating = False
+        self._boundaries: Dict[int, bool] = {}   # round about to start -> whether the lobby stops there
+        self._full = asyncio.Event()   # set once every seat's screen loop has started
+        self._playing = 0
+        self._tg = None
+        self._ready = asyncio.Event()
+        self.logger = MasterLogger.get_instance()
+
+    @property
+    def is_full(self) -> bool:
+        return len(self.sessions) >= self.size
+
+    @property
+    def migrated(self) -> bool:
+        """True once every player has stopped at a round boundary for a hand-off."""
+        return bool(self.sessions) and len(self.parked) == len(self.sessions)
+
+    @property
+    def chat_log_path(self) -> str:
+        return os.path.join(runtime_registry.lobby_dir(self.lobby_id), "chat_log.txt")
+
+    async def add(self, session: ClientSession, resume: Optional[dict] = None) -> None:
+        """
+        Seats `session` in this lobby and starts its screen loop.
+
+        Args:
+            session (ClientSession): The player's session.
+            resume (Optional[dict]): The player's entry from another lobby's `export_snapshot`;
+                the player continues from there instead of starting at setup.
+        """
+        if self.is_full:
+            raise ValueError(f"Lobby {self.lobby_id} is full")
+        # Take the seat before the first await, so concurrent joins never overfill the lobby
+        session.lobby_id = self.lobby_id
+        self.sessions.append(session)
+        await self._ready.wait()
+        self._tg.create_task(self._play(session, resume), name=f"lobby-{self.lobby_id}-{session.session_id}")
+        self._playing += 1
+        if self._playing >= self.size:
+            self._full.set()
+
+    def request_migration(self) -> None:
+        """
+        Stops every player at the next round boundary (voting → chat) so the lobby can move.
+
+        If a player has already passed the boundary the others are heading for, the lobby plays
+        on and stops at the following one.
+        """
+        self._migrating = True
+
+    def export_snapshot(self) -> dict:
+        """
+        Captures the parked players (GameState, PlayerState, AI memory, unread input).
+
+        Only valid once `migrated` is True.
+        """
+        players = []
+        for session in self.sessions:
+            next_ss, gs, ps = self.parked[session.session_id]
+            ai = ps.ai_doppleganger
+            players.append({
+                "session_id": session.session_id,
+                "screen": next_ss.name,
+                "gs": encode_game_state(gs).decode("utf-8"),
+                "ps": ps.to_record(),
+                "ai": ai.export_state() if ai is not None else None,
+                "pending_input": session.drain_input(),
+            })
+        return {"lobby_id": self.lobby_id, "size": self.size, "players": players}
+
+    def cancel(self) -> None:
+        """Stops the lobby (e.g. on server shutdown); all its sessions are closed."""
+        for session in self.sessions:
+            session.close()
+        self._full.set()
+
+    async def run(self) -> None:
+        """Runs every player's game until they have all finished (or parked). Never raises."""
+        self.started = True
+        ACTIVE_LOBBIES.inc()
+        try:
+            async with TaskGroup() as tg:
+                self._tg = tg
+                self._ready.set()
+                await self._full.wait()
+            if self.migrated:
+                self.logger.info(f"Lobby {self.lobby_id} parked for migration")
+            else:
+                self.logger.info(f"Lobby {self.lobby_id} finished")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:  # an ExceptionGroup on Python 3.11+
+            self.logger.warning(f"Lobby {self.lobby_id} ended early: {e!r}")
+            for session in self.sessions:
+                session.print("\nThe lobby was closed because a player left or an error occurred.")
+        finally:
+            ACTIVE_LOBBIES.dec()
+            if not self.migrated:
+                for session in self.sessions:
+                    session.close()
+            drop_ai_response_lock(self.chat_log_path)
+            self.finished.set()
+
+    async def _play(self, session: ClientSession, resume: Optional[dict]) -> None:
+        """One player's screen loop, with the session as the console for it and its children."""
+        set_console(session)
+        handler_kwargs = {
+            ScreenEnum.SETUP: {"preset": {"lobby": self.lobby_id, "number_of_human_players": self.size}},
+        }
+        if resume is None:
+            ss = ScreenEnum.SETUP
+            gs = blank_game_state()
+            gs.icebreakers = list(ICEBREAKERS)
+            ps = blank_player_state()
+            session.print(f"Welcome! You are in lobby {self.lobby_id} ({len(self.sessions)}/{self.size} players).")
+        else:
+            ss, gs, ps = await asyncio.to_thread(restore_player, resume)
+            for line in resume.get("pending_input", []):
+                session.feed(line)
+
+        async def checkpoint(finished: ScreenEnum, next_ss: ScreenEnum, gs: GameState, ps: PlayerState) -> bool:
+            if finished != ScreenEnum.VOTE or next_ss != ScreenEnum.CHAT:
+                return True
+            # Voting has already moved gs to the round about to start, the same for every player
+            stop = self._boundaries.setdefault(gs.round_number, self._migrating)
+            if stop:
+                self.parked[session.session_id] = (next_ss, gs, ps)
+            return not stop
+
+        screens = asyncio.create_task(
+            run_screens(ss, gs, ps, self.logger, handler_kwargs, stop_after=ScreenEnum.SCORE, checkpoint=checkpoint)
+        )
+        closed = asyncio.create_task(session.closed.wait())
+        ACTIVE_PLAYERS.inc()
+        try:
+            done, _ = await asyncio.wait({screens, closed}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            ACTIVE_PLAYERS.dec()
+            for task in (screens, closed):
+                task.cancel()
+            await asyncio.gather(screens, closed, return_exceptions=True)
+        if screens in done:
+            screens.result()  # re-raise a screen error into the task group
+            if session.session_id not in self.parked:
+                session.close()
+        else:
+            raise SessionClosed(session.session_id)
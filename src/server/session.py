@@ -0,0 +1,149 @@
+"""
+Client sessions for the headless server.
+
+A `ClientSession` is a `Console` whose input lines are fed in by a transport (a TCP connection
+in `serve.py`) and whose output is queued for that transport to send. The screens run unchanged:
+`ainput` and `cprint` resolve to the session of the player whose task is running.
+
+Both directions can be bounded. A transport that awaits `submit` stops reading from its client
+while `max_pending_input` lines are waiting, so a flooding client is slowed down by its own
+socket. (With worker processes the supervisor keeps the same window over the pipe: see
+`server.sharding`.) A client that stops reading output is disconnected once `max_pending_output` chunks are
+queued, rather than letting its backlog grow without limit in the server.
+"""
+import asyncio
+import itertools
+from typing import Callable, List, Optional, Union
+
+from utils.console import Console
+
+_session_ids = itertools.count(1)
+
+class SessionClosed(ConnectionError):
+    """The client behind a session disconnected."""
+
+class ClientSession(Console):
+    """One connected player: an input line queue in, an output queue (text and events) out."""
+
+    CLEAR_SCREEN = "\033[2J\033[H"
+
+    def __init__(self, session_id: Optional[str] = None, max_pending_input: Optional[int] = None,
+                 max_pending_output: Optional[int] = None, events: bool = False):
+        """
+        Args:
+            session_id (Optional[str]): Identifier used in logs (generated if not given).
+            max_pending_input (Optional[int]): Unread lines after which `submit` waits.
+            max_pending_output (Optional[int]): Unsent output chunks after which the client is
+                considered too slow and the session is closed.
+            events (bool): Also queue the screens' game events (dicts, see `utils.console.emit_event`)
+                for the transport; text-only transports leave this off and only ever read text.
+        """
+        self.session_id = session_id or f"s{next(_session_ids)}"
+        self.lobby_id: Optional[int] = None
+        self.max_pending_input = max_pending_input
+        self.max_pending_output = max_pending_output
+        self.overflowed = False
+        self.events = events
+        self.on_input_taken: Optional[Callable[[], None]] = None   # called after a screen reads a line
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        self._outbox: asyncio.Queue = asyncio.Queue()
+        self._held = None   # an event read while batching text; returned by the next read
+        self._input_taken = asyncio.Event()
+        self.closed = asyncio.Event()
+
+    # --- Console (called by the screens) ---
+
+    async def input(self, prompt: str = "") -> str:
+        if prompt:
+            self.print(prompt, end="")
+        line = await self._inbox.get()
+        self._input_taken.set()
+        if line is None:
+            raise SessionClosed(self.session_id)
+        if self.on_input_taken is not None:
+            self.on_input_taken()
+        return line
+
+    def print(self, *values, sep: str = " ", end: str = "\n", flush: bool = False) -> None:
+        self._queue_output(sep.join(str(v) for v in values) + end)
+
+    def event(self, event: dict) -> None:
+        if self.events:
+            self._queue_output(event)
+
+    def _queue_output(self, item: Union[str, dict]) -> None:
+        if self.closed.is_set():
+            return
+        if self.max_pending_output is not None and self._outbox.qsize() >= self.max_pending_output:
+            self.overflowed = True
+            self._outbox.put_nowait("\nDisconnected: the connection is too slow to keep up.\n")
+            self.close()
+            return
+        self._outbox.put_nowait(item)
+
+    def clear(self) -> None:
+        self.print(self.CLEAR_SCREEN, end="")
+
+    # --- Transport side ---
+
+    def feed(self, line: str) -> None:
+        """Delivers one line typed by the client (without the trailing newline)."""
+        self._inbox.put_nowait(line)
+
+    async def submit(self, line: str) -> None:
+        """Like `feed`, but first waits while `max_pending_input` lines are still unread."""
+        while (self.max_pending_input is not None and self._inbox.qsize() >= self.max_pending_input
+               and not self.closed.is_set()):
+            self._input_taken.clear()
+            await self._input_taken.wait()
+        self.feed(line)
+
+    def drain_input(self) -> List[str]:
+        """Removes and returns the lines the client typed that no screen has read yet."""
+        lines = []
+        while not self._inbox.empty():
+            line = self._inbox.get_nowait()
+            if line is not None:
+                lines.append(line)
+        return lines
+
+    async def read_output(self) -> Union[str, dict, None]:
+        """
+        Returns the next chunk of output for the client (text, or an event dict if the session
+        takes events), or None once the session is closed.
+        """
+        if self._held is not None:
+            item, self._held = self._held, None
+            return item
+        return await self._outbox.get()
+
+    async def read_output_batch(self, max_chars: int = 65536) -> Union[str, dict, None]:
+        """
+        Like `read_output`, but joins the text chunks already queued (up to about `max_chars`)
+        so a burst of prints goes out as one write. Events are returned on their own, in order.
+        Returns None once the session is closed.
+        """
+        text = await self.read_output()
+        if not isinstance(text, str):
+            return text
+        parts, size = [text], len(text)
+        while size < max_chars and not self._outbox.empty():
+            item = self._outbox.get_nowait()
+            if item is None:
+                self._outbox.put_nowait(None)  # deliver the batch first, then report the close
+                break
+            if not isinstance(item, str):
+                self._held = item  # likewise for an event
+                break
+            parts.append(item)
+            size += len(item)
+        return "".join(parts)
+
+    def close(self) -> None:
+        """Marks the session closed; pending and future reads are woken up."""
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        self._input_taken.set()
+        self._inbox.put_nowait(None)
+        self._outbox.put_nowait(None)
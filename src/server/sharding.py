@@ -0,0 +1,593 @@
+"""
+Shards lobbies across worker processes, one event loop per CPU core.
+
+`ShardSupervisor` has the same interface as `GameServer` (`join`, `serve`, `stop`), so the
+transport in `serve.py` does not care which one it talks to. Client connections stay in the
+supervisor process; every lobby runs inside one `ShardWorker` process, and the supervisor
+forwards input lines to it and relays its screen output back:
+
+    supervisor → worker: ("join", session_id, lobby_id, lobby_size)
+                         ("input", session_id, line)
+                         ("close", session_id)
+                         ("migrate_out", lobby_id)
+                         ("adopt", lobby_id, snapshot)
+                         ("stop",)
+    worker → supervisor: ("output", session_id, text)
+                         ("event", session_id, event)  a game event (`utils.console.emit_event`)
+                         ("closed", session_id)
+                         ("lobby_done", lobby_id)
+                         ("snapshot", lobby_id, snapshot)
+                         ("input_taken", session_id)  a screen read one forwarded line
+                         ("bounced", message)  a session message that arrived after a hand-off
+                         ("health", stats)
+
+Input is flow-controlled per session: the supervisor forwards at most the session's
+`max_pending_input` lines that the worker has not acknowledged with "input_taken". Past that it
+stops reading the client's session, whose own limit then stops the transport from reading the
+socket, so a flooding client is held back just as it is in a single process.
+
+A new lobby goes to worker `lobby_id % num_workers` unless that worker is unhealthy or has
+noticeably more lobbies than the least loaded one. When the load drifts apart anyway (games
+end at different times), a lobby is migrated: its players stop where voting hands over to the
+next chat round, the worker exports their states (`Lobby.export_snapshot`), and the target
+worker resumes them. Input that reaches the old worker after the hand-off is bounced back to
+the supervisor, which by then routes it to the new one.
+
+The chat itself is still coordinated through the lobby's files, so a lobby keeps working no
+matter which worker it lands on. A worker that dies takes only its own lobbies with it; it is
+respawned for new lobbies.
+"""
+import asyncio
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from server.lobby import Lobby
+from server.session import ClientSession, SessionClosed
+from utils.lobby_registry import runtime_registry
+from utils.logging_utils import MasterLogger
+from utils.metrics import dump_periodically, worker_metrics_path
+from utils.prompting.prompter import completion_limiter
+from utils.task_group import TaskGroup
+
+class _Channel:
+    """
+    Message channel over a multiprocessing pipe, bridged to an event loop.
+
+    A reader thread hands each received message to `on_message` on the loop (None once the
+    other side is gone); a writer thread sends queued messages so `send` never blocks the loop.
+    """
+
+    def __init__(self, conn, loop: asyncio.AbstractEventLoop, on_message: Callable, name: str):
+        self._conn = conn
+        self._loop = loop
+        self._on_message = on_message
+        self._outgoing: queue.SimpleQueue = queue.SimpleQueue()
+        threading.Thread(target=self._read_loop, name=f"{name}-rx", daemon=True).start()
+        threading.Thread(target=self._write_loop, name=f"{name}-tx", daemon=True).start()
+
+    def send(self, message: tuple) -> None:
+        self._outgoing.put(message)
+
+    def close(self) -> None:
+        """Stops the writer once everything already queued has been sent."""
+        self._outgoing.put(None)
+
+    def _read_loop(self) -> None:
+        while True:
+            try:
+                message = self._conn.recv()
+            except (EOFError, OSError):
+                message = None
+            try:
+                self._loop.call_soon_threadsafe(self._on_message, message)
+            except RuntimeError:  # loop already closed
+                return
+            if message is None:
+                return
+
+    def _write_loop(self) -> None:
+        while True:
+            message = self._outgoing.get()
+            if message is None:
+                return
+            try:
+                self._conn.send(message)
+            except (OSError, ValueError):
+                return
+
+# --- Worker process ---
+
+class ShardWorker:
+    """Runs the lobbies assigned to one worker process."""
+
+    def __init__(self, worker_id: int, conn, health_interval: float = 2.0):
+        """
+        Args:
+            worker_id (int): Index of this worker in the supervisor.
+            conn: This worker's end of the supervisor pipe.
+            health_interval (float): Seconds between health reports.
+        """
+        self.worker_id = worker_id
+        self.health_interval = health_interval
+        self.lobbies: Dict[int, Lobby] = {}
+        self.sessions: Dict[str, ClientSession] = {}
+        self._conn = conn
+        self._channel: Optional[_Channel] = None
+        self._handed_off = set()  # sessions moving to another worker: no "closed" for them
+        self._departed = set()  # sessions already handed off: their messages are bounced
+        self._pumps: Dict[str, asyncio.Task] = {}
+        self._tg = None
+        self._stopping = asyncio.Event()
+        self.logger = MasterLogger.get_instance()
+
+    async def run(self) -> None:
+        """Serves supervisor requests until told to stop (or the supervisor goes away)."""
+        self._channel = _Channel(self._conn, asyncio.get_running_loop(), self._on_message, f"worker-{self.worker_id}")
+        try:
+            async with TaskGroup() as tg:
+                self._tg = tg
+                background = [tg.create_task(self._report_health())]
+                metrics_path = worker_metrics_path(self.worker_id)
+                if metrics_path is not None:
+                    background.append(tg.create_task(dump_periodically(metrics_path)))
+                await self._stopping.wait()
+                for task in background:
+                    task.cancel()
+                for lobby in list(self.lobbies.values()):
+                    lobby.cancel()
+        finally:
+            self._channel.close()
+
+    def _on_message(self, message: Optional[tuple]) -> None:
+        if message is None or message[0] == "stop":
+            self._stopping.set()
+            return
+        kind, *args = message
+        if kind in ("input", "close") and args[0] in self._departed:
+            self._channel.send(("bounced", message))
+        elif kind == "input":
+            session = self.sessions.get(args[0])
+            if session is not None:
+                session.feed(args[1])
+        elif kind == "close":
+            session = self.sessions.get(args[0])
+            if session is not None:
+                session.close()
+        elif kind == "join":
+            self._join(*args)
+        elif kind == "adopt":
+            self._adopt(*args)
+        elif kind == "migrate_out":
+            lobby = self.lobbies.get(args[0])
+            if lobby is not None:
+                lobby.request_migration()
+        else:
+            self.logger.warning(f"Worker {self.worker_id}: unknown message {kind!r}")
+
+    def _spawn(self, coro) -> None:
+        """Runs a request handler; a failing request is logged instead of stopping the worker."""
+        async def guarded():
+            try:
+                await coro
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Worker {self.worker_id}: request failed: {e!r}")
+        self._tg.create_task(guarded())
+
+    def _open_session(self, session_id: str) -> ClientSession:
+        session = ClientSession(session_id, events=True)   # the client's own session decides whether to keep them
+        session.on_input_taken = lambda: self._channel.send(("input_taken", session_id))
+        self.sessions[session_id] = session
+        self._pumps[session_id] = self._tg.create_task(self._pump_output(session))
+        return session
+
+    async def _pump_output(self, session: ClientSession) -> None:
+        while True:
+            output = await session.read_output()
+            if output is None:
+                break
+            if isinstance(output, dict):
+                self._channel.send(("event", session.session_id, output))
+            else:
+                self._channel.send(("output", session.session_id, output))
+        self.sessions.pop(session.session_id, None)
+        self._pumps.pop(session.session_id, None)
+        if session.session_id in self._handed_off:
+            self._handed_off.discard(session.session_id)
+            self._departed.add(session.session_id)
+        else:
+            self._channel.send(("closed", session.session_id))
+
+    def _lobby(self, lobby_id: int, size: int) -> Lobby:
+        lobby = self.lobbies.get(lobby_id)
+        if lobby is None:
+            lobby = Lobby(lobby_id, size)
+            self.lobbies[lobby_id] = lobby
+            self._tg.create_task(self._run_lobby(lobby), name=f"lobby-{lobby_id}")
+        return lobby
+
+    async def _run_lobby(self, lobby: Lobby) -> None:
+        await lobby.run()
+        self.lobbies.pop(lobby.lobby_id, None)
+        if not lobby.migrated:
+            self._channel.send(("lobby_done", lobby.lobby_id))
+            return
+        snapshot = lobby.export_snapshot()
+        pumps = []
+        for session in lobby.sessions:
+            self._handed_off.add(session.session_id)
+            pumps.append(self._pumps.get(session.session_id))
+            session.close()
+        # Flush the last output before the target worker starts writing to the same clients
+        await asyncio.gather(*filter(None, pumps), return_exceptions=True)
+        self._channel.send(("snapshot", lobby.lobby_id, snapshot))
+        self.logger.info(f"Worker {self.worker_id}: handed off lobby {lobby.lobby_id}")
+
+    def _join(self, session_id: str, lobby_id: int, size: int) -> None:
+        # The lobby exists as soon as the message is handled, so a later "migrate_out" finds it
+        session = self._open_session(session_id)
+        self._spawn(self._lobby(lobby_id, size).add(session))
+
+    def _adopt(self, lobby_id: int, snapshot: dict) -> None:
+        # Open the sessions right away so input forwarded after the snapshot queues up behind
+        # the input the old worker had not delivered yet
+        seated = []
+        for entry in snapshot["players"]:
+            self._departed.discard(entry["session_id"])
+            session = self._open_session(entry["session_id"])
+            for line in entry.pop("pending_input", []):
+                session.feed(line)
+            seated.append((session, entry))
+
+        async def resume():
+            lobby = self._lobby(lobby_id, snapshot["size"])
+            for session, entry in seated:
+                await lobby.add(session, resume=entry)
+            self.logger.info(f"Worker {self.worker_id}: adopted lobby {lobby_id}")
+        self._spawn(resume())
+
+    async def _report_health(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.health_interval)
+            lag = loop.time() - started - self.health_interval
+            self._channel.send(("health", {
+                "pid": os.getpid(),
+                "lobbies": len(self.lobbies),
+                "sessions": len(self.sessions),
+                "loop_lag_ms": round(max(lag, 0.0) * 1000, 1),
+                "cpu_s": round(time.process_time(), 2),
+            }))
+
+def worker_main(worker_id: int, conn, health_interval: float, max_concurrent_llm: Optional[int]) -> None:
+    """Entry point of a worker process."""
+    # Ctrl-C reaches the whole process group; the supervisor decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    MasterLogger(
+        init=True,
+        clear=False,
+        log_path=f"./logs/_worker_{worker_id}.log"
+    )
+    if max_concurrent_llm is not None:
+        completion_limiter.configure(max_concurrent_llm)
+    asyncio.run(ShardWorker(worker_id, conn, health_interval).run())
+
+# --- Supervisor ---
+
+class WorkerHandle:
+    """The supervisor's view of one worker process."""
+
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self.process = None
+        self.channel: Optional[_Channel] = None
+        self.lobbies = set()
+        self.stats: dict = {}
+        self.last_report = 0.0
+        self.restarts = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    @property
+    def load(self) -> int:
+        return len(self.lobbies)
+
+    def send(self, message: tuple) -> None:
+        if self.channel is not None:
+            self.channel.send(message)
+
+class ShardSupervisor:
+    """Seats clients into lobbies and spreads the lobbies over worker processes."""
+
+    def __init__(self, num_workers: Optional[int] = None, lobby_size: int = 3,
+                 max_concurrent_llm: Optional[int] = None, first_lobby_id: Optional[int] = None,
+                 health_interval: float = 2.0, rebalance_interval: float = 10.0,
+                 imbalance_threshold: int = 2):
+        """
+        Args:
+            num_workers (Optional[int]): Worker processes (defaults to the number of CPU cores).
+            lobby_size (int): Human players per lobby.
+            max_concurrent_llm (Optional[int]): Per-worker cap on in-flight completions.
+            first_lobby_id (Optional[int]): Lobby number to start from (see `GameServer`).
+            health_interval (float): Seconds between worker health reports.
+            rebalance_interval (float): Seconds between load checks.
+            imbalance_threshold (int): Lobby-count difference between the busiest and the least
+                loaded worker at which new lobbies avoid the busy one and a lobby is migrated.
+        """
+        self.lobby_size = lobby_size
+        self.max_concurrent_llm = max_concurrent_llm
+        self.health_interval = health_interval
+        self.rebalance_interval = rebalance_interval
+        self.imbalance_threshold = imbalance_threshold
+        self.workers = [WorkerHandle(i) for i in range(num_workers or os.cpu_count() or 1)]
+        self.placement: Dict[int, int] = {}  # lobby id → worker id
+        self.members: Dict[int, List[str]] = {}  # lobby id → session ids
+        self.sessions: Dict[str, ClientSession] = {}
+        self._session_lobby: Dict[str, int] = {}
+        self._unacked: Dict[str, int] = {}  # session id → forwarded lines no screen has read yet
+        self._acked: Dict[str, asyncio.Event] = {}
+        self._migrations: Dict[int, int] = {}  # lobby id → target worker id
+        self.first_lobby_id = first_lobby_id
+        self._forming: Optional[int] = None
+        self._mp = multiprocessing.get_context("spawn")
+        self._loop = None
+        self._tg = None
+        self._ready = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self.logger = MasterLogger.get_instance()
+
+    # --- Clients ---
+
+    async def join(self, session: Optional[ClientSession] = None) -> ClientSession:
+        """
+        Seats a client in a lobby on one of the workers.
+
+        Args:
+            session (Optional[ClientSession]): The client's session (a new one if not given).
+
+        Returns:
+            ClientSession: The seated session.
+        """
+        await self._ready.wait()
+        session = session or ClientSession()
+        lobby_id = self._forming
+        if lobby_id is None or lobby_id not in self.placement:
+            lobby_id = self._open_lobby()
+        self.members[lobby_id].append(session.session_id)
+        if len(self.members[lobby_id]) >= self.lobby_size:
+            self._forming = None
+        session.lobby_id = lobby_id
+        self.sessions[session.session_id] = session
+        self._session_lobby[session.session_id] = lobby_id
+        self._send_for(session.session_id, ("join", session.session_id, lobby_id, self.lobby_size))
+        self._tg.create_task(self._forward_input(session))
+        self.logger.info(
+            f"Session {session.session_id} joined lobby {lobby_id} on worker {self.placement[lobby_id]} "
+            f"({len(self.members[lobby_id])}/{self.lobby_size})"
+        )
+        return session
+
+    def _open_lobby(self) -> int:
+        lobby_id = runtime_registry.allocate(self.lobby_size, minimum=self.first_lobby_id)
+        worker = self._place(lobby_id)
+        worker.lobbies.add(lobby_id)
+        self.placement[lobby_id] = worker.worker_id
+        self.members[lobby_id] = []
+        self._forming = lobby_id
+        self.logger.info(f"Opened lobby {lobby_id} on worker {worker.worker_id}")
+        return lobby_id
+
+    def _place(self, lobby_id: int) -> WorkerHandle:
+        """The worker for a new lobby: by lobby id, unless that one is down or overloaded."""
+        alive = [w for w in self.workers if w.alive] or self.workers
+        least = min(alive, key=lambda w: w.load)
+        preferred = self.workers[lobby_id % len(self.workers)]
+        if preferred not in alive or preferred.load - least.load >= self.imbalance_threshold:
+            return least
+        return preferred
+
+    async def _forward_input(self, session: ClientSession) -> None:
+        """Relays a client's lines to its worker, at most `max_pending_input` of them unread there."""
+        session_id = session.session_id
+        limit = session.max_pending_input
+        acked = self._acked.setdefault(session_id, asyncio.Event())
+        try:
+            while True:
+                line = await session.input()
+                while limit is not None and self._unacked.get(session_id, 0) >= limit and not session.closed.is_set():
+                    acked.clear()
+                    await acked.wait()
+                self._unacked[session_id] = self._unacked.get(session_id, 0) + 1
+                self._send_for(session_id, ("input", session_id, line))
+        except SessionClosed:
+            self._send_for(session_id, ("close", session_id))
+
+    def _send_for(self, session_id: str, message: tuple) -> None:
+        """Sends a session's message to the worker running its lobby."""
+        lobby_id = self._session_lobby.get(session_id)
+        if lobby_id is not None and lobby_id in self.placement:
+            self.workers[self.placement[lobby_id]].send(message)
+
+    # --- Workers ---
+
+    def _start_worker(self, worker: WorkerHandle) -> None:
+        parent_conn, child_conn = self._mp.Pipe()
+        worker.process = self._mp.Process(
+            target=worker_main,
+            args=(worker.worker_id, child_conn, self.health_interval, self.max_concurrent_llm),
+            name=f"doppelbot-worker-{worker.worker_id}",
+            daemon=True,
+        )
+        worker.process.start()
+        child_conn.close()
+        worker.channel = _Channel(
+            parent_conn, self._loop,
+            lambda message: self._on_worker_message(worker, message),
+            f"supervisor-{worker.worker_id}",
+        )
+        worker.last_report = time.monotonic()
+        self.logger.info(f"Started worker {worker.worker_id} (pid {worker.process.pid})")
+
+    def _on_worker_message(self, worker: WorkerHandle, message: Optional[tuple]) -> None:
+        if message is None:
+            self._worker_lost(worker)
+            return
+        kind, *args = message
+        if kind == "output":
+            session = self.sessions.get(args[0])
+            if session is not None:
+                session.print(args[1], end="")
+        elif kind == "event":
+            session = self.sessions.get(args[0])
+            if session is not None:
+                session.event(args[1])
+        elif kind == "input_taken":
+            if args[0] in self._unacked:
+                self._unacked[args[0]] = max(0, self._unacked[args[0]] - 1)
+                self._acked[args[0]].set()
+        elif kind == "closed":
+            self._drop_session(args[0])
+        elif kind == "lobby_done":
+            self._drop_lobby(args[0])
+        elif kind == "snapshot":
+            self._finish_migration(worker, *args)
+        elif kind == "bounced":
+            self._send_for(args[0][1], args[0])
+        elif kind == "health":
+            worker.stats = args[0]
+            worker.last_report = time.monotonic()
+
+    def _drop_session(self, session_id: str) -> None:
+        session = self.sessions.pop(session_id, None)
+        self._session_lobby.pop(session_id, None)
+        self._unacked.pop(session_id, None)
+        acked = self._acked.pop(session_id, None)
+        if session is not None:
+            session.close()
+        if acked is not None:
+            acked.set()  # a forwarder waiting for credit sees the session closed
+
+    def _drop_lobby(self, lobby_id: int) -> None:
+        worker_id = self.placement.pop(lobby_id, None)
+        if worker_id is not None:
+            self.workers[worker_id].lobbies.discard(lobby_id)
+        self._migrations.pop(lobby_id, None)
+        for session_id in self.members.pop(lobby_id, []):
+            self._drop_session(session_id)
+
+    def _worker_lost(self, worker: WorkerHandle) -> None:
+        """A worker exited or its pipe broke: close its lobbies and start a replacement."""
+        if worker.process is not None:
+            worker.process.join(timeout=1)
+        if self._stopping.is_set():
+            return
+        self.logger.error(f"Worker {worker.worker_id} exited (code {worker.process.exitcode}); closing its lobbies")
+        lost = set(worker.lobbies) | {l for l, target in self._migrations.items() if target == worker.worker_id}
+        for lobby_id in lost:
+            for session_id in self.members.get(lobby_id, []):
+                session = self.sessions.get(session_id)
+                if session is not None:
+                    session.print("\nThe server running your lobby stopped unexpectedly. Sorry!")
+            self._drop_lobby(lobby_id)
+        worker.lobbies.clear()
+        worker.stats = {}
+        worker.restarts += 1
+        self._start_worker(worker)
+
+    # --- Rebalancing ---
+
+    def _migrate(self, lobby_id: int, target: WorkerHandle) -> None:
+        """Asks the lobby's worker to hand it over at the next round boundary."""
+        source = self.workers[self.placement[lobby_id]]
+        self._migrations[lobby_id] = target.worker_id
+        source.send(("migrate_out", lobby_id))
+        self.logger.info(f"Migrating lobby {lobby_id}: worker {source.worker_id} → worker {target.worker_id}")
+
+    def _finish_migration(self, source: WorkerHandle, lobby_id: int, snapshot: dict) -> None:
+        target_id = self._migrations.pop(lobby_id, None)
+        target = self.workers[target_id] if target_id is not None else source
+        if not target.alive:
+            target = self._place(lobby_id)
+        source.lobbies.discard(lobby_id)
+        target.lobbies.add(lobby_id)
+        self.placement[lobby_id] = target.worker_id
+        target.send(("adopt", lobby_id, snapshot))
+        self.logger.info(f"Lobby {lobby_id} now runs on worker {target.worker_id}")
+
+    def rebalance(self) -> None:
+        """Moves one full lobby from the busiest to the least loaded worker if they are far apart."""
+        alive = [w for w in self.workers if w.alive]
+        if len(alive) < 2:
+            return
+        busiest = max(alive, key=lambda w: w.load)
+        least = min(alive, key=lambda w: w.load)
+        pending = sum(1 for target in self._migrations.values() if target == least.worker_id)
+        if busiest.load - (least.load + pending) < self.imbalance_threshold:
+            return
+        movable = [
+            lobby_id for lobby_id in sorted(busiest.lobbies)
+            if lobby_id not in self._migrations and lobby_id != self._forming
+        ]
+        if movable:
+            self._migrate(movable[0], least)
+
+    def health(self) -> List[dict]:
+        """Per-worker health and load, as last reported by each worker."""
+        now = time.monotonic()
+        return [
+            {
+                "worker": w.worker_id,
+                "alive": w.alive,
+                "lobbies": sorted(w.lobbies),
+                "restarts": w.restarts,
+                "last_report_s": round(now - w.last_report, 1),
+                **{f"reported_{k}" if k == "lobbies" else k: v for k, v in w.stats.items()},
+            }
+            for w in self.workers
+        ]
+
+    async def _supervise(self) -> None:
+        while True:
+            await asyncio.sleep(self.rebalance_interval)
+            for worker in self.workers:
+                if worker.alive and time.monotonic() - worker.last_report > 5 * self.health_interval:
+                    self.logger.warning(f"Worker {worker.worker_id} has not reported for a while (event loop stalled?)")
+            self.rebalance()
+            self.logger.info(f"Worker health: {self.health()}")
+
+    async def serve(self) -> None:
+        """Starts the workers and runs until `stop` is called; then stops every worker."""
+        self._loop = asyncio.get_running_loop()
+        for worker in self.workers:
+            self._start_worker(worker)
+        try:
+            async with TaskGroup() as tg:
+                self._tg = tg
+                supervise = tg.create_task(self._supervise())
+                self._ready.set()
+                await self._stopping.wait()
+                supervise.cancel()
+                for session in list(self.sessions.values()):
+                    session.close()
+        finally:
+            self._stopping.set()
+            for worker in self.workers:
+                worker.send(("stop",))
+            for worker in self.workers:
+                if worker.process is not None:
+                    await asyncio.to_thread(worker.process.join, 5)
+                    if worker.process.is_alive():
+                        worker.process.terminate()
+
+    def stop(self) -> None:
+        """Asks `serve` to shut down."""
+        self._stopping.set()
@@ -0,0 +1,323 @@
+"""
+Headless simulated players, for end-to-end load tests of the game server.
+
+A `ScriptedPlayer` sits on a `ClientSession` exactly where a TCP or WebSocket client would: it
+reads the screen output and answers the prompts it recognises (setup questions, chat, votes,
+"Press Enter" screens). The screens, lobbies and AI players are the real ones, so a simulation
+exercises the same code paths as a real game. Run it against the mock LLM backend
+(DOPPELBOT_LLM_BACKEND=mock, see `utils.prompting.mock_client`) and a fast virtual clock
+(DOPPELBOT_CLOCK_SPEED, see `utils.clock`) to play many lobbies quickly; `src/simulate.py`
+does both.
+
+Measured, per lobby, into one `SimulationStats`:
+    message latency  — a human's chat line is sent until another player's screen shows it
+    AI reply latency — the latest human line (or the round's icebreaker) until an AI line shows
+    vote completion  — the first vote prompt of a round until every player saw the result
+
+All times are game-clock time, so they read the same at any clock speed (work that does not
+scale with the clock, like CPU time in the handlers, shows up multiplied by the speed).
+"""
+import asyncio
+import itertools
+import random
+import re
+import statistics
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from server.session import ClientSession
+from utils.clock import get_clock
+from utils.prompting.mock_client import MOCK_MARKER
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+TOKEN = re.compile(r"\bsim\d+\b")
+VOTE_OPTION = re.compile(r"^(\d+): (\S+)$", re.M)
+GRADE_PROMPT = re.compile(r"\((\d+) - (\d+)\):\s*$")
+
+VOTE_STRATEGIES = ("random", "first", "hunt-ai")
+
+CHAT_WORDS = ("lol", "same", "wait what", "i like pizza", "cats are the best", "idk tbh", "anyone else bored",
+              "soccer after school", "that's funny", "who said that", "nah", "my dog is named max")
+
+@dataclass
+class PlayerScript:
+    """How a simulated player behaves."""
+    message_rate: float = 0.2          # chat lines per second (Poisson arrivals)
+    vote_strategy: str = "random"      # one of VOTE_STRATEGIES
+    think_time: float = 0.0            # seconds before answering a prompt
+    quiet_before_end: float = 1.0      # stop chatting this long before the round ends
+
+@dataclass
+class _LobbyStats:
+    players: int = 0
+    last_chat_event: float = 0.0
+    ai_lines_seen: set = field(default_factory=set)
+    # round -> [first vote prompt, last result seen, players that saw the result]
+    votes: Dict[int, list] = field(default_factory=dict)
+
+class SimulationStats:
+    """Latency samples of one simulation run (game-clock seconds)."""
+
+    def __init__(self):
+        self.message_latency: List[float] = []
+        self.ai_reply_latency: List[float] = []
+        self.vote_completion: List[float] = []
+        self.messages_sent = 0
+        self.players_finished = 0
+        self.errors: List[str] = []
+        self._sent: Dict[str, Tuple[float, str]] = {}   # token -> (sent at, sender session id)
+        self._lobbies: Dict[int, _LobbyStats] = {}
+        self._tokens = itertools.count(1)
+        self.clock = get_clock()
+
+    def lobby(self, lobby_id: int) -> _LobbyStats:
+        return self._lobbies.setdefault(lobby_id, _LobbyStats())
+
+    def new_token(self) -> str:
+        return f"sim{next(self._tokens)}"
+
+    def message_sent(self, token: str, sender: str, lobby_id: int) -> None:
+        now = self.clock.monotonic()
+        self._sent[token] = (now, sender)
+        self.lobby(lobby_id).last_chat_event = now
+        self.messages_sent += 1
+
+    def message_seen(self, token: str, viewer: str) -> bool:
+        """Records a delivery; returns True if `viewer` sent the message itself."""
+        sent = self._sent.get(token)
+        if sent is None:
+            return False
+        if sent[1] == viewer:
+            return True
+        self.message_latency.append(self.clock.monotonic() - sent[0])
+        return False
+
+    def round_started(self, lobby_id: int) -> None:
+        lobby = self.lobby(lobby_id)
+        lobby.last_chat_event = max(lobby.last_chat_event, self.clock.monotonic())
+
+    def ai_line_seen(self, lobby_id: int, line: str) -> None:
+        lobby = self.lobby(lobby_id)
+        if line not in lobby.ai_lines_seen:   # first screen to show it
+            lobby.ai_lines_seen.add(line)
+            self.ai_reply_latency.append(self.clock.monotonic() - lobby.last_chat_event)
+
+    def vote_prompted(self, lobby_id: int, round_number: int) -> None:
+        record = self.lobby(lobby_id).votes.setdefault(round_number, [self.clock.monotonic(), 0.0, 0])
+        record[0] = min(record[0], self.clock.monotonic())
+
+    def vote_result_seen(self, lobby_id: int, round_number: int) -> None:
+        lobby = self.lobby(lobby_id)
+        record = lobby.votes.get(round_number)
+        if record is None:   # voted out: no prompt of its own, the others' prompt counts
+            return
+        record[1] = self.clock.monotonic()
+        record[2] += 1
+        if record[2] == lobby.players:
+            self.vote_completion.append(record[1] - record[0])
+
+    def report(self) -> dict:
+        return {
+            "players_finished": self.players_finished,
+            "messages_sent": self.messages_sent,
+            "message_latency": summarize(self.message_latency),
+            "ai_reply_latency": summarize(self.ai_reply_latency),
+            "vote_completion": summarize(self.vote_completion),
+            "errors": self.errors,
+        }
+
+def summarize(samples: List[float]) -> dict:
+    """Count, mean and percentiles of latency samples, in milliseconds."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 2)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+        "p50_ms": pct(50),
+        "p90_ms": pct(90),
+        "p99_ms": pct(99),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+class ScriptedPlayer:
+    """Plays one seat of a lobby through a ClientSession, following a PlayerScript."""
+
+    def __init__(self, session: ClientSession, name: str, script: PlayerScript, stats: SimulationStats,
+                 round_duration: float, rng: Optional[random.Random] = None):
+        """
+        Args:
+            session (ClientSession): A session already seated in a lobby.
+            name (str): First name to enter during setup.
+            script (PlayerScript): Chat and vote behaviour.
+            stats (SimulationStats): Where measurements go (shared by all players).
+            round_duration (float): Chat round length, so chatting stops before the vote.
+            rng (Optional[random.Random]): Source of randomness (seed it for repeatable runs).
+        """
+        self.session = session
+        self.name = name
+        self.script = script
+        self.stats = stats
+        self.round_duration = round_duration
+        self.rng = rng or random.Random()
+        self.lobby_id = session.lobby_id
+        self.code_name: Optional[str] = None
+        self.round_number = 1
+        self.ai_code_names = set()
+        self._buffer = ""
+        self._chat_until: Optional[float] = None
+        self._awaiting_round = False
+        self._rejected = set()
+        self._last_vote: Optional[str] = None
+        self._chat_task: Optional[asyncio.Task] = None
+
+    async def play(self) -> None:
+        """Answers prompts until the server closes the session (after the score screen)."""
+        self.stats.lobby(self.lobby_id).players += 1
+        try:
+            while True:
+                text = await self.session.read_output_batch()
+                if text is None:
+                    break
+                await self._handle_output(ANSI_ESCAPE.sub("", text))
+            self.stats.players_finished += 1
+        finally:
+            self._stop_chat()
+
+    async def _handle_output(self, text: str) -> None:
+        for line in text.splitlines():
+            self._observe(line.strip())
+        self._buffer = (self._buffer + text)[-2000:]
+        answer = self._answer(self._buffer)
+        if answer is not None:
+            self._buffer = ""
+            if self.script.think_time:
+                await self.stats.clock.sleep(self.script.think_time)
+            await self.session.submit(answer)
+
+    # --- Watching the screen ---
+
+    def _observe(self, line: str) -> None:
+        for token in TOKEN.findall(line):
+            if self.stats.message_seen(token, self.session.session_id) and self.code_name is None:
+                self.code_name = line.split(":", 1)[0].strip()
+        if MOCK_MARKER in line:
+            self.ai_code_names.add(line.split(":", 1)[0].strip())
+            self.stats.ai_line_seen(self.lobby_id, line)
+        if "GAME MASTER" in line and self._awaiting_round:
+            self._awaiting_round = False
+            self.stats.round_started(self.lobby_id)
+            self._start_chat()
+
+    # --- Prompts ---
+
+    def _answer(self, screen: str) -> Optional[str]:
+        tail = screen.rstrip()
+        if "Select a player to vote out" in screen and tail.endswith(">"):
+            self._stop_chat()
+            if "You cannot vote for yourself." not in screen:
+                self.stats.vote_prompted(self.lobby_id, self.round_number)
+            return self._vote(screen)
+        if tail.endswith("You cannot vote for yourself."):
+            return None   # the prompt is shown again right after
+        if GRADE_PROMPT.search(tail):
+            return GRADE_PROMPT.search(tail).group(1)
+        if tail.endswith("first name:"):
+            return self.name
+        if "last initial" in tail[-60:]:
+            return self.name[0]
+        if tail.endswith(("foods:", "animals:", "hobbies?", "about you:")):
+            return self.rng.choice(CHAT_WORDS)
+        if "Press Enter to continue to next phase" in tail[-80:]:
+            self.stats.vote_result_seen(self.lobby_id, self.round_number)
+            self.round_number += 1
+            self._rejected.clear()
+            self._awaiting_round = True
+            return ""
+        if "Press Enter to continue to the chat phase" in tail[-80:]:
+            self._awaiting_round = True
+            return ""
+        if "Press Enter" in tail[-80:]:
+            return ""
+        return None
+
+    def _vote(self, screen: str) -> str:
+        options = VOTE_OPTION.findall(screen[screen.rfind("Select a player to vote out"):])
+        if "You cannot vote for yourself." in screen and self._last_vote:
+            self._rejected.add(self._last_vote)
+        candidates = [(n, c) for n, c in options if c != self.code_name and n not in self._rejected]
+        candidates = candidates or options
+        strategy = self.script.vote_strategy
+        choice = None
+        if strategy == "hunt-ai":
+            suspects = [opt for opt in candidates if opt[1] in self.ai_code_names]
+            choice = self.rng.choice(suspects) if suspects else None
+        if choice is None:
+            choice = candidates[0] if strategy == "first" else self.rng.choice(candidates)
+        self._last_vote = choice[0]
+        return choice[0]
+
+    # --- Chatting ---
+
+    def _start_chat(self) -> None:
+        self._stop_chat()
+        self._chat_until = self.stats.clock.monotonic() + self.round_duration - self.script.quiet_before_end
+        if self.script.message_rate > 0:
+            self._chat_task = asyncio.create_task(self._chat(), name=f"sim-chat-{self.session.session_id}")
+
+    def _stop_chat(self) -> None:
+        if self._chat_task is not None:
+            self._chat_task.cancel()
+            self._chat_task = None
+
+    async def _chat(self) -> None:
+        while True:
+            await self.stats.clock.sleep(self.rng.expovariate(self.script.message_rate))
+            if self.stats.clock.monotonic() >= self._chat_until:
+                return
+            token = self.stats.new_token()
+            self.stats.message_sent(token, self.session.session_id, self.lobby_id)
+            await self.session.submit(f"{self.rng.choice(CHAT_WORDS)} {token}")
+
+async def run_simulation(server, lobbies: int, players_per_lobby: int, script: PlayerScript,
+                         round_duration: float, seed: Optional[int] = None,
+                         timeout: Optional[float] = None) -> SimulationStats:
+    """
+    Seats `lobbies * players_per_lobby` scripted players on a running server and plays every
+    lobby to the end.
+
+    Args:
+        server: A serving `GameServer` or `ShardSupervisor` with lobby size `players_per_lobby`.
+        lobbies (int): Number of lobbies to fill.
+        players_per_lobby (int): Scripted human players per lobby.
+        script (PlayerScript): Behaviour shared by all players.
+        round_duration (float): The server's chat round length in seconds.
+        seed (Optional[int]): Seed for the players' random choices.
+        timeout (Optional[float]): Give up (and record an error) after this many seconds.
+
+    Returns:
+        SimulationStats: The measurements.
+    """
+    stats = SimulationStats()
+    rng = random.Random(seed)
+    players = []
+    for i in range(lobbies * players_per_lobby):
+        session = await server.join(ClientSession(session_id=f"sim-{i}"))
+        players.append(ScriptedPlayer(session, f"Sim{i}", script, stats, round_duration,
+                                      random.Random(rng.random())))
+    tasks = [asyncio.create_task(player.play()) for player in players]
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        stats.errors.append(f"{len(pending)} players still playing after {timeout}s")
+    for task in done:
+        if task.exception() is not None:
+            stats.errors.append(repr(task.exception()))
+    for player in players:
+        player.session.close()
+    return stats
@@ -0,0 +1,179 @@
+"""
+Minimal WebSocket (RFC 6455) support on top of asyncio streams, for the gateway and its client.
+
+Only what the game needs: text messages (fragmented or not), ping/pong and the closing
+handshake. Server-side connections expect masked frames from the client and send unmasked
+ones; client-side connections do the opposite.
+"""
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+from typing import Dict, Optional, Tuple
+
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+CLOSE_NORMAL = 1000
+CLOSE_PROTOCOL_ERROR = 1002
+CLOSE_UNSUPPORTED = 1003
+CLOSE_TOO_BIG = 1009
+
+class WebSocketError(ConnectionError):
+    """The peer broke the protocol or the connection dropped mid-frame."""
+
+    def __init__(self, message: str, code: int = CLOSE_PROTOCOL_ERROR):
+        super().__init__(message)
+        self.code = code
+
+def accept_key(key: str) -> str:
+    """The `Sec-WebSocket-Accept` value for a client's `Sec-WebSocket-Key`."""
+    return base64.b64encode(hashlib.sha1((key + GUID).encode("ascii")).digest()).decode("ascii")
+
+async def read_http_head(reader: asyncio.StreamReader, limit: int = 8192) -> Tuple[str, Dict[str, str]]:
+    """
+    Reads an HTTP request or response head.
+
+    Returns:
+        Tuple[str, Dict[str, str]]: The start line and the headers (names lower-cased).
+    """
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.LimitOverrunError as e:
+        raise WebSocketError("HTTP head too large") from e
+    except asyncio.IncompleteReadError as e:
+        raise WebSocketError("Connection closed during HTTP head") from e
+    if len(head) > limit:
+        raise WebSocketError("HTTP head too large")
+    start, *lines = head.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in lines:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return start, headers
+
+class WebSocket:
+    """One open WebSocket connection."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 client_side: bool = False, max_message: int = 65536):
+        """
+        Args:
+            reader, writer: The connection's streams, after the opening handshake.
+            client_side (bool): True when this end is the client (outgoing frames are masked).
+            max_message (int): Largest accepted message in bytes; bigger ones close the connection.
+        """
+        self.reader = reader
+        self.writer = writer
+        self.client_side = client_side
+        self.max_message = max_message
+        self.closed = False
+        self._send_lock = asyncio.Lock()
+
+    async def recv(self) -> Optional[str]:
+        """Returns the next text message, or None once the connection is closed."""
+        fragments = []
+        size = 0
+        while not self.closed:
+            try:
+                fin, opcode, payload = await self._read_frame()
+            except WebSocketError as e:
+                await self.close(e.code)
+                return None
+            except (asyncio.IncompleteReadError, ConnectionError):
+                self.closed = True
+                self.writer.close()
+                return None
+            if opcode == OP_PING:
+                await self._send_frame(OP_PONG, payload)
+            elif opcode == OP_PONG:
+                continue
+            elif opcode == OP_CLOSE:
+                await self.close(CLOSE_NORMAL)
+                return None
+            elif opcode == OP_BINARY:
+                await self.close(CLOSE_UNSUPPORTED)
+                return None
+            elif opcode in (OP_TEXT, OP_CONTINUATION):
+                if (opcode == OP_TEXT) == bool(fragments):  # a new message must start with TEXT
+                    await self.close(CLOSE_PROTOCOL_ERROR)
+                    return None
+                size += len(payload)
+                if size > self.max_message:
+                    await self.close(CLOSE_TOO_BIG)
+                    return None
+                fragments.append(payload)
+                if fin:
+                    try:
+                        return b"".join(fragments).decode("utf-8")
+                    except UnicodeDecodeError:
+                        await self.close(CLOSE_PROTOCOL_ERROR)
+                        return None
+            else:
+                await self.close(CLOSE_PROTOCOL_ERROR)
+                return None
+        return None
+
+    async def send(self, text: str) -> None:
+        """Sends one text message and waits until the transport accepts more (backpressure)."""
+        await self._send_frame(OP_TEXT, text.encode("utf-8"))
+
+    async def close(self, code: int = CLOSE_NORMAL) -> None:
+        """Sends a close frame (once) and closes the transport."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            await self._send_frame(OP_CLOSE, struct.pack("!H", code), force=True)
+        except ConnectionError:
+            pass
+        self.writer.close()
+
+    async def _read_frame(self) -> Tuple[bool, int, bytes]:
+        first, second = await self.reader.readexactly(2)
+        fin = bool(first & 0x80)
+        opcode = first & 0x0F
+        masked = bool(second & 0x80)
+        length = second & 0x7F
+        if length == 126:
+            (length,) = struct.unpack("!H", await self.reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack("!Q", await self.reader.readexactly(8))
+        if masked == self.client_side:  # clients must mask, servers must not
+            raise WebSocketError("Unexpected frame masking")
+        if length > self.max_message:
+            raise WebSocketError("Frame too large", CLOSE_TOO_BIG)
+        mask = await self.reader.readexactly(4) if masked else None
+        payload = await self.reader.readexactly(length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return fin, opcode, payload
+
+    async def _send_frame(self, opcode: int, payload: bytes, force: bool = False) -> None:
+        if self.closed and not force:
+            raise WebSocketError("WebSocket is closed")
+        header = bytearray([0x80 | opcode])
+        mask_bit = 0x80 if self.client_side else 0
+        if len(payload) < 126:
+            header.append(mask_bit | len(payload))
+        elif len(payload) < 1 << 16:
+            header.append(mask_bit | 126)
+            header += struct.pack("!H", len(payload))
+        else:
+            header.append(mask_bit | 127)
+            header += struct.pack("!Q", len(payload))
+        if self.client_side:
+            mask = os.urandom(4)
+            header += mask
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        async with self._send_lock:
+            self.writer.write(bytes(header) + payload)
+            await self.writer.drain()
@@ -1,11 +1,15 @@
+import asyncio
 import os
-from typing import Tuple
-from time import sleep
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
 from colorama import Fore, Style
 
-# from utils.chatbot.ai_v3 import AIPlayer
-from utils.chatbot.ai_v5 import AIPlayer
+if TYPE_CHECKING:
+    # from utils.chatbot.ai_v3 import AIPlayer
+    from utils.chatbot.ai_v5 import AIPlayer
 from utils.logging_utils import MasterLogger
+from utils.console import ainput, cprint
+from utils.json_cache import wait_for_change
+from utils.lobby_registry import runtime_registry
 from utils.states import GameState, ScreenEnum, PlayerState
 from utils.file_io import SequentialAssigner, load_players_from_lobby, save_player_to_lobby_file, synchronize_start_time
 from utils.constants import (
@@ -25,7 +29,8 @@ class PlayerSetup:
         names_path=NAMES_PATH,
         names_index_path=NAMES_INDEX_PATH,
         colors_path=COLORS_PATH,
-        colors_index_path=COLORS_INDEX_PATH
+        colors_index_path=COLORS_INDEX_PATH,
+        preset: Optional[Dict[str, Any]] = None,
     ):
         """
         Initializes the PlayerSetup object with necessary paths for name and color assignment.
@@ -35,22 +40,24 @@ class PlayerSetup:
             names_index_path (str): Path to the file tracking the current name index.
             colors_path (str): Path to the file containing color names.
             colors_index_path (str): Path to the file tracking the current color index.
+            preset (Optional[Dict[str, Any]]): Answers that are already known and are not asked
+                (e.g. {"lobby": 12, "number_of_human_players": 3} when a server assigns the lobby).
         """
-        self.data = {}
+        self.data = dict(preset or {})
         self.code_name_assigner = SequentialAssigner(names_path, names_index_path, "code_names")
         self.color_assigner = SequentialAssigner(colors_path, colors_index_path, "colors")
 
-    def prompt_input(self, field_name: str, prompt: str) -> None:
+    async def prompt_input(self, field_name: str, prompt: str) -> None:
         """Prompt for a generic input and ensure it is not empty."""
         while True:
-            value = input(Fore.CYAN + prompt + " " + Style.RESET_ALL).strip()
+            value = (await ainput(Fore.CYAN + prompt + " " + Style.RESET_ALL)).strip()
             if value:
                 self.data[field_name] = value
                 return
             # print_color(f"{field_name} cannot be empty.", "RED")
-            print(Fore.RED + f"{field_name} cannot be empty." + Style.RESET_ALL)
+            cprint(Fore.RED + f"{field_name} cannot be empty." + Style.RESET_ALL)
 
-    def prompt_number(self, lower: int, upper: int, prompt: str, field_name: str) -> None:
+    async def prompt_number(self, lower: int, upper: int, prompt: str, field_name: str) -> None:
         '''
         Prompt for a number within a specified range and ensure it is valid.
         We use this to collect lobby number, number of players, and grade.
@@ -62,32 +69,46 @@ class PlayerSetup:
         '''
         while True:
             try:
-                value = int(input(Fore.CYAN + f"{prompt} ({lower} - {upper}): " + Style.RESET_ALL))
+                value = int(await ainput(Fore.CYAN + f"{prompt} ({lower} - {upper}): " + Style.RESET_ALL))
                 if lower <= value <= upper:
                     self.data[field_name] = value
                     return
-                print(Fore.RED + f"Please enter a number between {lower} and {upper}." + Style.RESET_ALL)
+                cprint(Fore.RED + f"Please enter a number between {lower} and {upper}." + Style.RESET_ALL)
             except ValueError:
-                print(Fore.RED + "Invalid input. Please enter a valid number." + Style.RESET_ALL)
+                cprint(Fore.RED + "Invalid input. Please enter a valid number." + Style.RESET_ALL)
 
-    def prompt_initial(self) -> None:
+    async def prompt_initial(self) -> None:
         '''
         Prompt for the player's last initial and ensure it is a single letter (A–Z).
         '''
         while True:
-            value = input(Fore.CYAN + "Enter your last initial (A–Z): " + Style.RESET_ALL).strip().upper()
+            value = (await ainput(Fore.CYAN + "Enter your last initial (A–Z): " + Style.RESET_ALL)).strip().upper()
             if len(value) == 1 and value.isalpha():
                 self.data["last_initial"] = value
                 return
-            print(Fore.RED + "Invalid input. Please enter a single letter (A–Z)." + Style.RESET_ALL)
+            cprint(Fore.RED + "Invalid input. Please enter a single letter (A–Z)." + Style.RESET_ALL)
 
-    def run(self, gs:GameState) -> Tuple[ScreenEnum, GameState, PlayerState]:
+    @staticmethod
+    def _prepare_ai_player() -> "AIPlayer":
+        """
+        Builds an AIPlayer without a persona and warms its API connections.
+
+        Blocking (importing the LLM stack, YAML loading, client construction, network); runs in
+        a worker thread while the human answers the setup prompts.
+        """
+        from utils.chatbot.ai_v5 import AIPlayer
+        ai = AIPlayer()
+        ai.warm_connections()
+        return ai
+
+    async def run(self, gs:GameState) -> Tuple[ScreenEnum, GameState, PlayerState]:
         """
         Executes the interactive player setup process and initializes player state for the game.
 
         This method prompts the user to enter personal details (e.g., name, favorite food, hobby),
         assigns a unique code name and color, creates a PlayerState object, and links an AI doppelganger
-        that mimics the player. It also sets up file paths in the GameState for the current lobby,
+        that mimics the player. The AI doppelganger is constructed in the background while the
+        prompts are answered; only its persona is bound at the end. It also sets up file paths in the GameState for the current lobby,
         including the chat log, voting data, and start time file.
 
         Args:
@@ -100,24 +121,26 @@ class PlayerSetup:
                 PlayerState for the current human player.
         """
 
+        # Build the AI doppelganger's prompters while the player is typing
+        ai_warmup = asyncio.create_task(asyncio.to_thread(self._prepare_ai_player))
+
         # prompt the player for their information
-        self.prompt_number(1, 10000, "Enter your lobby number", "lobby")
-        self.prompt_number(1, 5, "How many people are you playing with?", "number_of_human_players") # TODO change back to 3,5
-        self.prompt_number(6, 8, "What grade are you in?", "grade")
-        self.prompt_input("first_name", "Enter your first name: ")
-        self.prompt_initial()
-        self.prompt_input("favorite_food", "One of your favorite foods: ")
-        self.prompt_input("favorite_animal", "One of your favorite_animals: ")
-        self.prompt_input("hobby", "One of your hobbies? ")
-        self.prompt_input("extra_info", "Tell us one more thing about you: ")
+        if "lobby" not in self.data:
+            await self.prompt_number(1, 10000, "Enter your lobby number", "lobby")
+        if "number_of_human_players" not in self.data:
+            await self.prompt_number(1, 5, "How many people are you playing with?", "number_of_human_players") # TODO change back to 3,5
+        await self.prompt_number(6, 8, "What grade are you in?", "grade")
+        await self.prompt_input("first_name", "Enter your first name: ")
+        await self.prompt_initial()
+        await self.prompt_input("favorite_food", "One of your favorite foods: ")
+        await self.prompt_input("favorite_animal", "One of your favorite_animals: ")
+        await self.prompt_input("hobby", "One of your hobbies? ")
+        await self.prompt_input("extra_info", "Tell us one more thing about you: ")
 
         # clear_screen()
-        print(Fore.GREEN + "✅ Player setup complete." + Style.RESET_ALL)
+        cprint(Fore.GREEN + "✅ Player setup complete." + Style.RESET_ALL)
 
-        lobby_path = os.path.join(
-            "data", "runtime", "lobbies",
-            f"lobby_{self.data['lobby']}"
-        )
+        lobby_path = runtime_registry.lobby_dir(self.data["lobby"])
         gs.chat_log_path = os.path.join(lobby_path, "chat_log.txt")
         gs.start_time_path = os.path.join(lobby_path, "starttime.txt")
         gs.voting_path = os.path.join(lobby_path, "voting.json")
@@ -143,17 +166,20 @@ class PlayerSetup:
             color_name=color_name,
         )
         save_player_to_lobby_file(ps)
+        runtime_registry.register(self.data["lobby"], self.data["number_of_human_players"])
+        runtime_registry.note_join(self.data["lobby"], ps.code_name)
         ps.logger = MasterLogger.get_instance()
         ps.logger.info(f"Player {ps.first_name} {ps.last_initial}. initialized with code_name: {code_name}")
         # ps.logger.info(f"Player {ps.code_name} initialized with color: {picked_color_name}")
 
         # NEEDS TO GO LAST
-        ps.ai_doppleganger = AIPlayer(
-            player_to_steal=ps
-        )
+        ps.ai_doppleganger = await ai_warmup
+        ps.ai_doppleganger.bind_persona(ps)
         return ps, gs, ps
 
-def collect_player_data(ss: ScreenEnum, gs: GameState, ps: PlayerState) -> Tuple[ScreenEnum, GameState, PlayerState]:
+async def collect_player_data(
+        ss: ScreenEnum, gs: GameState, ps: PlayerState,
+        preset: Optional[Dict[str, Any]] = None) -> Tuple[ScreenEnum, GameState, PlayerState]:
     """
     Handles the full player setup and synchronization process before transitioning to the chat phase.
 
@@ -169,22 +195,23 @@ def collect_player_data(ss: ScreenEnum, gs: GameState, ps: PlayerState) -> Tuple
         ss (ScreenEnum): The current screen state (not modified in this function).
         gs (GameState): The shared game state object that tracks lobby-wide data.
         ps (PlayerState): The current player's state, which may be initialized or updated.
+        preset (Optional[Dict[str, Any]]): Setup answers that are not asked (see PlayerSetup).
 
     Returns:
         Tuple[ScreenEnum, GameState, PlayerState]: The next screen state (CHAT),
         the updated GameState with all players loaded, and the finalized PlayerState for the current user.
     """
     # clear_screen()
-    print(Fore.YELLOW + "\n=== Player Setup ===" + Style.RESET_ALL)
+    cprint(Fore.YELLOW + "\n=== Player Setup ===" + Style.RESET_ALL)
 
     master_logger = MasterLogger.get_instance()
 
     # Setup player data if not already written
-    if not any(p.code_name == ps.code_name for p in gs.players):
+    if ps.code_name not in gs.players:
         master_logger.log("Starting Setup screen...")
         ps.written_to_file = True
-        player_setup = PlayerSetup()
-        ps, gs, ps = player_setup.run(gs)
+        player_setup = PlayerSetup(preset=preset)
+        ps, gs, ps = await player_setup.run(gs)
         gs.players.append(ps)
         gs.players.append(ps.ai_doppleganger.player_state)
 
@@ -192,22 +219,27 @@ def collect_player_data(ss: ScreenEnum, gs: GameState, ps: PlayerState) -> Tuple
         save_player_to_lobby_file(ps)
         save_player_to_lobby_file(ps.ai_doppleganger.player_state)
 
+    # The first icebreaker is the same in every lobby (the deck cut below keeps it first), so the
+    # AI can start on its answer while the other players finish setup and get ready
+    ps.ai_doppleganger.start_icebreaker_prefetch(gs.icebreakers[0], [])
+
     # Synchronize the player list once all players are ready
     print_str = ''
-    while len([p for p in gs.players if p.is_human]) < gs.number_of_human_players:
-        sleep(1)
+    seen = None
+    while gs.players.num_humans < gs.number_of_human_players:
+        # Wait (without blocking the event loop) until someone writes to the lobby file
+        seen = await wait_for_change(gs.player_path, seen, timeout=1)
         # Load the players from the lobby once all players are set up
         gs.players = load_players_from_lobby(gs)
-        human_players = [p for p in gs.players if p.is_human]
-        new_str = f"{len(human_players)}/{gs.number_of_human_players} players are ready."
+        new_str = f"{gs.players.num_humans}/{gs.number_of_human_players} players are ready."
         if print_str != new_str:
-            print(new_str)
+            cprint(new_str)
             print_str = new_str
             
     # Ensure consistent player list before continuing
-    print(Fore.GREEN + "All players are ready!" + Style.RESET_ALL)
-    input(Fore.MAGENTA + "Press Enter to continue to the chat phase..." + Style.RESET_ALL)
-    synchronize_start_time(gs, ps)
+    cprint(Fore.GREEN + "All players are ready!" + Style.RESET_ALL)
+    await ainput(Fore.MAGENTA + "Press Enter to continue to the chat phase..." + Style.RESET_ALL)
+    await synchronize_start_time(gs, ps)
     ps.ai_doppleganger.initialize_game_state(gs)
     gs.players = load_players_from_lobby(gs)
     gs.players = sorted(gs.players, key=lambda p: p.code_name)
@@ -0,0 +1,123 @@
+'''
+2026-10-19
+How to run:
+   python ./src/simulate.py --lobbies 4 --players 3 --speed 30 --message-rate 0.3 \
+                            [--vote-strategy random|first|hunt-ai] [--llm-latency-ms 300] [--workers 2] [--json out.json]
+
+End-to-end load test: plays --lobbies games at once, each with --players scripted human
+players (see server.simulation), on an in-process game server (or --workers worker processes).
+The screens and AI players are the real ones; only the LLM is replaced by the offline mock
+(utils.prompting.mock_client) and the game runs on a virtual clock (utils.clock) --speed times
+faster than real time. Prints message latency, AI reply latency and vote completion time
+percentiles, in game-clock time.
+'''
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Play many simulated games and report latencies.")
+    parser.add_argument("--lobbies", type=int, default=4, help="Games to play at once")
+    parser.add_argument("--players", type=int, default=3, help="Scripted human players per lobby")
+    parser.add_argument("--round-seconds", type=int, default=60, help="Length of each chat round (game time)")
+    parser.add_argument("--speed", type=float, default=30.0,
+                        help="Game seconds per real second (1: real time)")
+    parser.add_argument("--message-rate", type=float, default=0.3, help="Chat lines per second per player")
+    parser.add_argument("--vote-strategy", choices=("random", "first", "hunt-ai"), default="random",
+                        help="How simulated players pick whom to vote out")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="Seconds (game time) before answering each prompt")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="Mean mock completion time")
+    parser.add_argument("--llm-jitter-ms", type=float, default=100.0, help="+/- spread of the mock completion time")
+    parser.add_argument("--respond-rate", type=float, default=0.5,
+                        help="How often the mock decides that an AI player should answer")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Worker processes to run lobbies in (0: run them in this process)")
+    parser.add_argument("--max-concurrent-llm", type=int, default=None, help="Cap on in-flight completions")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the players' random choices")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Give up after this many real seconds")
+    parser.add_argument("--json", default=None, help="Also write the report to this file")
+    return parser.parse_args()
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """Selects the mock LLM, the clock and the round length; must run before the game modules are imported."""
+    os.environ["DOPPELBOT_LLM_BACKEND"] = "mock"
+    os.environ["DOPPELBOT_MOCK_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["DOPPELBOT_MOCK_JITTER_MS"] = str(args.llm_jitter_ms)
+    os.environ["DOPPELBOT_MOCK_RESPOND_RATE"] = str(args.respond_rate)
+    os.environ["DOPPELBOT_ROUND_DURATION"] = str(args.round_seconds)
+    os.environ["DOPPELBOT_CLOCK_SPEED"] = str(args.speed)
+    os.environ["DOPPELBOT_CLOCK_EPOCH"] = str(time.time())   # workers share the same game time
+
+async def simulate(args: argparse.Namespace) -> dict:
+    from server.game_server import GameServer
+    from server.sharding import ShardSupervisor
+    from server.simulation import PlayerScript, run_simulation
+
+    if args.workers > 0:
+        server = ShardSupervisor(num_workers=args.workers, lobby_size=args.players,
+                                 max_concurrent_llm=args.max_concurrent_llm)
+    else:
+        server = GameServer(lobby_size=args.players, max_concurrent_llm=args.max_concurrent_llm)
+    serving = asyncio.create_task(server.serve())
+    script = PlayerScript(message_rate=args.message_rate, vote_strategy=args.vote_strategy,
+                          think_time=args.think_time)
+    started = time.monotonic()
+    try:
+        stats = await run_simulation(server, args.lobbies, args.players, script, args.round_seconds,
+                                     seed=args.seed, timeout=args.timeout)
+    finally:
+        server.stop()
+        await serving
+    report = {
+        "lobbies": args.lobbies,
+        "players_per_lobby": args.players,
+        "round_seconds": args.round_seconds,
+        "speed": args.speed,
+        "workers": args.workers,
+        "wall_seconds": round(time.monotonic() - started, 2),
+        **stats.report(),
+    }
+    return report
+
+def print_report(report: dict) -> None:
+    print(f"{report['lobbies']} lobbies x {report['players_per_lobby']} players, "
+          f"{report['players_finished']} players finished in {report['wall_seconds']}s, "
+          f"{report['messages_sent']} chat lines sent (game clock x{report['speed']:g})")
+    for key in ("message_latency", "ai_reply_latency", "vote_completion"):
+        s = report[key]
+        if not s["count"]:
+            print(f"  {key:<17} no samples")
+            continue
+        print(f"  {key:<17} n={s['count']:<6} mean={s['mean_ms']:>9.1f}ms  p50={s['p50_ms']:>9.1f}ms  "
+              f"p90={s['p90_ms']:>9.1f}ms  p99={s['p99_ms']:>9.1f}ms  max={s['max_ms']:>9.1f}ms")
+    for error in report["errors"]:
+        print(f"  error: {error}")
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    from utils.logging_utils import MasterLogger
+    MasterLogger(
+        init=True,
+        clear=True,
+        log_path="./logs/_simulate.log"
+    )
+    report = asyncio.run(simulate(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if report["errors"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
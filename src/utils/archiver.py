@@ -0,0 +1,327 @@
+"""
+Archival and garbage collection of old lobby folders.
+
+Finished lobbies (and lobbies abandoned mid-game) are packed into one compressed zip per day,
+`<archive_dir>/lobbies-YYYY-MM-DD.zip`, with each game's files under `lobby_<id>/<game_id>/`. An
+`index.jsonl` next to the zips gets one line per archived game (players, rounds played, files,
+which zip) for later analysis without unpacking anything.
+
+A lobby id can be played more than once (`LobbyRegistry.register` reopens an id typed in by a
+player), so archives are keyed by a game id: a random id the archiver writes into the lobby
+folder (`GAME_ID_FILE`) the first time it archives it. A folder created for a later game gets a
+new one.
+
+A lobby is only deleted after its files were written to the zip, read back and compared, a
+`MANIFEST.json` entry (the index record) was added to the zip as the game's last entry, the
+index line was written, and the files still in the folder were hashed again and found
+unchanged in the manifest. If the archiver is interrupted, the next run looks for that
+manifest: without it the game is archived again; with it only the index line and the deletion
+are redone, so after a crash a game may appear twice in the index (deduplicate on game_id). If
+the folder changed since its manifest was written, it is archived again under a new game id.
+
+Reading and writing is throttled to `max_bytes_per_sec` so a large backlog does not starve
+the game of disk bandwidth. Use `run_once` from a CLI (`src/archive_lobbies.py`) or
+`run_forever` as a background task (`serve.py --archive-every`).
+"""
+import asyncio
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+import zipfile
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from utils.atomic_io import atomic_write_text, lock_file
+from utils.lobby_registry import LobbyRegistry, LobbyStatus
+from utils.logging_utils import MasterLogger
+from utils.snapshot import decode_players
+
+CHUNK_SIZE = 64 * 1024
+
+# Written into a lobby folder by the archiver; identifies the game played in it
+GAME_ID_FILE = "ARCHIVE_GAME_ID"
+
+@dataclass
+class ArchiveReport:
+    """What one archiver pass did."""
+    archived: List[int] = field(default_factory=list)
+    abandoned: List[int] = field(default_factory=list)
+    skipped: Dict[int, str] = field(default_factory=dict)
+    bytes_archived: int = 0
+    seconds: float = 0.0
+
+class RateLimiter:
+    """Token bucket over bytes: `consume(n)` sleeps as needed to stay under the rate."""
+
+    def __init__(self, bytes_per_sec: Optional[float]):
+        self.bytes_per_sec = bytes_per_sec
+        self._allowance = bytes_per_sec or 0.0
+        self._last = time.monotonic()
+
+    def consume(self, nbytes: int) -> None:
+        if not self.bytes_per_sec:
+            return
+        now = time.monotonic()
+        self._allowance = min(self.bytes_per_sec, self._allowance + (now - self._last) * self.bytes_per_sec)
+        self._last = now
+        self._allowance -= nbytes
+        if self._allowance < 0:
+            time.sleep(-self._allowance / self.bytes_per_sec)
+
+class LobbyArchiver:
+    """Packs old lobbies of one registry into per-day zips and removes their folders."""
+
+    def __init__(self, registry: LobbyRegistry, archive_dir: str, finished_after: float = 600.0,
+                 abandoned_after: float = 6 * 3600.0, max_bytes_per_sec: Optional[float] = 4 * 1024 * 1024,
+                 dry_run: bool = False):
+        """
+        Args:
+            registry (LobbyRegistry): The lobbies to collect from.
+            archive_dir (str): Where the zips and `index.jsonl` are written.
+            finished_after (float): Seconds a finished lobby must be idle before it is archived.
+            abandoned_after (float): Seconds of inactivity after which an unfinished lobby is
+                considered abandoned and archived too.
+            max_bytes_per_sec (Optional[float]): Combined read/write budget (None = unlimited).
+            dry_run (bool): Only report what would be archived.
+        """
+        self.registry = registry
+        self.archive_dir = archive_dir
+        self.finished_after = finished_after
+        self.abandoned_after = abandoned_after
+        self.dry_run = dry_run
+        self.index_path = os.path.join(archive_dir, "index.jsonl")
+        self._rate = RateLimiter(max_bytes_per_sec)
+        self.logger = MasterLogger.get_instance()
+
+    # --- Selection ---
+
+    def _lobby_dirs(self) -> Iterator[int]:
+        if not os.path.isdir(self.registry.base_dir):
+            return
+        with os.scandir(self.registry.base_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if entry.is_dir() and name.startswith("lobby_") and name[6:].isdigit():
+                    yield int(name[6:])
+
+    @staticmethod
+    def _last_activity(lobby_dir: str) -> float:
+        """Newest mtime of the lobby's files (of the folder itself if it is empty)."""
+        latest = None
+        for root, _, files in os.walk(lobby_dir):
+            for name in files:
+                if root == lobby_dir and name == GAME_ID_FILE:
+                    continue  # written by the archiver, not by the game
+                mtime = os.stat(os.path.join(root, name)).st_mtime
+                latest = mtime if latest is None else max(latest, mtime)
+        return os.stat(lobby_dir).st_mtime if latest is None else latest
+
+    def _classify(self, lobby_id: int, now: float) -> Optional[str]:
+        """"finished" or "abandoned" if the lobby should be archived now, else None."""
+        idle = now - self._last_activity(self.registry.lobby_dir(lobby_id))
+        status = self.registry.status(lobby_id)
+        if status in (LobbyStatus.FINISHED, None):  # None: made before the registry existed
+            return "finished" if idle >= self.finished_after else None
+        return "abandoned" if idle >= self.abandoned_after else None
+
+    # --- Archiving ---
+
+    def _archive_path(self, day: str) -> str:
+        return os.path.join(self.archive_dir, f"lobbies-{day}.zip")
+
+    def _summary(self, lobby_dir: str) -> dict:
+        """Small analytics summary of a lobby (best effort: broken files are just left out)."""
+        summary = {}
+        try:
+            with open(os.path.join(lobby_dir, "players.json"), "r", encoding="utf-8") as f:
+                players = decode_players(f.read())
+            summary["players"] = [{"code_name": p.code_name, "is_human": p.is_human} for p in players]
+        except (OSError, ValueError, KeyError):
+            pass
+        try:
+            with open(os.path.join(lobby_dir, "voting.json"), "r", encoding="utf-8") as f:
+                votes = json.load(f)
+            summary["rounds"] = sum(1 for key in votes if key.startswith("votes_r"))
+        except (OSError, ValueError, AttributeError):
+            pass
+        return summary
+
+    def _lobby_files(self, lobby_dir: str) -> List[str]:
+        """Files worth keeping (lock files and leftover temp files are skipped)."""
+        names = []
+        for root, _, files in os.walk(lobby_dir):
+            for name in files:
+                if name.endswith((".lock", ".tmp")) or (root == lobby_dir and name == GAME_ID_FILE):
+                    continue
+                names.append(os.path.relpath(os.path.join(root, name), lobby_dir))
+        return sorted(names)
+
+    @staticmethod
+    def _game_id(lobby_dir: str, renew: bool = False) -> str:
+        """The id of the game in `lobby_dir`, written on first use (or replaced if `renew`)."""
+        path = os.path.join(lobby_dir, GAME_ID_FILE)
+        if not renew:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    game_id = f.read().strip()
+                if game_id:
+                    return game_id
+            except FileNotFoundError:
+                pass
+        game_id = uuid.uuid4().hex
+        atomic_write_text(path, game_id)
+        return game_id
+
+    def _hash_file(self, path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                self._rate.consume(len(chunk))
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _unchanged_since(self, lobby_dir: str, record: dict) -> bool:
+        """Whether every file now in the folder is in the manifest `record`, with the same content."""
+        prefix = record["prefix"]
+        archived = {entry["name"]: entry["sha256"] for entry in record["files"]}
+        for name in self._lobby_files(lobby_dir):
+            arcname = prefix + name.replace(os.sep, "/")
+            if archived.get(arcname) != self._hash_file(os.path.join(lobby_dir, name)):
+                return False
+        return True
+
+    def _copy_into(self, zf: zipfile.ZipFile, source: str, arcname: str) -> dict:
+        digest = hashlib.sha256()
+        size = 0
+        with open(source, "rb") as src, zf.open(arcname, "w", force_zip64=True) as dst:
+            while chunk := src.read(CHUNK_SIZE):
+                self._rate.consume(len(chunk))
+                digest.update(chunk)
+                dst.write(chunk)
+                size += len(chunk)
+        return {"name": arcname, "size": size, "sha256": digest.hexdigest()}
+
+    def _verify(self, archive: str, files: List[dict]) -> bool:
+        with zipfile.ZipFile(archive, "r") as zf:
+            for entry in files:
+                digest = hashlib.sha256()
+                with zf.open(entry["name"]) as f:
+                    while chunk := f.read(CHUNK_SIZE):
+                        self._rate.consume(len(chunk))
+                        digest.update(chunk)
+                if digest.hexdigest() != entry["sha256"]:
+                    return False
+        return True
+
+    @staticmethod
+    def _archived_manifest(archive: str, manifest_name: str) -> Optional[dict]:
+        """The lobby's manifest if a previous run completed its archive, else None."""
+        if not os.path.exists(archive):
+            return None
+        with zipfile.ZipFile(archive, "r") as zf:
+            if manifest_name not in zf.NameToInfo:
+                return None
+            return json.loads(zf.read(manifest_name))
+
+    def _append_index(self, record: dict) -> None:
+        with lock_file(self.index_path):
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def archive_lobby(self, lobby_id: int, reason: str) -> int:
+        """
+        Archives one lobby and deletes its folder.
+
+        Returns:
+            int: Bytes of lobby files archived (0 if it was already in the archive).
+
+        Raises:
+            IOError: The zip did not read back correctly, or the folder changed while it was
+                being archived (it is kept and archived again on the next run).
+        """
+        lobby_dir = self.registry.lobby_dir(lobby_id)
+        last_activity = self._last_activity(lobby_dir)
+        day = datetime.date.fromtimestamp(last_activity).isoformat()
+        archive = self._archive_path(day)
+        os.makedirs(self.archive_dir, exist_ok=True)
+
+        # One writer per day archive, across processes
+        with lock_file(archive):
+            game_id = self._game_id(lobby_dir)
+            prefix = f"lobby_{lobby_id}/{game_id}/"
+            record = self._archived_manifest(archive, prefix + "MANIFEST.json")
+            if record is not None and not self._unchanged_since(lobby_dir, record):
+                # Played on (or written to) after that archive: keep it, and archive this as a new game
+                game_id = self._game_id(lobby_dir, renew=True)
+                prefix = f"lobby_{lobby_id}/{game_id}/"
+                record = None
+            archived_bytes = 0
+            if record is None:
+                files = []
+                with zipfile.ZipFile(archive, "a", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+                    for name in self._lobby_files(lobby_dir):
+                        arcname = prefix + name.replace(os.sep, "/")
+                        files.append(self._copy_into(zf, os.path.join(lobby_dir, name), arcname))
+                if not self._verify(archive, files):
+                    raise IOError(f"Archive check failed for lobby {lobby_id} in {archive}")
+                record = {
+                    "lobby_id": lobby_id,
+                    "game_id": game_id,
+                    "prefix": prefix,
+                    "base_dir": self.registry.base_dir,
+                    "archive": os.path.basename(archive),
+                    "day": day,
+                    "reason": reason,
+                    "last_activity": last_activity,
+                    "archived_at": time.time(),
+                    "files": files,
+                    **self._summary(lobby_dir),
+                }
+                with zipfile.ZipFile(archive, "a", compression=zipfile.ZIP_DEFLATED) as zf:
+                    zf.writestr(prefix + "MANIFEST.json", json.dumps(record, indent=1))
+                archived_bytes = sum(entry["size"] for entry in files)
+
+        self._append_index(record)
+        if not self._unchanged_since(lobby_dir, record):
+            raise IOError(f"Lobby {lobby_id} changed while it was archived; kept for the next run")
+        if reason == "abandoned":
+            self.registry.set_status(lobby_id, LobbyStatus.FINISHED)
+        shutil.rmtree(lobby_dir)
+        return archived_bytes
+
+    def run_once(self, now: Optional[float] = None) -> ArchiveReport:
+        """Archives every lobby that is due. Blocking; see `run_forever` for async use."""
+        started = time.monotonic()
+        now = time.time() if now is None else now
+        report = ArchiveReport()
+        for lobby_id in sorted(self._lobby_dirs()):
+            try:
+                reason = self._classify(lobby_id, now)
+                if reason is None:
+                    continue
+                if not self.dry_run:
+                    report.bytes_archived += self.archive_lobby(lobby_id, reason)
+                (report.abandoned if reason == "abandoned" else report.archived).append(lobby_id)
+            except (OSError, zipfile.BadZipFile) as e:
+                report.skipped[lobby_id] = repr(e)
+                if self.logger:
+                    self.logger.warning(f"Could not archive lobby {lobby_id}: {e!r}")
+        report.seconds = time.monotonic() - started
+        if self.logger and (report.archived or report.abandoned or report.skipped):
+            self.logger.info(
+                f"Archived {len(report.archived)} finished and {len(report.abandoned)} abandoned lobbies "
+                f"from {self.registry.base_dir} ({report.bytes_archived} bytes, {len(report.skipped)} skipped)"
+            )
+        return report
+
+    async def run_forever(self, interval: float = 3600.0) -> None:
+        """Runs `run_once` every `interval` seconds in a worker thread, until cancelled."""
+        while True:
+            await asyncio.to_thread(self.run_once)
+            await asyncio.sleep(interval)
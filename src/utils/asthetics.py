@@ -1,15 +1,15 @@
-import os
 import random
-import time
 from colorama import Fore, Style
+from utils.clock import get_clock
+from utils.console import cprint, get_console
 
 def clear_screen():
     """
-    Clears the console screen based on the operating system.
+    Clears the current console's screen (the terminal: `cls`/`clear` depending on the OS).
     """
-    os.system('cls' if os.name == 'nt' else 'clear')
+    get_console().clear()
 
-def dramatic_print(message: str):
+async def dramatic_print(message: str):
     """
     Displays a message with a suspenseful, animated sequence to build dramatic tension.
 
@@ -18,6 +18,9 @@ def dramatic_print(message: str):
     - Simulates a heartbeat effect using timed prints.
     - Displays the final message in green after a brief pause.
 
+    The pauses are non-blocking sleeps on the game clock (`utils.clock`), so background tasks
+    keep running during the reveal and simulations can fast-forward it.
+
     Args:
         message (str): The final message to reveal after the suspense buildup.
     """
@@ -33,24 +36,25 @@ def dramatic_print(message: str):
 
     # Print a random suspense phrase with some dramatic effect
     phrase = random.choice(suspense_phrases)
-    print(Fore.CYAN + phrase + Style.RESET_ALL)
+    clock = get_clock()
+    cprint(Fore.CYAN + phrase + Style.RESET_ALL)
 
     # Dramatic pause with dots
     for _ in range(3):
-        print(Fore.YELLOW + "..." + Style.RESET_ALL, end='', flush=True)
-        time.sleep(0.7)
+        cprint(Fore.YELLOW + "..." + Style.RESET_ALL, end='', flush=True)
+        await clock.sleep(0.7)
 
-    print("\n")
+    cprint("\n")
 
     # Simulated heartbeat effect
     heartbeat_effect = ["Thump...", "Thump...", "Thump-thump..."]
     for heartbeat in heartbeat_effect:
-        print(Fore.RED + heartbeat + Style.RESET_ALL)
-        time.sleep(0.6)
+        cprint(Fore.RED + heartbeat + Style.RESET_ALL)
+        await clock.sleep(0.6)
 
     # Final suspense delay
-    time.sleep(1)
-    print(Fore.GREEN + f"\n{message}\n" + Style.RESET_ALL)
+    await clock.sleep(1)
+    cprint(Fore.GREEN + f"\n{message}\n" + Style.RESET_ALL)
 
     
 def format_gm_message(msg: str) -> str:    
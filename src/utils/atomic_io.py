@@ -0,0 +1,187 @@
+"""
+Crash- and reader-safe persistence for the shared lobby files.
+
+Every write goes to a temporary file in the same directory and is then moved over the target
+with `os.replace`. Readers in other terminals therefore see either the old or the new file,
+never a half-written one. Read-modify-write cycles (vote records, start times, players.json,
+the code-name/color index files) additionally hold a per-file advisory lock so concurrent
+writers never lose each other's updates.
+
+How hard each write is pushed to disk is controlled by a durability level. Pass it per call,
+or set the default with the DOPPELBOT_DURABILITY environment variable (none | file | full).
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, Optional
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+class Durability(Enum):
+    NONE = "none"   # rely on the OS page cache (fastest, fine for local play)
+    FILE = "file"   # fsync the new file before it replaces the old one
+    FULL = "full"   # also fsync the directory so the rename itself survives a power loss
+
+DEFAULT_DURABILITY = Durability(os.getenv("DOPPELBOT_DURABILITY", Durability.FILE.value).lower())
+
+# Advisory file locks are per open file, so threads inside one process also need to be
+# serialized on the same path.
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+def _thread_lock_for(path: str) -> threading.Lock:
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+def _fsync_dir(directory: str) -> None:
+    if os.name == "nt":
+        return  # directories cannot be opened for fsync on Windows
+    fd = os.open(directory or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _write_temp(path: str, text: str, durability: Durability) -> str:
+    """Writes `text` to a new temp file next to `path` and returns the temp file's path."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            if durability is not Durability.NONE:
+                os.fsync(f.fileno())
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+def atomic_write_text(path: str, text: str, durability: Optional[Durability] = None) -> None:
+    """
+    Atomically replaces the contents of `path` with `text`.
+
+    Args:
+        path (str): The file to write.
+        text (str): The full new contents.
+        durability (Optional[Durability]): Overrides `DEFAULT_DURABILITY` for this write.
+    """
+    durability = durability or DEFAULT_DURABILITY
+    tmp_path = _write_temp(path, text, durability)
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    if durability is Durability.FULL:
+        _fsync_dir(os.path.dirname(path))
+
+def atomic_write_json(path: str, obj: Any, durability: Optional[Durability] = None, **dump_kwargs) -> None:
+    """Serializes `obj` as JSON (with `json.dumps` kwargs) and writes it with `atomic_write_text`."""
+    atomic_write_text(path, json.dumps(obj, **dump_kwargs), durability)
+
+def create_exclusive(path: str, text: str, durability: Optional[Durability] = None) -> bool:
+    """
+    Creates `path` with `text` only if it does not exist yet, atomically.
+
+    Exactly one of several racing callers gets True. Nobody ever sees the file empty or
+    half-written, because the content is written to a temp file first and then hard-linked
+    into place.
+
+    Returns:
+        bool: True if this call created the file, False if it already existed.
+    """
+    durability = durability or DEFAULT_DURABILITY
+    tmp_path = _write_temp(path, text, durability)
+    try:
+        os.link(tmp_path, path)
+        created = True
+    except FileExistsError:
+        created = False
+    except (AttributeError, NotImplementedError, PermissionError):
+        # No hard links on this filesystem: fall back to an exclusive create
+        with lock_file(path):
+            created = not os.path.exists(path)
+            if created:
+                os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    if created and durability is Durability.FULL:
+        _fsync_dir(os.path.dirname(path))
+    return created
+
+@contextmanager
+def lock_file(path: str, poll_interval: float = 0.01) -> Iterator[None]:
+    """
+    Holds an exclusive advisory lock for `path` (via a sidecar `<path>.lock` file).
+
+    The lock is advisory: it only serializes writers that also use `lock_file`. Plain readers
+    are unaffected and rely on the atomic replace instead.
+
+    Args:
+        path (str): The file being protected.
+        poll_interval (float): Retry interval while waiting for the lock on Windows.
+    """
+    lock_path = f"{path}.lock"
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    with _thread_lock_for(path):
+        with open(lock_path, "a+") as lock_fh:
+            if os.name == "nt":
+                while True:
+                    try:
+                        msvcrt.locking(lock_fh.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(poll_interval)
+                try:
+                    yield
+                finally:
+                    lock_fh.seek(0)
+                    msvcrt.locking(lock_fh.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(lock_fh.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_fh.fileno(), fcntl.LOCK_UN)
+
+def update_json(
+        path: str, mutate: Callable[[Any], Any], default_factory: Callable[[], Any] = dict,
+        durability: Optional[Durability] = None, **dump_kwargs) -> Any:
+    """
+    Performs a locked read-modify-write of a JSON file.
+
+    The current content (or `default_factory()` if the file is missing or empty) is passed to
+    `mutate`. Its return value, or the mutated object if it returns None, is written back
+    atomically while the lock is still held.
+
+    Args:
+        path (str): The JSON file to update.
+        mutate (Callable[[Any], Any]): Receives the current data and modifies or replaces it.
+        default_factory (Callable[[], Any]): Builds the initial value for a missing file.
+        durability (Optional[Durability]): Overrides `DEFAULT_DURABILITY` for this write.
+
+    Returns:
+        Any: The data that was written.
+    """
+    with lock_file(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            data = json.loads(text) if text.strip() else default_factory()
+        except FileNotFoundError:
+            data = default_factory()
+        result = mutate(data)
+        if result is not None:
+            data = result
+        atomic_write_json(path, data, durability, **dump_kwargs)
+    return data
@@ -1,26 +1,43 @@
 import asyncio
+import hashlib
 from datetime import time
 import random
 import re
 from dataclasses import asdict
 import json
-from typing import Dict, List, Tuple 
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple 
 from pydantic import BaseModel
 from utils.prompting.prompter import OpenAIPrompter
 import sys
 sys.path.append("../../")
-from utils.prompting import prompter
 from utils.states import PlayerState, GameState
 from utils.file_io import SequentialAssigner
+from utils import constants
 from utils.constants import (
     NAMES_PATH, NAMES_INDEX_PATH, 
     COLORS_PATH, COLORS_INDEX_PATH,
-    FEEDBACK,
     )
 from utils.logging_utils import MasterLogger
+from utils.tracing import span
+from utils.metrics import CACHE_REQUESTS
+from utils.prompting.budget import (
+    CHEAP_MODEL, SHORT_CONTEXT_LINES, Degradation, TokenAccountant,
+    estimate_fixed_prompt_tokens, estimate_tokens,
+    )
 
 import re
 
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+GM_PREFIX = "GAME MASTER:"
+# Prefetched icebreaker answers that were used / thrown away
+_prefetch_hits = CACHE_REQUESTS.labels("icebreaker_prefetch", "hit")
+_prefetch_misses = CACHE_REQUESTS.labels("icebreaker_prefetch", "miss")
+ICEBREAKER_REASONING = (
+    "The GAME MASTER just asked a new icebreaker question and you have not answered it yet."
+)
+
 def extract_between_delimiters(text: str, delim: str) -> str:
     """
     Extracts the first occurrence of text between two identical delimiters.
@@ -36,6 +53,41 @@ def extract_between_delimiters(text: str, delim: str) -> str:
     match = re.search(pattern, text, re.DOTALL)  # DOTALL handles multi-line blocks if needed
     return match.group(1).strip() if match else f"ERROR NO MATCH FOUND ||| DELIM = {delim} ||| TEXT = {text}"
 
+def current_icebreaker(minutes: List[str]) -> Tuple[int, Optional[str]]:
+    """
+    Finds the most recent GAME MASTER question in a transcript.
+
+    Args:
+        minutes (List[str]): Chat log lines (may still contain colorama codes).
+
+    Returns:
+        Tuple[int, Optional[str]]: Index of the line and the question text, or (-1, None).
+    """
+    for idx in range(len(minutes) - 1, -1, -1):
+        line = ANSI_ESCAPE.sub("", minutes[idx]).strip()
+        if line.startswith(GM_PREFIX):
+            return idx, line[len(GM_PREFIX):].strip()
+    return -1, None
+
+def style_fingerprint(humans_messages: List[str]) -> str:
+    """
+    Fingerprints the style examples an answer was stylized with.
+
+    A digest rather than `hash()`: string hashes are salted per process, and prefetches move
+    between processes with `export_state` / `restore_state`.
+    """
+    return hashlib.sha1("\n".join(humans_messages).encode("utf-8")).hexdigest()
+
+@dataclass
+class IcebreakerPrefetch:
+    """An answer to an upcoming icebreaker, generated before the question is asked."""
+    question: str
+    raw_response: str
+    styled_response: str
+    style_key: str      # fingerprint of humans_messages used by the stylizer (see style_fingerprint)
+    context_len: int    # number of transcript lines the answer was generated from
+    seq: int            # newer prefetches for the same question replace older ones
+
 class AIPlayer:
     """
     Represents an AI-controlled player that mimics a human player's style and responses in a social deduction game.
@@ -48,33 +100,43 @@ class AIPlayer:
     """
     def __init__(
             self,
-            player_to_steal: PlayerState, 
+            player_to_steal: Optional[PlayerState] = None, 
             debug_bool: bool = False):
         """
         Initializes the AIPlayer by stealing identity and attributes from a given human player.
 
+        The prompters (prompt YAML files and OpenAI clients) are built here. They do not depend
+        on the player, so the AIPlayer can be constructed (e.g. in a worker thread) before the
+        human has finished setup, and the persona bound later with `bind_persona`.
+
         Args:
-            player_to_steal (PlayerState): The human player whose persona will be mimicked.
-            system_prompt (str): Base system prompt used for LLM prompting (extended with player metadata).
+            player_to_steal (Optional[PlayerState]): The human player whose persona will be
+                mimicked. If None, call `bind_persona` before using the AI.
             debug_bool (bool): If True, enables debug behavior/logging.
         """
 
         self.humans_messages = []
-        self.stolen_player_code_name = player_to_steal.code_name
+        self.stolen_player_code_name = None
         self.code_name_assigner = SequentialAssigner(NAMES_PATH, NAMES_INDEX_PATH, "code_names")
         self.color_assigner = SequentialAssigner(COLORS_PATH, COLORS_INDEX_PATH, "colors")
-        self.player_state = self._steal_player_state(player_to_steal)
-        self.persona = self._build_persona()
+        self.player_state = None
+        self.persona = None
         self.is_voted_out = False
 
+        # Icebreaker answers generated ahead of time (see prefetch_icebreaker)
+        self._prefetched: Dict[str, IcebreakerPrefetch] = {}
+        self._prefetch_lock = threading.Lock()
+        self._prefetch_seq = 0
+        self._prefetch_tasks = set()
+
         self.debug_bool = debug_bool
 
         # Initialize game state
         self.game_state = None
         self.logger = MasterLogger.get_instance()
-        self.logger.info(f"AIPlayer initialized with player: {self.stolen_player_code_name}")
         
-        # Prompter Dictionary
+        # Prompter Dictionary. Each stage's models come from resources/model_routing.yaml
+        # (utils.prompting.routing); `llm_model` is only used for stages without a route.
         self.prompter_dict = {
             "decide_to_respond": OpenAIPrompter(
                 prompt_path="./resources/prompts/v0/decide_to_respond.yaml",
@@ -85,6 +147,7 @@ class AIPlayer:
                 show_prompts = debug_bool,
                 temperature=0.5,
                 llm_model="gpt-4.1-mini",
+                stage="decide_to_respond",
             ),
             "respond": OpenAIPrompter(
                 prompt_path="./resources/prompts/v0/respond.yaml",
@@ -97,6 +160,7 @@ class AIPlayer:
                 show_prompts = debug_bool,
                 temperature=0.9,
                 llm_model="gpt-4.1-mini",
+                stage="respond",
             ),
               "stylizer": OpenAIPrompter(
                 prompt_path="./resources/prompts/v0/stylizer.yaml",
@@ -107,15 +171,91 @@ class AIPlayer:
                 show_prompts = debug_bool,
                 temperature=0.5,
                 llm_model="gpt-4.1-mini",
+                stage="stylizer",
             )
         }
 
-    async def decide_to_respond(self, minutes: List[str]) -> Dict[str, str]:
+        # Token spend and per-round budgets (see utils.prompting.budget)
+        self.accountant = TokenAccountant()
+        for stage_prompter in self.prompter_dict.values():
+            stage_prompter.accountant = self.accountant
+        self._fixed_prompt_tokens = {
+            stage: estimate_fixed_prompt_tokens(stage_prompter)
+            for stage, stage_prompter in self.prompter_dict.items()
+        }
+
+        if player_to_steal is not None:
+            self.bind_persona(player_to_steal)
+
+    def bind_persona(self, player_to_steal: PlayerState) -> None:
+        """
+        Steals the identity of `player_to_steal`: assigns the AI's own code name and color and
+        builds the persona used in prompts.
+
+        Args:
+            player_to_steal (PlayerState): The human player whose persona will be mimicked.
+        """
+        self.stolen_player_code_name = player_to_steal.code_name
+        self.player_state = self._steal_player_state(player_to_steal)
+        self.persona = self._build_persona()
+        self.logger.info(f"AIPlayer initialized with player: {self.stolen_player_code_name}")
+
+    def export_state(self) -> dict:
+        """
+        Returns the AI's per-game memory as a JSON-serializable dict (see `restore_state`).
+
+        Prompters and connections are not included; they are rebuilt by the receiving process.
+        """
+        with self._prefetch_lock:
+            prefetched = [asdict(entry) for entry in self._prefetched.values()]
+        return {
+            "stolen_player_code_name": self.stolen_player_code_name,
+            "player_state": self.player_state.to_record(),
+            "persona": self.persona,
+            "humans_messages": list(self.humans_messages),
+            "is_voted_out": self.is_voted_out,
+            "prefetched": prefetched,
+        }
+
+    def restore_state(self, state: dict) -> None:
+        """
+        Restores memory exported by `export_state` into an AIPlayer built without a persona.
+
+        Unlike `bind_persona`, no new code name or color is assigned.
+
+        Args:
+            state (dict): Output of `export_state`.
+        """
+        self.stolen_player_code_name = state["stolen_player_code_name"]
+        self.player_state = PlayerState.from_record(state["player_state"])
+        self.persona = state["persona"]
+        self.humans_messages = list(state["humans_messages"])
+        self.is_voted_out = state["is_voted_out"]
+        with self._prefetch_lock:
+            self._prefetched = {
+                entry["question"]: IcebreakerPrefetch(**entry) for entry in state.get("prefetched", [])
+            }
+
+    def warm_connections(self) -> int:
+        """
+        Opens the HTTP connection of every prompter ahead of the first real request.
+
+        Blocking; meant to run in a worker thread while the player is still typing.
+
+        Returns:
+            int: Number of clients whose connection was warmed successfully.
+        """
+        # Prompters share one client per API key; warm each distinct client once
+        clients = {id(prompter.client): prompter for prompter in self.prompter_dict.values()}
+        return sum(1 for prompter in clients.values() if prompter.warm_connection())
+
+    async def decide_to_respond(self, minutes: List[str], llm_model: Optional[str] = None) -> Dict[str, str]:
         """
         Step 1: Determines whether the AI should respond to the current conversation.
 
         Args:
             minutes (List[str]): The full chat log leading up to the current moment.
+            llm_model (Optional[str]): Overrides the prompter's model (used when over budget).
 
         Returns:
             Dict[str, str]: A dictionary with keys "decision" and "reasoning" based on the LLM response.
@@ -130,18 +270,12 @@ class AIPlayer:
             "minutes": "\n".join(minutes),
         }
 
-        # Get the last message
-        last_msg = minutes[-1] if minutes else None
-
-        # Track messages from the original human player to help mimic their style
-        if last_msg and last_msg.startswith(f"{self.stolen_player_code_name}:"):
-            self.humans_messages.append(last_msg.split(":", 1)[1].strip())
-
         # Prepare response container
         dtr_resp = {}
 
         try:
-            response_json = await asyncio.to_thread(prompter.get_completion, input_texts)
+            with span("decide_to_respond", "llm"):
+                response_json = await asyncio.to_thread(prompter.get_completion, input_texts, llm_model=llm_model)
             resp = response_json[0]
         except Exception as e:
             # raise e
@@ -169,20 +303,21 @@ class AIPlayer:
         # print(dtr_resp)
         return dtr_resp
 
-    async def respond(self, minutes: List[str], dtr_resp) -> str:
+    async def respond(self, minutes: List[str], dtr_resp, llm_model: Optional[str] = None) -> str:
         """
         Step 2: Generates a textual response based on the conversation and reasoning.
 
         Args:
             minutes (List[str]): Chat history leading to this point.
             dtr_resp (Dict[str, str]): The reason for responding, as generated by the decision step.
+            llm_model (Optional[str]): Overrides the prompter's model (used when over budget).
 
         Returns:
             str: The AI's generated message, or "ERROR" if something failed.
         """
         prompter = self.prompter_dict["respond"]
         input_texts = {
-            "feedback": FEEDBACK,
+            "feedback": constants.FEEDBACK,  # read on first use
             "persona": self.persona, 
             "minutes": "\n".join(minutes),
             "reasoning": dtr_resp["reasoning"]
@@ -191,7 +326,8 @@ class AIPlayer:
         error_response = "ERROR"
 
         try:
-            response_json = await asyncio.to_thread(prompter.get_completion, input_texts)
+            with span("respond", "llm"):
+                response_json = await asyncio.to_thread(prompter.get_completion, input_texts, llm_model=llm_model)
             resp = response_json[0]
         except Exception as e:
             # raise e
@@ -208,27 +344,35 @@ class AIPlayer:
             self.logger.info(f"Generated Response: {response}")
             return response
 
-    async def stylize_response(self, response: str) -> str:
+    async def stylize_response(
+            self, response: str, humans_messages: Optional[List[str]] = None,
+            llm_model: Optional[str] = None) -> str:
         """
         Step 3: Stylizes the generated response to match the human player's communication style.
 
         Args:
             response (str): The unstyled raw message generated by the AI.
+            humans_messages (Optional[List[str]]): Style examples to use (defaults to all
+                messages seen from the human so far).
+            llm_model (Optional[str]): Overrides the prompter's model (used when over budget).
 
         Returns:
             str: A stylized version of the message, or "ERROR" if generation failed.
         """
         prompter = self.prompter_dict["stylizer"]
+        if humans_messages is None:
+            humans_messages = self.humans_messages
 
         input_texts = {
-            "player_minutes": "\n".join(self.humans_messages),
+            "player_minutes": "\n".join(humans_messages),
             "response": response
         }
         error_response = "ERROR"
 
         try:
             # Run the completion in a separate thread to avoid blocking
-            raw_response = await asyncio.to_thread(prompter.get_completion, input_texts)
+            with span("stylizer", "llm"):
+                raw_response = await asyncio.to_thread(prompter.get_completion, input_texts, llm_model=llm_model)
             styled_response = raw_response[0]
             self.logger.info(f"Stylized Response: {styled_response}")
             return styled_response
@@ -238,10 +382,50 @@ class AIPlayer:
             self.logger.error(f"Error during stylizing response: {e}")
             return error_response # Fallback response
 
+    def plan_budget(self, stages: Tuple[str, ...], minutes: List[str]) -> Degradation:
+        """
+        Estimates the tokens of running `stages` on `minutes` and checks them against this AI's
+        and the lobby's budgets for the current round.
+
+        Args:
+            stages (Tuple[str, ...]): Prompter stages that will run.
+            minutes (List[str]): The transcript they will see.
+
+        Returns:
+            Degradation: How much to cut back (see utils.prompting.budget).
+        """
+        gs = self.game_state
+        if gs is not None:
+            self.accountant.bind(self.player_state.code_name, gs.chat_log_path, gs.round_number,
+                                 lobby_ais=gs.players.num_ais)
+        transcript = estimate_tokens("\n".join(minutes))
+        persona = estimate_tokens(self.persona or "")
+        estimate = 0
+        for stage in stages:
+            estimate += self._fixed_prompt_tokens[stage]
+            if stage == "stylizer":
+                estimate += 2 * estimate_tokens("\n".join(self.humans_messages))
+            else:
+                estimate += transcript + persona
+            if stage == "respond":
+                estimate += estimate_tokens(constants.FEEDBACK)
+
+        previous = self.accountant.level
+        level = self.accountant.plan(estimate)
+        if level != previous:
+            self.logger.info(
+                f"AI {self.player_state.code_name} token budget: {previous.name} -> {level.name} "
+                f"(round {self.accountant.round_number}, next ~{estimate} tokens)"
+            )
+        return level
+
     def handle_dialogue(self, minutes: List[str]) -> str:
         """
         Executes the full decision → generation → styling pipeline for the AI to produce a response.
 
+        Over budget, the pipeline is cut back step by step (see `plan_budget`): a shorter
+        transcript, no stylizing, a cheaper model, and finally silence until the next round.
+
         Args:
             minutes (List[str]): The full chat transcript so far.
 
@@ -249,9 +433,26 @@ class AIPlayer:
             str: The final stylized response, "STAY SILENT", "ERROR", or fallback "No response needed."
         """
         # print("inside handle_dialogue")
+        # Track messages from the original human player to help mimic their style
+        last_msg = minutes[-1] if minutes else None
+        if last_msg and last_msg.startswith(f"{self.stolen_player_code_name}:"):
+            self.humans_messages.append(last_msg.split(":", 1)[1].strip())
+
+        # Step 0: A fresh icebreaker may already have an answer waiting
+        prefetched = self.take_prefetched_icebreaker(minutes)
+        if prefetched is not None:
+            return prefetched
+
+        level = self.plan_budget(("decide_to_respond", "respond", "stylizer"), minutes)
+        if level >= Degradation.SILENT:
+            return "STAY SILENT"
+        if level >= Degradation.SHORT_CONTEXT:
+            minutes = minutes[-SHORT_CONTEXT_LINES:]
+        llm_model = CHEAP_MODEL if level >= Degradation.CHEAP_MODEL else None
+
         # Step 1: Decide whether to respond
         dtr_resp = asyncio.run(
-            self.decide_to_respond(minutes)
+            self.decide_to_respond(minutes, llm_model=llm_model)
             )
         # print(dtr_resp)
 
@@ -266,9 +467,11 @@ class AIPlayer:
             
         # Step 2: Generate the response
             response = asyncio.run(
-                self.respond(minutes, dtr_resp)
+                self.respond(minutes, dtr_resp, llm_model=llm_model)
                 )
             if response != "ERROR":
+                if level >= Degradation.NO_STYLIZER:
+                    return response
                 # Step 3: Stylize the response
                 styled_response = asyncio.run(
                     self.stylize_response(response)
@@ -282,6 +485,145 @@ class AIPlayer:
         else:
             return "No response needed."
     
+    def prefetch_icebreaker(self, question: str, minutes: List[str], seq: Optional[int] = None) -> Optional[IcebreakerPrefetch]:
+        """
+        Generates and stylizes an answer to an icebreaker before it is asked.
+
+        Runs the respond → stylize steps against the transcript as it will look once the
+        GAME MASTER posts `question`. Answering a fresh icebreaker is always the right call,
+        so the decide-to-respond step is skipped. Blocking; call it from a worker thread.
+
+        Args:
+            question (str): The upcoming icebreaker.
+            minutes (List[str]): The chat transcript so far.
+            seq (Optional[int]): Ordering token from `start_icebreaker_prefetch`; a result is
+                discarded if a newer prefetch for the same question has already been stored.
+
+        Returns:
+            Optional[IcebreakerPrefetch]: The stored prefetch, or None if generation failed.
+        """
+        if seq is None:
+            with self._prefetch_lock:
+                self._prefetch_seq += 1
+                seq = self._prefetch_seq
+        humans_messages = list(self.humans_messages)
+        upcoming = list(minutes) + [f"{GM_PREFIX} {question}"]
+
+        level = self.plan_budget(("respond", "stylizer"), upcoming)
+        if level >= Degradation.SILENT:
+            return None
+        if level >= Degradation.SHORT_CONTEXT:
+            upcoming = upcoming[-SHORT_CONTEXT_LINES:]
+        llm_model = CHEAP_MODEL if level >= Degradation.CHEAP_MODEL else None
+
+        response = asyncio.run(self.respond(upcoming, {"reasoning": ICEBREAKER_REASONING}, llm_model=llm_model))
+        if response == "ERROR":
+            return None
+        if level >= Degradation.NO_STYLIZER:
+            styled_response = response
+        else:
+            styled_response = asyncio.run(self.stylize_response(response, humans_messages))
+        if styled_response == "ERROR":
+            return None
+
+        entry = IcebreakerPrefetch(
+            question=question,
+            raw_response=response,
+            styled_response=styled_response,
+            style_key=style_fingerprint(humans_messages),
+            context_len=len(minutes),
+            seq=seq,
+        )
+        with self._prefetch_lock:
+            current = self._prefetched.get(question)
+            if current is not None and current.seq > seq:
+                return current
+            self._prefetched[question] = entry
+        self.logger.info(f"AI {self.player_state.code_name} prefetched an answer to: {question}")
+        return entry
+
+    def start_icebreaker_prefetch(self, question: str, minutes: List[str]) -> asyncio.Task:
+        """
+        Starts `prefetch_icebreaker` in the background on the running event loop.
+
+        The task is not tied to a round, so it keeps going through the voting screen. The
+        AIPlayer holds a reference to it until it finishes.
+
+        Args:
+            question (str): The upcoming icebreaker.
+            minutes (List[str]): The chat transcript so far.
+
+        Returns:
+            asyncio.Task: The background task.
+        """
+        with self._prefetch_lock:
+            self._prefetch_seq += 1
+            seq = self._prefetch_seq
+        task = asyncio.get_running_loop().create_task(
+            asyncio.to_thread(self.prefetch_icebreaker, question, list(minutes), seq),
+            name=f"icebreaker-prefetch-{self.player_state.code_name}",
+        )
+        self._prefetch_tasks.add(task)
+        task.add_done_callback(self._prefetch_done)
+        return task
+
+    def _prefetch_done(self, task: asyncio.Task) -> None:
+        self._prefetch_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.error(f"Icebreaker prefetch failed: {task.exception()}")
+
+    def take_prefetched_icebreaker(self, minutes: List[str]) -> Optional[str]:
+        """
+        Returns the prefetched answer to the icebreaker that was just asked, if it still fits.
+
+        The answer is used at most once, and only if:
+        - the most recent GAME MASTER line is the question it was generated for,
+        - this AI has not answered that question yet, and
+        - nobody has addressed this AI by code name in messages the answer did not see.
+
+        If the human has written new messages since, only the stylizing step is re-run.
+
+        Args:
+            minutes (List[str]): The full chat transcript so far.
+
+        Returns:
+            Optional[str]: The stylized answer, or None to fall back to the normal pipeline.
+        """
+        gm_idx, question = current_icebreaker(minutes)
+        if question is None:
+            return None
+        with self._prefetch_lock:
+            entry = self._prefetched.pop(question, None)
+        if entry is None:
+            return None
+
+        code_name = self.player_state.code_name
+        since_gm = minutes[gm_idx + 1:]
+        if any(line.startswith(f"{code_name}:") for line in since_gm):
+            _prefetch_misses.inc()
+            return None
+
+        # Lines the answer was not generated from (other than the GM announcement itself)
+        unseen = [
+            line for line in minutes[entry.context_len:]
+            if GM_PREFIX not in line and not set(ANSI_ESCAPE.sub("", line).strip()) <= {"*"}
+        ]
+        if len(minutes) < entry.context_len or any(code_name.lower() in line.lower() for line in unseen):
+            self.logger.info(f"AI {code_name} discarded a stale prefetched answer.")
+            _prefetch_misses.inc()
+            return None
+
+        styled_response = entry.styled_response
+        if style_fingerprint(self.humans_messages) != entry.style_key:
+            styled_response = asyncio.run(self.stylize_response(entry.raw_response))
+            if styled_response == "ERROR":
+                _prefetch_misses.inc()
+                return None
+
+        self.logger.info(f"AI {code_name} used a prefetched answer for: {question}")
+        _prefetch_hits.inc()
+        return styled_response
+
     def _steal_player_state(self, player_state_to_steal: PlayerState) -> PlayerState:
         """
         Clones the provided PlayerState but assigns new code name and color for the AI.
@@ -332,11 +674,15 @@ class AIPlayer:
    
     def initialize_game_state(self, game_state: GameState):
         """
-        Stores and logs the shared GameState so that the AI can access shared context.
+        Stores and logs the shared GameState so that the AI can access shared context, and
+        points the token accountant at the lobby's ledger.
 
         Args:
             game_state (GameState): The global state of the current game.
         """
         self.game_state = game_state
+        if self.player_state is not None and game_state.chat_log_path:
+            self.accountant.bind(self.player_state.code_name, game_state.chat_log_path,
+                                 game_state.round_number, lobby_ais=game_state.players.num_ais)
         self.logger.info(f"Game state initialized with players: {self.stolen_player_code_name}")
         self.logger.info(f"Game state: {self.game_state.to_dict()}")
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""
+Injectable clock for everything that paces a game: round timers, start-time synchronization,
+AI response cadence and the dramatic pauses.
+
+`RealClock` is plain wall and event-loop time; games always run on it unless told otherwise.
+`VirtualClock` runs game time `speed` times faster than real time and can also be moved
+forward by hand (`advance`), so simulations and tests play a 60 s round in well under a
+second while the game code stays unchanged.
+
+The clock is looked up through a context variable, like the console (`utils.console`), so a
+task and everything it spawns can run on a different clock. The process-wide default comes from
+the environment, so server worker processes pick it up too:
+
+    DOPPELBOT_CLOCK_SPEED   game seconds per real second (unset or 1: the real clock)
+    DOPPELBOT_CLOCK_EPOCH   real epoch time at which the virtual clocks of all processes agree
+"""
+import asyncio
+import os
+import time
+from contextvars import ContextVar, Token
+from typing import Callable, Optional, Set, Union
+
+class Clock:
+    """Interface for reading time, sleeping and scheduling callbacks."""
+
+    is_virtual = False
+
+    def time(self) -> float:
+        """Epoch seconds, like `time.time()`."""
+        raise NotImplementedError
+
+    def monotonic(self) -> float:
+        """Seconds from an arbitrary start that never go backwards, like `time.monotonic()`."""
+        raise NotImplementedError
+
+    async def sleep(self, seconds: float) -> None:
+        """Non-blocking sleep, like `asyncio.sleep`."""
+        raise NotImplementedError
+
+    def sleep_sync(self, seconds: float) -> None:
+        """Blocking sleep for worker threads, like `time.sleep`."""
+        raise NotImplementedError
+
+    def real_seconds(self, seconds: float) -> float:
+        """Real time that `seconds` of this clock take (e.g. for the timeout of a blocking wait)."""
+        return seconds
+
+    def call_later(self, delay: float, callback: Callable[[], None],
+                   loop: Optional[asyncio.AbstractEventLoop] = None) -> "Timer":
+        """Runs `callback` on `loop` (default: the running loop) after `delay` seconds."""
+        raise NotImplementedError
+
+class RealClock(Clock):
+    """Real time; the event loop's monotonic clock for timers."""
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+    def sleep_sync(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+    def call_later(self, delay: float, callback: Callable[[], None],
+                   loop: Optional[asyncio.AbstractEventLoop] = None) -> asyncio.TimerHandle:
+        loop = loop or asyncio.get_running_loop()
+        return loop.call_later(max(0.0, delay), callback)
+
+class VirtualTimer:
+    """A callback scheduled on a VirtualClock; re-armed when the clock is advanced."""
+
+    def __init__(self, clock: "VirtualClock", deadline: float, callback: Callable[[], None],
+                 loop: asyncio.AbstractEventLoop):
+        self.clock = clock
+        self.deadline = deadline
+        self.callback = callback
+        self.loop = loop
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._cancelled = False
+
+    def _arm(self) -> None:
+        if self._cancelled:
+            return
+        if self._handle is not None:
+            self._handle.cancel()
+        real_delay = max(0.0, self.deadline - self.clock.monotonic()) / self.clock.speed
+        self._handle = self.loop.call_later(real_delay, self._fire)
+
+    def _fire(self) -> None:
+        self.clock._timers.discard(self)
+        if not self._cancelled:
+            self.callback()
+
+    def cancel(self) -> None:
+        self._cancelled = True
+        self.clock._timers.discard(self)
+        if self._handle is not None:
+            self._handle.cancel()
+
+Timer = Union[asyncio.TimerHandle, VirtualTimer]
+
+class VirtualClock(Clock):
+    """Game time that runs `speed` times faster than real time and can be fast-forwarded."""
+
+    is_virtual = True
+
+    def __init__(self, speed: float = 100.0, epoch: Optional[float] = None):
+        """
+        Args:
+            speed (float): Game seconds per real second.
+            epoch (Optional[float]): Real epoch time at which game time equals real time.
+                Processes given the same epoch and speed read the same `time()`.
+        """
+        if speed <= 0:
+            raise ValueError("Clock speed must be positive")
+        self.speed = speed
+        self.epoch = time.time() if epoch is None else epoch
+        self._mono_start = time.monotonic()
+        self._skipped = 0.0
+        self._timers: Set[VirtualTimer] = set()
+
+    def time(self) -> float:
+        return self.epoch + (time.time() - self.epoch) * self.speed + self._skipped
+
+    def monotonic(self) -> float:
+        return (time.monotonic() - self._mono_start) * self.speed + self._skipped
+
+    async def sleep(self, seconds: float) -> None:
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        timer = self.call_later(seconds, lambda: done.done() or done.set_result(None), loop)
+        try:
+            await done
+        finally:
+            timer.cancel()
+
+    def sleep_sync(self, seconds: float) -> None:
+        time.sleep(max(0.0, seconds) / self.speed)
+
+    def real_seconds(self, seconds: float) -> float:
+        return max(0.0, seconds) / self.speed
+
+    def call_later(self, delay: float, callback: Callable[[], None],
+                   loop: Optional[asyncio.AbstractEventLoop] = None) -> VirtualTimer:
+        timer = VirtualTimer(self, self.monotonic() + max(0.0, delay), callback,
+                             loop or asyncio.get_running_loop())
+        self._timers.add(timer)
+        timer._arm()
+        return timer
+
+    def advance(self, seconds: float) -> None:
+        """
+        Jumps game time forward; timers and sleeps that fall due run right away. Call it from
+        the event loop thread.
+        """
+        self._skipped += seconds
+        for timer in list(self._timers):
+            timer._arm()
+
+def clock_from_env() -> Clock:
+    """The clock configured by DOPPELBOT_CLOCK_SPEED / DOPPELBOT_CLOCK_EPOCH."""
+    speed = float(os.getenv("DOPPELBOT_CLOCK_SPEED") or 1)
+    if speed == 1:
+        return RealClock()
+    epoch = os.getenv("DOPPELBOT_CLOCK_EPOCH")
+    return VirtualClock(speed, float(epoch) if epoch else None)
+
+_current_clock: ContextVar[Clock] = ContextVar("current_clock", default=clock_from_env())
+
+def get_clock() -> Clock:
+    """Returns the clock for the current task."""
+    return _current_clock.get()
+
+def set_clock(clock: Clock) -> Token:
+    """Sets the clock for the current task (and tasks it creates). Returns a reset token."""
+    return _current_clock.set(clock)
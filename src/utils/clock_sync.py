@@ -0,0 +1,99 @@
+"""
+Round start synchronization across terminals that share a lobby directory.
+
+Start times are stored as high-resolution epoch seconds on the lobby's *shared* clock: the clock
+of whichever machine stamps file modification times in the lobby directory (the file server for
+a network share, the local kernel otherwise). Each terminal estimates the offset between its own
+wall clock and that shared clock by writing a probe file and reading back its mtime. This is
+NTP-style: the probe with the shortest round trip wins. Round deadlines are then converted to
+a delay and scheduled on the game clock (`utils.clock`; the event loop's monotonic clock in real
+play), so wall-clock adjustments on a terminal cannot stretch or shorten a round. On a virtual
+clock every player lives in one set of processes that share the clock, so no offset is probed.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Callable, Union
+
+from utils.clock import Timer, get_clock
+
+PROBE_NAME = ".clock_probe"
+
+def estimate_clock_offset(directory: str, samples: int = 5) -> float:
+    """
+    Estimates `shared_clock - local_clock` in seconds using file mtimes in `directory`.
+
+    Args:
+        directory (str): The shared lobby directory.
+        samples (int): Number of probe writes; the one with the shortest round trip is used.
+
+    Returns:
+        float: Offset to add to the game clock's `time()` to get the shared clock (0.0 if probing
+        fails or the game clock is virtual).
+    """
+    if get_clock().is_virtual:
+        return 0.0
+    os.makedirs(directory, exist_ok=True)
+    # One probe file per process so terminals don't race on it
+    probe_path = os.path.join(directory, f"{PROBE_NAME}.{os.getpid()}")
+    best_rtt, best_offset = None, 0.0
+    try:
+        for _ in range(samples):
+            t0 = time.time()
+            with open(probe_path, "w") as f:
+                f.write("x")
+            mtime = os.stat(probe_path).st_mtime_ns / 1e9
+            t1 = time.time()
+            rtt = t1 - t0
+            if best_rtt is None or rtt < best_rtt:
+                best_rtt, best_offset = rtt, mtime - (t0 + t1) / 2
+    except OSError:
+        return 0.0
+    finally:
+        try:
+            os.remove(probe_path)
+        except OSError:
+            pass
+    return best_offset
+
+def shared_now(offset: float) -> float:
+    """Returns the current time on the shared clock, given this terminal's offset."""
+    return get_clock().time() + offset
+
+def parse_start_time(value: Union[float, int, str, datetime]) -> float:
+    """
+    Normalizes a stored round start time to epoch seconds.
+
+    Accepts the current float format as well as the legacy `%Y-%m-%d %H:%M:%S` strings and
+    datetimes, which are interpreted in local time.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").timestamp()
+
+def seconds_until(shared_deadline: float, offset: float) -> float:
+    """Seconds from now until `shared_deadline` (may be negative if it has passed)."""
+    return shared_deadline - shared_now(offset)
+
+def schedule_at_shared_time(
+        shared_deadline: float, offset: float, callback: Callable[[], None],
+        loop: asyncio.AbstractEventLoop = None) -> Timer:
+    """
+    Schedules `callback` to run when the shared clock reaches `shared_deadline`.
+
+    The deadline is converted once to a delay on the game clock's timers (the loop's monotonic
+    clock in real play), so later wall-clock jumps on this terminal do not move it.
+
+    Args:
+        shared_deadline (float): Target time in shared-clock epoch seconds.
+        offset (float): This terminal's offset from `estimate_clock_offset`.
+        callback (Callable[[], None]): Called on the event loop at the deadline.
+        loop (asyncio.AbstractEventLoop): Defaults to the running loop.
+
+    Returns:
+        Timer: Handle that can be cancelled.
+    """
+    return get_clock().call_later(seconds_until(shared_deadline, offset), callback, loop)
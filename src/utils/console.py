@@ -0,0 +1,84 @@
+"""
+Non-blocking terminal input for the game screens.
+
+Every screen runs inside `asyncio.run(main())`, so a plain `input()` would freeze the event loop
+and every background task with it. Screens call `await ainput(...)` instead. It reads through
+prompt_toolkit's `prompt_async`, which keeps the loop running while the player types.
+
+Output goes through the same console (`cprint`, `clear`), so a screen can be driven by a remote
+client session instead of the local terminal. Screens also report what happens in the game as
+structured events (`emit_event`: chat lines, round starts, votes) next to the text. The terminal
+ignores them; front ends that render the game themselves (the WebSocket gateway) use them
+instead of parsing the text.
+
+The console is looked up through a context variable so a different front end can be swapped in
+for a task and everything it spawns.
+"""
+import os
+from contextvars import ContextVar, Token
+
+class Console:
+    """Interface for where a screen's input comes from and its output goes to."""
+
+    async def input(self, prompt: str = "") -> str:
+        """Shows `prompt` (may contain colorama/ANSI codes) and returns the line typed."""
+        raise NotImplementedError
+
+    def print(self, *values, sep: str = " ", end: str = "\n", flush: bool = False) -> None:
+        """Writes output, with the same arguments as the built-in `print`."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Clears the screen."""
+        raise NotImplementedError
+
+    def event(self, event: dict) -> None:
+        """Reports a structured game event (see `emit_event`); ignored unless a front end wants them."""
+
+class TerminalConsole(Console):
+    """Reads from the local terminal with prompt_toolkit."""
+
+    def __init__(self):
+        self._session = None
+
+    async def input(self, prompt: str = "") -> str:
+        # prompt_toolkit is imported and the PromptSession built lazily: the session needs a
+        # terminal, and the import is not needed to draw the first screen
+        from prompt_toolkit.formatted_text import ANSI
+        if self._session is None:
+            from prompt_toolkit import PromptSession
+            self._session = PromptSession()
+        return await self._session.prompt_async(ANSI(prompt))
+
+    def print(self, *values, sep: str = " ", end: str = "\n", flush: bool = False) -> None:
+        print(*values, sep=sep, end=end, flush=flush)
+
+    def clear(self) -> None:
+        os.system('cls' if os.name == 'nt' else 'clear')
+
+_current_console: ContextVar[Console] = ContextVar("current_console", default=TerminalConsole())
+
+def get_console() -> Console:
+    """Returns the console for the current task."""
+    return _current_console.get()
+
+def set_console(console: Console) -> Token:
+    """Sets the console for the current task (and tasks it creates). Returns a reset token."""
+    return _current_console.set(console)
+
+async def ainput(prompt: str = "") -> str:
+    """Async drop-in for `input()` using the current console."""
+    return await get_console().input(prompt)
+
+def cprint(*values, sep: str = " ", end: str = "\n", flush: bool = False) -> None:
+    """Drop-in for `print()` that writes to the current console."""
+    get_console().print(*values, sep=sep, end=end, flush=flush)
+
+def emit_event(kind: str, **fields) -> None:
+    """
+    Reports a game event to the current console, e.g. `emit_event("chat", sender="LION", text="hi")`.
+
+    Events are sent in order with the printed text. The kinds are "round_start", "chat",
+    "vote_prompt" and "vote_result"; their fields are listed in `server.gateway`.
+    """
+    get_console().event({"type": kind, **fields})
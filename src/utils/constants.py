@@ -1,8 +1,10 @@
+import os
+
 from colorama import Fore, init
 
 from utils.states import GameState, PlayerState
 
-ROUND_DURATION = 60  # seconds
+ROUND_DURATION = int(os.getenv("DOPPELBOT_ROUND_DURATION", "60"))  # seconds (env override for simulations)
 
 COLOR_DICT = {
     "RED": Fore.RED,
@@ -18,27 +20,34 @@ NAMES_INDEX_PATH="./data/runtime/code_names_index.txt"
 COLORS_PATH="./data/runtime/possible_colors.json"
 COLORS_INDEX_PATH="./data/runtime/colors_index.txt"
 
-BLANK_PS = PlayerState(
-    lobby_id="",
-    first_name="",
-    last_initial="",
-    code_name="",
-    grade="",
-    favorite_food="",
-    favorite_animal="",
-    hobby="",
-    extra_info="",
-    is_human=True,  
-    color_name="",
-    # color_asci=""
-)
-
-BLANK_GS = GameState(
-    round_number=0,
-    players=[],
-    players_voted_off=[],
-    last_vote_outcome="",
-)
+def blank_player_state() -> PlayerState:
+    """Returns a new, empty PlayerState (one per player when several share a process)."""
+    return PlayerState(
+        lobby_id="",
+        first_name="",
+        last_initial="",
+        code_name="",
+        grade="",
+        favorite_food="",
+        favorite_animal="",
+        hobby="",
+        extra_info="",
+        is_human=True,  
+        color_name="",
+        # color_asci=""
+    )
+
+def blank_game_state() -> GameState:
+    """Returns a new, empty GameState (one per player when several share a process)."""
+    return GameState(
+        round_number=0,
+        players=[],
+        players_voted_off=[],
+        last_vote_outcome="",
+    )
+
+BLANK_PS = blank_player_state()
+BLANK_GS = blank_game_state()
 
 ICEBREAKERS = [
     "Welcome to the game! Everyone please introduce yourself using your first name and last initial.",
@@ -54,5 +63,17 @@ ICEBREAKERS = [
     "If you could meet any fictional character, who would it be and why?",
 ]
 
-with open("./resources/prompts/feedback.txt", "r") as f:
-    FEEDBACK = f.read()
\ No newline at end of file
+FEEDBACK_PATH = "./resources/prompts/feedback.txt"
+
+# Constants that are expensive to build are created on first access (PEP 562), so importing
+# this module stays cheap for screens that never use them.
+_LAZY_CONSTANTS = {
+    "FEEDBACK": lambda: open(FEEDBACK_PATH, "r").read(),
+}
+
+def __getattr__(name):
+    if name in _LAZY_CONSTANTS:
+        value = _LAZY_CONSTANTS[name]()
+        globals()[name] = value  # later lookups skip __getattr__
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -1,60 +1,62 @@
-from dataclasses import asdict
 from datetime import datetime
 import json
 import os
 from typing import List, Tuple
-from time import sleep
 from utils.states import GameState, PlayerState
-
-def init_start_time_file(start_time_path: str) -> None:
+from utils.snapshot import decode_players, encode_players
+from utils.json_cache import load_json, stat_key, wait_for_change
+from utils.clock_sync import estimate_clock_offset, parse_start_time, shared_now
+from utils.atomic_io import atomic_write_json, atomic_write_text, create_exclusive, lock_file, update_json
+from utils.console import cprint
+from utils.tracing import span
+
+def init_start_time_file(start_time_path: str) -> bool:
     """
     Creates and initializes the start time file if it does not already exist.
 
     The file is created as an empty JSON object (`{}`) to store future round start times.
+    Creation is atomic, so when several terminals race only one of them creates the file.
 
     Args:
         start_time_path (str): The path to the start time file.
+
+    Returns:
+        bool: True if this call created the file.
     """
 
-    if not os.path.exists(start_time_path):
-        with open(start_time_path, "w") as f:
-            json.dump({}, f)
-        print(f"Initialized start time file at {start_time_path}.")
+    created = create_exclusive(start_time_path, json.dumps({}))
+    if created:
+        cprint(f"Initialized start time file at {start_time_path}.")
+    return created
 
 def load_start_times(start_time_path: str) -> dict:
     """
     Loads and returns the dictionary of start times from the given file.
 
-    If the file is missing or contains invalid JSON, a warning is printed and
-    an empty dictionary is returned instead of crashing.
+    The parsed file is cached and only re-read when it changes on disk. If the file is
+    missing an empty dictionary is returned. Writers replace the file atomically, so a read
+    never sees a partially written file.
 
     Args:
         start_time_path (str): The path to the start time file.
 
     Returns:
-        dict: A dictionary containing start times, or an empty dict if loading fails.
+        dict: A dictionary containing start times (shared, do not modify in place).
     """
-
-    try:
-        with open(start_time_path, "r") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        print(f"Corrupted or missing start time file, reinitializing...")
-        return {}
+    return load_json(start_time_path, default={})
 
 def save_start_times(start_time_path: str, start_times: dict) -> None:
     """
     Saves the provided dictionary of start times to the specified file.
 
-    The file is overwritten with the latest data in pretty-printed JSON format.
+    The file is atomically replaced with the latest data in pretty-printed JSON format.
 
     Args:
         start_time_path (str): The path to the start time file.
         start_times (dict): The start time data to save.
     """
 
-    with open(start_time_path, "w") as f:
-        json.dump(start_times, f, indent=4)
+    atomic_write_json(start_time_path, start_times, indent=4)
 
 def assign_timekeeper(ps: PlayerState) -> None:
     """
@@ -66,53 +68,69 @@ def assign_timekeeper(ps: PlayerState) -> None:
         ps (PlayerState): The player state to update.
     """
     ps.timekeeper = True
-    print(f"{ps.code_name} has been assigned as the timekeeper.")
+    cprint(f"{ps.code_name} has been assigned as the timekeeper.")
+
+def _format_start_time(start_time: float) -> str:
+    return datetime.fromtimestamp(start_time).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
 
-def set_round_start_time(current_round: str, start_times: dict, start_time_path: str) -> str:
+def set_round_start_time(current_round: str, start_time_path: str, clock_offset: float = 0.0) -> float:
     """
-    Records the current timestamp as the start time for the given round and saves it.
+    Records the current time as the start time for the given round and saves it.
+
+    The start time is stored as epoch seconds (sub-second precision) on the lobby's shared
+    clock, see `utils.clock_sync`. The start time file is updated under its lock so rounds
+    written by other terminals are never lost.
 
     Args:
         current_round (str): The round number as a string.
-        start_times (dict): The current dictionary of round start times.
         start_time_path (str): Path to the shared start time file.
+        clock_offset (float): This terminal's offset from the shared clock.
 
     Returns:
-        str: The formatted timestamp string of the current round's start time.
+        float: The shared-clock epoch start time of the current round.
     """
 
-    start_time = datetime.now().replace(tzinfo=None).strftime("%Y-%m-%d %H:%M:%S")
-    start_times[current_round] = start_time
-    save_start_times(start_time_path, start_times)
-    print(f"Set start time for round {current_round}: {start_time}")
+    start_time = shared_now(clock_offset)
+    with span("write start time", "disk", round=current_round):
+        update_json(start_time_path, lambda start_times: start_times.update({current_round: start_time}), indent=4)
+    cprint(f"Set start time for round {current_round}: {_format_start_time(start_time)}")
     return start_time
 
-def wait_for_start_time(current_round: str, start_time_path: str) -> str:
+async def wait_for_start_time(current_round: str, start_time_path: str, poll_interval: float = 0.2) -> float:
     """
     Waits until the start time for the specified round is set by the timekeeper.
 
-    This function blocks until the round's start time is available in the shared file.
+    This coroutine waits (without blocking the event loop) until the round's start time is
+    available in the shared file. Each poll is a single stat of the file, so a short interval
+    is cheap.
 
     Args:
         current_round (str): The round number to wait for.
         start_time_path (str): Path to the start time file.
+        poll_interval (float): Seconds between checks.
 
     Returns:
-        str: The recorded start time for the specified round.
+        float: The recorded shared-clock epoch start time for the specified round.
     """
-    while True:
-        start_times = load_start_times(start_time_path)
-        if current_round in start_times:
-            start_time = start_times[current_round]
-            print(f"Loaded start time for round {current_round}: {start_time}")
-            return start_time
-        print(f"Waiting for round {current_round} start time to be set...")
-        sleep(1)
-
-def synchronize_start_time(gs: GameState, ps: PlayerState) -> None:
+    announced = False
+    with span("wait for start time", "barrier", round=current_round):
+        while True:
+            seen = stat_key(start_time_path)
+            start_times = load_start_times(start_time_path)
+            if current_round in start_times:
+                start_time = parse_start_time(start_times[current_round])
+                cprint(f"Loaded start time for round {current_round}: {_format_start_time(start_time)}")
+                return start_time
+            if not announced:
+                cprint(f"Waiting for round {current_round} start time to be set...")
+                announced = True
+            await wait_for_change(start_time_path, seen, poll_interval=poll_interval)
+
+async def synchronize_start_time(gs: GameState, ps: PlayerState) -> None:
     """
     Ensures all players have a synchronized start time for the current round.
 
+    - This terminal's offset from the lobby's shared clock is (re-)estimated.
     - The first player to create the file is automatically assigned as the timekeeper.
     - The timekeeper sets the round's start time if it doesn't exist.
     - Other players wait until the timekeeper has written the start time.
@@ -121,9 +139,11 @@ def synchronize_start_time(gs: GameState, ps: PlayerState) -> None:
         gs (GameState): The game state containing the round number and file paths.
         ps (PlayerState): The current player, potentially assigned as the timekeeper.
     """
+    with span("estimate clock offset", "disk"):
+        gs.clock_offset = estimate_clock_offset(os.path.dirname(gs.start_time_path))
+
     # Ensure the start time file exists and set timekeeper if needed
-    if not os.path.exists(gs.start_time_path):
-        init_start_time_file(gs.start_time_path)
+    if init_start_time_file(gs.start_time_path):
         assign_timekeeper(ps)
 
     # Read the current round number
@@ -134,28 +154,24 @@ def synchronize_start_time(gs: GameState, ps: PlayerState) -> None:
 
     # If the file was just created, the player who created it is the timekeeper
     if ps.timekeeper and not start_times:
-        print(f"No start times found. Setting initial time for round {current_round}...")
-        start_time_str = set_round_start_time(current_round, start_times, gs.start_time_path)
-        ps.starttime = datetime.strptime(start_time_str, "%Y-%m-%d %H:%M:%S")
+        cprint(f"No start times found. Setting initial time for round {current_round}...")
+        ps.starttime = set_round_start_time(current_round, gs.start_time_path, gs.clock_offset)
         return
 
     # Check if the current round time is already set
     if current_round not in start_times:
         if ps.timekeeper:
             # Set the start time if the player is the timekeeper
-            start_time_str = set_round_start_time(current_round, start_times, gs.start_time_path)
-            ps.starttime = datetime.strptime(start_time_str, "%Y-%m-%d %H:%M:%S")
+            ps.starttime = set_round_start_time(current_round, gs.start_time_path, gs.clock_offset)
         else:
             # Wait for the timekeeper to set the start time
-            start_time_str = wait_for_start_time(current_round, gs.start_time_path)
-            ps.starttime = datetime.strptime(start_time_str, "%Y-%m-%d %H:%M:%S")
+            ps.starttime = await wait_for_start_time(current_round, gs.start_time_path)
     else:
         # If the round time is already set, just load it
-        start_time_str = start_times[current_round]
-        ps.starttime = datetime.strptime(start_time_str, "%Y-%m-%d %H:%M:%S")
-        print(f"Start time for round {current_round} already exists: {start_time_str}")
+        ps.starttime = parse_start_time(start_times[current_round])
+        cprint(f"Start time for round {current_round} already exists: {_format_start_time(ps.starttime)}")
 
-def synchronize_start_time_debug(gs: GameState, ps: PlayerState) -> None:
+async def synchronize_start_time_debug(gs: GameState, ps: PlayerState) -> None:
     """
     Synchronizes the round start time in debug mode.
 
@@ -166,20 +182,16 @@ def synchronize_start_time_debug(gs: GameState, ps: PlayerState) -> None:
         gs (GameState): The shared game state with file paths and round info.
         ps (PlayerState): The current player's state with timekeeper flag.
     """
+    with span("estimate clock offset", "disk"):
+        gs.clock_offset = estimate_clock_offset(os.path.dirname(gs.start_time_path))
     current_round = str(gs.round_number)
     if ps.timekeeper:
         # Timekeeper sets the start time
-        # print(f"[DEBUG] Timekeeper setting start time for round {current_round}")
-        start_times = {}  # we assume this is a fresh start
-        start_time_str = set_round_start_time(current_round, start_times, gs.start_time_path)
-        ps.starttime = datetime.strptime(start_time_str, "%Y-%m-%d %H:%M:%S")
+        ps.starttime = set_round_start_time(current_round, gs.start_time_path, gs.clock_offset)
 
     else:
         # Other players wait for the start time to appear
-        # print(f"[DEBUG] Waiting for timekeeper to set start time for round {current_round}...")
-        start_time_str = wait_for_start_time(current_round, gs.start_time_path)
-        ps.starttime = datetime.strptime(start_time_str, "%Y-%m-%d %H:%M:%S")
-        # print(f"[DEBUG] Start time loaded: {start_time_str}")
+        ps.starttime = await wait_for_start_time(current_round, gs.start_time_path)
 
 
 def init_game_file(path: str):
@@ -218,8 +230,10 @@ def read_new_messages(path: str, last_line: int) -> Tuple[List[str], List[str],
             - last_line: Updated last line index after reading.
     """
 
-    with open(path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
+    with span("read chat log", "disk") as details:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        details["lines"] = len(lines)
     full_chat_list = [line.strip() for line in lines if line.strip()]
     new_messages_list = full_chat_list[last_line:]
     new_message_count = len(new_messages_list)
@@ -315,25 +329,28 @@ class SequentialAssigner:
             Logs an error message if the write fails, but does not raise.
         """
         try:
-            with open(self.index_path, "w", encoding="utf-8") as f:
-                f.write(str(idx))
+            atomic_write_text(self.index_path, str(idx))
         except Exception as e:
-            print(f"Error writing index file: {e}")
+            cprint(f"Error writing index file: {e}")
 
     def assign(self) -> str:
         """
         Assigns and returns the next item from the list, cycling through sequentially.
 
+        The index file is read and advanced under its lock, so two terminals assigning at the
+        same moment never receive the same item.
+
         Returns:
             str: The assigned item. Defaults to the first item if the selection fails.
         """
-        idx = self._read_index()
-        selected_item = self.items[idx]
-        if not selected_item or selected_item not in self.items:
-            print(f"Warning: Invalid or empty item selected: '{selected_item}'")
-            selected_item = self.items[0]  # Default to the first item as a fallback
-        next_idx = (idx + 1) % len(self.items)
-        self._write_index(next_idx)
+        with lock_file(self.index_path):
+            idx = self._read_index()
+            selected_item = self.items[idx]
+            if not selected_item or selected_item not in self.items:
+                cprint(f"Warning: Invalid or empty item selected: '{selected_item}'")
+                selected_item = self.items[0]  # Default to the first item as a fallback
+            next_idx = (idx + 1) % len(self.items)
+            self._write_index(next_idx)
 
         # Get the caller's file name and line number\
         # FOR DEBUGGING UNCOMMENT BELOW
@@ -349,12 +366,19 @@ def save_player_to_lobby_file(ps: PlayerState, debug: bool=False) -> None:
     """
     Saves the player's data to the lobby's `players.json` file.
 
+    The file is written in the compact snapshot format from `utils.snapshot`. The whole
+    read-modify-write runs under the file's lock and the new file is swapped in atomically,
+    so players joining at the same time never overwrite each other.
     Ensures that no duplicate player entries (based on `code_name`) are saved.
-    If the file is corrupt or unreadable, it starts fresh.
 
     Args:
         ps (PlayerState): The player to save to the lobby file.
         debug (string): determines if to save in runtime or debug lobby
+
+    Raises:
+        ValueError: `players.json` exists but cannot be parsed. Every write replaces it
+            atomically, so that is real corruption: the file is left as it is rather than
+            rewritten with only this player.
     """
     if debug:
         lobby_path = f"./data/debug/lobbies/lobby_{ps.lobby_id}"
@@ -363,23 +387,27 @@ def save_player_to_lobby_file(ps: PlayerState, debug: bool=False) -> None:
     os.makedirs(lobby_path, exist_ok=True)
     file_path = os.path.join(lobby_path, "players.json")
 
-    players = []
+    with span("save player", "disk"), lock_file(file_path):
+        players = []
 
-    # Load existing players if file exists
-    if os.path.exists(file_path):
-        with open(file_path, "r") as f:
-            try:
-                players = json.load(f)
-            except json.JSONDecodeError:
-                pass  # start fresh if it's corrupt or empty
+        # Load existing players if file exists
+        if os.path.exists(file_path):
+            with open(file_path, "r") as f:
+                text = f.read()
+            if text.strip():
+                try:
+                    players = decode_players(text)
+                except (json.JSONDecodeError, KeyError, ValueError) as e:
+                    raise ValueError(f"Corrupt lobby roster {file_path}; not overwriting it") from e
 
-    # Avoid duplicates by code_name
-    if not any(p["code_name"] == ps.code_name for p in players):
-        players.append(asdict(ps))
+        # Avoid duplicates by code_name
+        known_code_names = {p.code_name for p in players}
+        if ps.code_name in known_code_names:
+            return
+        players.append(ps)
 
-    # Save updated list
-    with open(file_path, "w") as f:
-        json.dump(players, f, indent=2)
+        # Save updated list
+        atomic_write_text(file_path, encode_players(players))
 
 def load_players_from_lobby(gs:GameState) -> list[PlayerState]:
     """
@@ -391,9 +419,9 @@ def load_players_from_lobby(gs:GameState) -> list[PlayerState]:
     Returns:
         list[PlayerState]: A list of PlayerState instances reconstructed from saved data.
     """
-    if not os.path.exists(gs.player_path):
+    # The JSON is cached until the file changes; the PlayerState objects are always fresh
+    with span("load players", "disk"):
+        payload = load_json(gs.player_path)
+    if payload is None:
         return []
-
-    with open(gs.player_path, "r") as f:
-        data = json.load(f)
-        return [PlayerState(**p) for p in data]
+    return decode_players(payload)
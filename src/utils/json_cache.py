@@ -0,0 +1,171 @@
+"""
+Stat-keyed caching for the small JSON files that every terminal polls (players.json,
+voting.json, starttime.txt).
+
+A file is only re-opened and re-parsed when its (st_mtime_ns, st_size, st_ino) signature
+changes. Otherwise the previously parsed object is returned, so a one-second polling loop costs
+a single `os.stat` call.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils.logging_utils import MasterLogger
+from utils.metrics import CACHE_REQUESTS
+
+StatKey = Tuple[int, int, int]
+
+def stat_key(path: str) -> Optional[StatKey]:
+    """
+    Returns the change signature of a file, or None if it does not exist.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        Optional[StatKey]: (st_mtime_ns, st_size, st_ino) for the file.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+class CachedJSONLoader:
+    """
+    Caches parsed JSON per path and re-parses only when the file's stat signature changes.
+
+    Returned objects are shared between callers and must be treated as read-only. Code that
+    modifies the data before writing it back should read with `cached=False`.
+
+    All lobby files are written with `utils.atomic_io` (write to a temp file, then rename),
+    so readers never see a partial file. If a file still fails to parse, e.g. one edited by
+    hand or written by an older version, the last good value for that path is returned and
+    the file is re-read on the next call. The file is never reinitialized because of a bad read.
+    """
+
+    def __init__(self, torn_read_retries: int = 0, torn_read_delay: float = 0.02, name: str = "lobby_json"):
+        """
+        Args:
+            torn_read_retries (int): How many times to re-read a file that fails to parse when
+                there is no previous good value to fall back on. Atomic writers make this
+                unnecessary, so it defaults to 0.
+            torn_read_delay (float): Seconds to wait between those re-reads.
+            name (str): Labels this cache's hits and misses in `doppelbot_cache_requests_total`.
+        """
+        self._entries: Dict[str, Tuple[StatKey, Any]] = {}
+        self._lock = threading.Lock()
+        self.torn_read_retries = torn_read_retries
+        self.torn_read_delay = torn_read_delay
+        self.hits = 0
+        self.misses = 0
+        self._hit_metric = CACHE_REQUESTS.labels(name, "hit")
+        self._miss_metric = CACHE_REQUESTS.labels(name, "miss")
+
+    def _read(self, path: str, parse: Callable[[str], Any]) -> Tuple[Optional[StatKey], Any]:
+        key = stat_key(path)
+        if key is None:
+            raise FileNotFoundError(path)
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        return key, parse(text)
+
+    def load(self, path: str, default: Any = None, cached: bool = True,
+             parse: Callable[[str], Any] = json.loads) -> Any:
+        """
+        Loads and parses a JSON file, reusing the cached result if the file is unchanged.
+
+        Args:
+            path (str): Path to the JSON file.
+            default (Any): Returned if the file does not exist (or never parsed successfully).
+            cached (bool): If False, always read from disk (use for read-modify-write).
+            parse (Callable[[str], Any]): Parser applied to the file text.
+
+        Returns:
+            Any: The parsed content, the last good content after a torn read, or `default`.
+        """
+        key = stat_key(path)
+        if key is None:
+            return default
+
+        with self._lock:
+            entry = self._entries.get(path)
+        if cached and entry is not None and entry[0] == key:
+            self.hits += 1
+            self._hit_metric.inc()
+            return entry[1]
+        self.misses += 1
+        self._miss_metric.inc()
+
+        attempts = 0
+        while True:
+            try:
+                new_key, value = self._read(path, parse)
+            except FileNotFoundError:
+                return default
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                # Torn write: fall back to the last good value, or give the writer a moment
+                if entry is not None:
+                    self._log_torn_read(path, e, stale=True)
+                    return entry[1]
+                if attempts >= self.torn_read_retries:
+                    self._log_torn_read(path, e, stale=False)
+                    return default
+                attempts += 1
+                time.sleep(self.torn_read_delay)
+                continue
+            with self._lock:
+                self._entries[path] = (new_key, value)
+            return value
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Drops the cached entry for `path`, or every entry if no path is given."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
+
+    @staticmethod
+    def _log_torn_read(path: str, error: Exception, stale: bool) -> None:
+        logger = MasterLogger.get_instance()
+        if logger:
+            fallback = "using last good copy" if stale else "no good copy yet"
+            logger.warning(f"Unreadable JSON in {path} ({error}); {fallback}")
+
+# Shared loader used by file_io.py and voting.py
+json_cache = CachedJSONLoader()
+
+def load_json(path: str, default: Any = None, cached: bool = True) -> Any:
+    """Loads a JSON file through the shared `CachedJSONLoader`."""
+    return json_cache.load(path, default=default, cached=cached)
+
+async def wait_for_change(
+        path: str, since: Optional[StatKey] = None, poll_interval: float = 0.05,
+        timeout: Optional[float] = None) -> Optional[StatKey]:
+    """
+    Waits until a file's stat signature differs from `since`, without blocking the event loop.
+
+    Each check is a single `os.stat`. A file that appears counts as a change when `since` is None.
+
+    Args:
+        path (str): The file to watch.
+        since (Optional[StatKey]): The last signature the caller has seen (None = missing).
+        poll_interval (float): Seconds between stat calls.
+        timeout (Optional[float]): Give up after this many seconds.
+
+    Returns:
+        Optional[StatKey]: The new signature, or `since` unchanged if the timeout expired.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = None if timeout is None else loop.time() + timeout
+    while True:
+        key = stat_key(path)
+        if key != since:
+            return key
+        if deadline is not None and loop.time() >= deadline:
+            return since
+        await asyncio.sleep(poll_interval)
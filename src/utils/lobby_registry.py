@@ -0,0 +1,258 @@
+"""
+Registry of lobbies: id allocation, lobby status and join notifications.
+
+Each lobby base directory (`data/runtime/lobbies`, `data/debug/lobbies`) has a `registry.json`:
+
+    {"next_id": 42, "latest": 41,
+     "active": {"41": {"status": "forming", "size": 3, "joined": ["LION"], "created": ..., "updated": ...}}}
+
+Only lobbies that have not finished are kept in "active", so the file stays as small as the
+number of games in progress no matter how many `lobby_<n>` folders pile up. A finished lobby
+is moved to `finished.jsonl` (one JSON line per lobby, append-only). Every update is a locked
+read-modify-write (`utils.atomic_io.update_json`), so ids handed out by different terminals or
+server processes never collide. Reads go through the stat-keyed `json_cache` and are a dict
+lookup.
+
+The lobby directory is scanned only once, when a registry is first created, to continue
+numbering after lobbies made by older versions.
+"""
+import asyncio
+import json
+import os
+import re
+import time
+from enum import Enum
+from typing import Dict, Optional
+
+from utils.atomic_io import lock_file, update_json
+from utils.json_cache import json_cache, stat_key, wait_for_change
+from utils.logging_utils import MasterLogger
+
+RUNTIME_LOBBIES_DIR = os.path.join("data", "runtime", "lobbies")
+DEBUG_LOBBIES_DIR = os.path.join("data", "debug", "lobbies")
+
+class LobbyStatus(Enum):
+    FORMING = "forming"    # waiting for players
+    PLAYING = "playing"    # chat round in progress
+    VOTING = "voting"
+    FINISHED = "finished"
+
+class LobbyRegistry:
+    """The registry of one lobby base directory."""
+
+    def __init__(self, base_dir: str, first_id: int = 1):
+        """
+        Args:
+            base_dir (str): Directory holding the `lobby_<n>` folders.
+            first_id (int): Id of the first lobby in an empty directory.
+        """
+        self.base_dir = base_dir
+        self.first_id = first_id
+        self.path = os.path.join(base_dir, "registry.json")
+        self.finished_path = os.path.join(base_dir, "finished.jsonl")
+
+    def lobby_dir(self, lobby_id: int) -> str:
+        return os.path.join(self.base_dir, f"lobby_{lobby_id}")
+
+    # --- Writes ---
+
+    def _update(self, mutate) -> dict:
+        def apply(data: dict) -> dict:
+            if not data:
+                data = {"next_id": self._scan_next_id(), "latest": None, "active": {}}
+            mutate(data)
+            return data
+        return update_json(self.path, apply, separators=(",", ":"))
+
+    def _scan_next_id(self) -> int:
+        """One past the highest existing `lobby_<n>` folder (only used to seed a new registry)."""
+        if not os.path.isdir(self.base_dir):
+            return self.first_id
+        ids = [int(m.group(1)) for d in os.listdir(self.base_dir) if (m := re.fullmatch(r"lobby_(\d+)", d))]
+        return max(ids, default=self.first_id - 1) + 1
+
+    @staticmethod
+    def _new_record(size: Optional[int]) -> dict:
+        now = time.time()
+        return {"status": LobbyStatus.FORMING.value, "size": size, "joined": [], "created": now, "updated": now}
+
+    def allocate(self, size: Optional[int] = None, minimum: Optional[int] = None) -> int:
+        """
+        Reserves a fresh lobby id, registers it as forming and creates its directory.
+
+        Args:
+            size (Optional[int]): Number of human players the lobby waits for.
+            minimum (Optional[int]): Lowest acceptable id (e.g. a server's configured start).
+
+        Returns:
+            int: The new lobby id; never handed out before by this registry.
+        """
+        allocated = {}
+
+        def mutate(data: dict) -> None:
+            lobby_id = max(data["next_id"], minimum or 0)
+            data["next_id"] = lobby_id + 1
+            data["latest"] = lobby_id
+            data["active"][str(lobby_id)] = self._new_record(size)
+            allocated["id"] = lobby_id
+
+        self._update(mutate)
+        os.makedirs(self.lobby_dir(allocated["id"]), exist_ok=True)
+        return allocated["id"]
+
+    def register(self, lobby_id: int, size: Optional[int] = None) -> None:
+        """
+        Registers a lobby whose id was chosen elsewhere (typed in by a player), if it is new.
+
+        Later allocations skip the id, so a server never opens a lobby players picked by hand.
+        """
+        def mutate(data: dict) -> None:
+            data["next_id"] = max(data["next_id"], lobby_id + 1)
+            if str(lobby_id) not in data["active"]:
+                data["active"][str(lobby_id)] = self._new_record(size)
+                data["latest"] = lobby_id
+            elif size is not None and data["active"][str(lobby_id)]["size"] is None:
+                data["active"][str(lobby_id)]["size"] = size
+
+        self._update(mutate)
+
+    def note_join(self, lobby_id: int, code_name: str) -> None:
+        """Records that a player joined (watchers of `wait_for_joins` wake up)."""
+        def mutate(data: dict) -> None:
+            record = data["active"].setdefault(str(lobby_id), self._new_record(None))
+            if code_name not in record["joined"]:
+                record["joined"].append(code_name)
+                record["updated"] = time.time()
+
+        self._update(mutate)
+
+    def set_status(self, lobby_id: int, status: LobbyStatus) -> None:
+        """
+        Moves a lobby to `status`. Every player of a lobby reports the same transitions, so
+        repeated calls are cheap no-ops. A finished lobby leaves the registry for `finished.jsonl`.
+        """
+        record = self.get(lobby_id)
+        if status is LobbyStatus.FINISHED:
+            if record is None:
+                return
+        elif record is not None and record["status"] == status.value:
+            return
+        finished = {}
+
+        def mutate(data: dict) -> None:
+            key = str(lobby_id)
+            if status is LobbyStatus.FINISHED:
+                record = data["active"].pop(key, None)
+                if record is not None:
+                    finished.update(record, lobby_id=lobby_id, status=status.value, updated=time.time())
+                return
+            record = data["active"].setdefault(key, self._new_record(None))
+            record["status"] = status.value
+            record["updated"] = time.time()
+
+        self._update(mutate)
+        if finished:
+            with lock_file(self.finished_path):
+                with open(self.finished_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(finished, separators=(",", ":")) + "\n")
+
+    # --- Reads ---
+
+    def _data(self) -> dict:
+        return json_cache.load(self.path, default=None) or {"next_id": self.first_id, "latest": None, "active": {}}
+
+    def get(self, lobby_id: int) -> Optional[dict]:
+        """The registry record of an active lobby, or None (unknown or finished)."""
+        return self._data()["active"].get(str(lobby_id))
+
+    def status(self, lobby_id: int) -> Optional[LobbyStatus]:
+        """The lobby's status; FINISHED for a lobby that was handed out and is no longer active."""
+        data = self._data()
+        record = data["active"].get(str(lobby_id))
+        if record is not None:
+            return LobbyStatus(record["status"])
+        if lobby_id < data["next_id"] and os.path.isdir(self.lobby_dir(lobby_id)):
+            return LobbyStatus.FINISHED
+        return None
+
+    def latest(self) -> Optional[int]:
+        """The most recently allocated or registered lobby id."""
+        return self._data()["latest"]
+
+    def active(self) -> Dict[int, dict]:
+        """Every lobby that has not finished, by id."""
+        return {int(k): v for k, v in self._data()["active"].items()}
+
+    # --- Notifications ---
+
+    async def wait_for_joins(self, lobby_id: int, count: int, timeout: Optional[float] = None) -> int:
+        """
+        Waits until at least `count` players have joined `lobby_id` (one `os.stat` per poll).
+
+        Returns:
+            int: The number of players joined when the wait ended (may be < count on timeout).
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            seen = stat_key(self.path)  # taken before reading, so no change slips through
+            record = self.get(lobby_id)
+            joined = len(record["joined"]) if record else 0
+            if joined >= count:
+                return joined
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return joined
+            await wait_for_change(self.path, seen, timeout=remaining)
+
+    async def wait_for_latest(self, min_joined: int = 1, timeout: Optional[float] = None) -> Optional[int]:
+        """
+        Waits for the newest forming lobby to have `min_joined` players and returns its id
+        (used by debug players who follow the timekeeper into its new lobby).
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            seen = stat_key(self.path)
+            lobby_id = self.latest()
+            if lobby_id is not None:
+                record = self.get(lobby_id)
+                if (record and record["status"] == LobbyStatus.FORMING.value
+                        and len(record["joined"]) >= min_joined):
+                    return lobby_id
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return None
+            await wait_for_change(self.path, seen, timeout=remaining)
+
+runtime_registry = LobbyRegistry(RUNTIME_LOBBIES_DIR, first_id=1)
+debug_registry = LobbyRegistry(DEBUG_LOBBIES_DIR, first_id=0)
+
+def registry_for_lobby_dir(lobby_dir: str) -> Optional[LobbyRegistry]:
+    """The registry whose base directory holds `lobby_dir`, if it is a known one."""
+    parent = os.path.abspath(os.path.dirname(lobby_dir))
+    for registry in (runtime_registry, debug_registry):
+        if os.path.abspath(registry.base_dir) == parent:
+            return registry
+    return None
+
+def report_status(gs, status: LobbyStatus) -> None:
+    """
+    Records a lobby status change from a screen. Bookkeeping never stops a game: failures are
+    logged and ignored.
+
+    Args:
+        gs (GameState): The player's game state (its file paths identify the lobby).
+        status (LobbyStatus): The lobby's new status.
+    """
+    lobby_dir = os.path.dirname(gs.chat_log_path or "")
+    match = re.fullmatch(r"lobby_(\d+)", os.path.basename(lobby_dir))
+    registry = registry_for_lobby_dir(lobby_dir)
+    if match is None or registry is None:
+        return
+    try:
+        registry.set_status(int(match.group(1)), status)
+    except (OSError, ValueError, KeyError) as e:
+        logger = MasterLogger.get_instance()
+        if logger:
+            logger.warning(f"Could not update lobby status in {registry.path}: {e!r}")
@@ -2,6 +2,10 @@ import os
 import threading
 from datetime import datetime
 
+from utils.metrics import LOG_BYTES
+
+_master_log_bytes = LOG_BYTES.labels("master")
+
 class StandAloneLogger:
     """
     A standalone logger that can be instantiated multiple times for independent logging.
@@ -104,6 +108,7 @@ class MasterLogger:
             with open(self.log_path, "a", encoding="utf-8") as f:
                 f.write(log_entry)
                 f.flush()
+            _master_log_bytes.inc(len(log_entry.encode("utf-8")))
         except IOError as e:
             print(f"Logging Error: {e}")
 
@@ -0,0 +1,292 @@
+"""
+Process-wide counters, gauges and histograms in the Prometheus text exposition format.
+
+The game's metrics are defined at the bottom of this module and updated where things happen
+(game.py, voting.py, ai_v5.py, prompter.py, the lobby server). Updating one is a dict lookup
+(skipped when the labeled child is kept, as the hot paths do) and an add under a lock, so the
+metrics are always on. They are published with `main.py`/`serve.py --metrics-port` (an HTTP
+endpoint for Prometheus to scrape) or `--metrics-file` (the same text, rewritten every few
+seconds, e.g. for node_exporter's textfile collector).
+
+Metrics are per process. Server worker processes each write their own file (see
+`METRICS_FILE_ENV`); they do not serve a port.
+"""
+import asyncio
+import bisect
+import math
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.atomic_io import atomic_write_text
+
+# Set by serve.py so that worker processes dump their metrics next to the supervisor's
+METRICS_FILE_ENV = "DOPPELBOT_METRICS_FILE"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds: from a cached file read to a slow LLM completion or a long vote
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+class _Value:
+    """One labeled counter or gauge."""
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+class _Buckets:
+    """One labeled histogram."""
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # the last one is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+class Metric:
+    """A metric family: one child per combination of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        return _Value()
+
+    def labels(self, *values: str):
+        """
+        Returns the child for these label values (in `labelnames` order), creating it if needed.
+
+        Hot paths can keep the child and update it directly.
+        """
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            children = list(self._children.items())
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+                for values, child in children]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self._samples())
+
+class Counter(Metric):
+    """A value that only goes up (`rate()` turns it into a per-second figure)."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increments the unlabeled counter."""
+        self.labels().inc(amount)
+
+class Gauge(Metric):
+    """A value that goes up and down."""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+class Histogram(Metric):
+    """Counts observations (e.g. latencies in seconds) into cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _Buckets(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Records an observation on the unlabeled histogram."""
+        self.labels().observe(value)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            children = list(self._children.items())
+        lines = []
+        for values, child in children:
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), values + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class Registry:
+    """The metrics of one process."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+REGISTRY = Registry()
+
+# --- Publishing ---
+
+def start_http_server(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY):
+    """
+    Serves `registry` on http://host:port/metrics from a daemon thread.
+
+    Returns:
+        ThreadingHTTPServer: The server (call `shutdown()` to stop it).
+    """
+    # Imported here: every process imports this module at startup, few serve metrics
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # scrapes are not worth a line on the console
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+def write_metrics_file(path: str, registry: Registry = REGISTRY) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    atomic_write_text(path, registry.render())
+
+async def dump_periodically(path: str, interval: float = 5.0, registry: Registry = REGISTRY) -> None:
+    """Rewrites `path` with the current metrics every `interval` seconds (and once more when cancelled)."""
+    try:
+        while True:
+            await asyncio.to_thread(write_metrics_file, path, registry)
+            await asyncio.sleep(interval)
+    finally:
+        write_metrics_file(path, registry)
+
+def worker_metrics_path(worker_id: int) -> Optional[str]:
+    """Where a server worker process dumps its metrics, if the supervisor asked for files."""
+    path = os.getenv(METRICS_FILE_ENV)
+    if not path:
+        return None
+    root, ext = os.path.splitext(path)
+    return f"{root}.worker{worker_id}{ext}"
+
+# --- The game's metrics ---
+
+ACTIVE_LOBBIES = REGISTRY.gauge("doppelbot_active_lobbies", "Lobbies running in this process")
+ACTIVE_PLAYERS = REGISTRY.gauge("doppelbot_active_players", "Players whose game is running in this process")
+CHAT_MESSAGES = REGISTRY.counter(
+    "doppelbot_chat_messages_total", "Lines written to chat logs", ("source",))   # human, ai, gm
+LOG_BYTES = REGISTRY.counter(
+    "doppelbot_log_bytes_written_total", "Bytes appended to chat logs and the master log", ("log",))
+LLM_CALLS = REGISTRY.counter(
+    "doppelbot_llm_calls_total", "LLM completions by pipeline stage and outcome", ("stage", "outcome"))
+LLM_TOKENS = REGISTRY.counter(
+    "doppelbot_llm_tokens_total", "Tokens consumed by pipeline stage", ("stage", "kind"))   # prompt, completion
+LLM_LATENCY = REGISTRY.histogram(
+    "doppelbot_llm_latency_seconds", "LLM completion latency by pipeline stage (including queueing)", ("stage",))
+CACHE_REQUESTS = REGISTRY.counter(
+    "doppelbot_cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))   # hit, miss
+VOTE_WAIT = REGISTRY.histogram(
+    "doppelbot_vote_wait_seconds", "Time from casting a vote until every player has voted")
+BUDGET_DEGRADATIONS = REGISTRY.counter(
+    "doppelbot_budget_degradations_total", "AI dialogues degraded to stay in the token budget", ("level",))
+LLM_MODEL_CALLS = REGISTRY.counter(
+    "doppelbot_llm_model_calls_total", "Routed LLM completions by stage, model and outcome", ("stage", "model", "outcome"))
+LLM_ROUTE_STATE = REGISTRY.gauge(
+    "doppelbot_llm_route_state", "Circuit breaker of a stage's model: 0 closed, 1 open, 2 probing", ("stage", "model"))
+LLM_ROUTE_P95 = REGISTRY.gauge(
+    "doppelbot_llm_route_p95_seconds", "p95 latency of a stage's model over its breaker window", ("stage", "model"))
+LLM_BREAKER_TRIPS = REGISTRY.counter(
+    "doppelbot_llm_breaker_trips_total", "Times a stage's model was taken out of rotation", ("stage", "model"))
+LLM_HEDGES = REGISTRY.counter(
+    "doppelbot_llm_hedges_total", "Slow completions that were hedged, by stage and outcome", ("stage", "outcome"))   # won, lost, no_budget
+LLM_HEDGE_EXTRA_TOKENS = REGISTRY.counter(
+    "doppelbot_llm_hedge_extra_tokens_total", "Tokens of abandoned duplicate requests", ("stage",))
+LLM_HEDGE_EXTRA_COST = REGISTRY.counter(
+    "doppelbot_llm_hedge_extra_cost_usd_total", "List-price cost of abandoned duplicate requests", ("stage",))
+ACTIVE_LOBBIES.set(0)
+ACTIVE_PLAYERS.set(0)
@@ -0,0 +1,237 @@
+"""
+Built-in profiling for a sluggish lobby (`main.py --profile-screens --trace-malloc 30 --loop-lag-ms 100 --trace`).
+
+- Per-screen cProfile: each screen is profiled from start to finish (including every background
+  task that ran on the loop meanwhile). Results go to `<n>_<screen>_r<round>.prof`, which can be
+  loaded with `pstats` or snakeviz, plus a `.txt` with the top functions by cumulative time.
+- tracemalloc: every `interval` seconds a snapshot is compared with the previous one, and the
+  top allocation growth by line is appended to `tracemalloc.log`.
+- Loop lag: a heartbeat task measures how late the event loop wakes it up. A watchdog thread
+  notices when the loop has been blocked for longer than the threshold. It then captures the
+  loop thread's stack while the block is still happening, so a blocking `input()`, `time.sleep`
+  or synchronous file write shows up with its call site in `loop_lag.log`.
+- Tracing: spans for screens, LLM stages, disk I/O and barriers (utils.tracing), saved to
+  `trace.json` after every screen; `src/merge_traces.py` puts a lobby's terminals on one timeline.
+
+Output goes to the lobby folder, `<lobby_dir>/logs/<code_name>/`, so it is kept (and
+archived) with the lobby. Until the player has joined a lobby it goes to `./logs/profile/<pid>/`.
+"""
+import asyncio
+import cProfile
+import io
+import itertools
+import linecache
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import traceback
+from datetime import datetime
+from typing import Awaitable, List, Optional, Tuple, TypeVar
+
+from utils.states import GameState, PlayerState, ScreenEnum
+from utils.tracing import Tracer, set_tracer
+
+T = TypeVar("T")
+
+FALLBACK_DIR = os.path.join(".", "logs", "profile")
+
+# Allocations made by the profiling tools themselves (snapshots, formatted stacks)
+IGNORED_ALLOCATIONS = {
+    tracemalloc.__file__,
+    linecache.__file__,
+    "<frozen importlib._bootstrap>",
+    "<frozen importlib._bootstrap_external>",
+}
+
+def _stamp() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+class Diagnostics:
+    """The profiling tools enabled for one player, and where their output goes."""
+
+    def __init__(self, profile_screens: bool = False, malloc_interval: Optional[float] = None,
+                 lag_threshold: Optional[float] = None, trace: bool = False, malloc_top: int = 15):
+        """
+        Args:
+            profile_screens (bool): Dump a cProfile per screen.
+            malloc_interval (Optional[float]): Seconds between tracemalloc snapshots (None: off).
+            lag_threshold (Optional[float]): Report event loop blocks longer than this many
+                seconds (None: off).
+            trace (bool): Record tracing spans to `trace.json`.
+            malloc_top (int): Lines of allocation growth to log per snapshot.
+        """
+        self.profile_screens = profile_screens
+        self.malloc_interval = malloc_interval
+        self.lag_threshold = lag_threshold
+        self.tracer = Tracer() if trace else None
+        self.malloc_top = malloc_top
+        self.out_dir = os.path.join(FALLBACK_DIR, str(os.getpid()))
+        self._screens = 0
+        self._tasks: List[asyncio.Task] = []
+        self.lag_monitor: Optional[LoopLagMonitor] = None
+
+    @property
+    def enabled(self) -> bool:
+        return (self.profile_screens or self.malloc_interval is not None
+                or self.lag_threshold is not None or self.tracer is not None)
+
+    def bind(self, gs: GameState, ps: PlayerState) -> None:
+        """Sends output to the player's lobby folder once the player has one."""
+        if gs.chat_log_path and ps.code_name:
+            self.out_dir = os.path.join(os.path.dirname(gs.chat_log_path), "logs", ps.code_name)
+        if self.tracer is not None:
+            self.tracer.name = ps.code_name or self.tracer.name
+            self.tracer.clock_offset = gs.clock_offset
+
+    def write(self, name: str, text: str, mode: str = "a") -> None:
+        os.makedirs(self.out_dir, exist_ok=True)
+        with open(os.path.join(self.out_dir, name), mode, encoding="utf-8") as f:
+            f.write(text)
+
+    # --- Lifecycle ---
+
+    def start(self) -> None:
+        """Starts the periodic tools on the running loop."""
+        if self.tracer is not None:
+            set_tracer(self.tracer)
+        if self.malloc_interval is not None:
+            self._tasks.append(asyncio.create_task(self._track_allocations(), name="diagnostics-tracemalloc"))
+        if self.lag_threshold is not None:
+            self.lag_monitor = LoopLagMonitor(self, self.lag_threshold)
+            self._tasks.append(asyncio.create_task(self.lag_monitor.run(), name="diagnostics-loop-lag"))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._dump_trace()
+
+    # --- cProfile ---
+
+    async def run_screen(self, ss: ScreenEnum, gs: GameState, screen: Awaitable[T]) -> T:
+        """Awaits a screen handler's coroutine, profiling and tracing it if enabled."""
+        self._screens += 1
+        try:
+            if self.tracer is not None:
+                with self.tracer.span(ss.name, "screen", round=gs.round_number):
+                    return await self._profile_screen(ss, gs, screen)
+            return await self._profile_screen(ss, gs, screen)
+        finally:
+            self._dump_trace()
+
+    async def _profile_screen(self, ss: ScreenEnum, gs: GameState, screen: Awaitable[T]) -> T:
+        if not self.profile_screens:
+            return await screen
+        name = f"{self._screens:02d}_{ss.name.lower()}_r{gs.round_number}"
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return await screen
+        finally:
+            profiler.disable()
+            self._dump_profile(profiler, name)
+
+    def _dump_trace(self) -> None:
+        # Saved after every screen, so a terminal that is killed mid-game still leaves a trace
+        if self.tracer is not None:
+            self.tracer.dump(os.path.join(self.out_dir, "trace.json"))
+
+    def _dump_profile(self, profiler: cProfile.Profile, name: str) -> None:
+        os.makedirs(self.out_dir, exist_ok=True)
+        profiler.dump_stats(os.path.join(self.out_dir, f"{name}.prof"))
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(40)
+        self.write(f"{name}.txt", report.getvalue(), mode="w")
+
+    # --- tracemalloc ---
+
+    async def _track_allocations(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(5)
+        # Snapshots are taken and compared in a worker thread: on a big heap both take seconds,
+        # which would otherwise block the loop (and show up as loop lag)
+        previous = await asyncio.to_thread(tracemalloc.take_snapshot)
+        while True:
+            await asyncio.sleep(self.malloc_interval)
+            previous, report = await asyncio.to_thread(self._allocation_growth, previous)
+            self.write("tracemalloc.log", report)
+
+    def _allocation_growth(self, previous: tracemalloc.Snapshot) -> Tuple[tracemalloc.Snapshot, str]:
+        """Takes a snapshot and describes the top growth since `previous`, by line."""
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"[{_stamp()}] traced {current / 1024:.1f} KiB (peak {peak / 1024:.1f} KiB); top growth:"]
+        # Snapshot.filter_traces is far too slow on big heaps, so the profiling tools' own
+        # allocations are dropped from the diff instead
+        growth = (stat for stat in snapshot.compare_to(previous, "lineno")
+                  if stat.traceback[0].filename not in IGNORED_ALLOCATIONS)
+        for stat in itertools.islice(growth, self.malloc_top):
+            lines.append(f"  {stat}")
+        return snapshot, "\n".join(lines) + "\n\n"
+
+class LoopLagMonitor:
+    """Measures event loop lag and records where the loop thread was stuck."""
+
+    def __init__(self, diagnostics: Diagnostics, threshold: float, interval: Optional[float] = None):
+        """
+        Args:
+            diagnostics (Diagnostics): Where reports are written.
+            threshold (float): Blocks shorter than this many seconds are not reported.
+            interval (Optional[float]): Heartbeat period (default: half the threshold).
+        """
+        self.diagnostics = diagnostics
+        self.threshold = threshold
+        self.interval = interval or threshold / 2
+        self.blocks: List[float] = []
+        self.worst = 0.0
+        self._beat = time.monotonic()
+        self._stack: Optional[str] = None
+        self._loop_thread: Optional[int] = None
+        self._stopped = threading.Event()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        watchdog.start()
+        try:
+            while True:
+                self._beat = time.monotonic()
+                expected = loop.time() + self.interval
+                await asyncio.sleep(self.interval)
+                lag = loop.time() - expected
+                self.worst = max(self.worst, lag)
+                if lag >= self.threshold:
+                    self._report(lag)
+        finally:
+            self._stopped.set()
+            self._write_summary()
+
+    def _watch(self) -> None:
+        """Watchdog thread: grabs the loop thread's stack while the loop is blocked."""
+        while not self._stopped.wait(self.threshold / 2):
+            if self._stack is None and time.monotonic() - self._beat > self.interval + self.threshold:
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is not None:
+                    self._stack = "".join(traceback.format_stack(frame))
+
+    def _report(self, lag: float) -> None:
+        self.blocks.append(lag)
+        stack, self._stack = self._stack, None
+        text = f"[{_stamp()}] event loop blocked for {lag * 1000:.0f} ms\n"
+        text += stack if stack else "  (ended before the watchdog could sample the stack)\n"
+        self.diagnostics.write("loop_lag.log", text + "\n")
+
+    def _write_summary(self) -> None:
+        total = sum(self.blocks)
+        self.diagnostics.write(
+            "loop_lag.log",
+            f"[{_stamp()}] summary: {len(self.blocks)} blocks over {self.threshold * 1000:.0f} ms, "
+            f"{total:.2f} s blocked in total, worst lag {self.worst * 1000:.0f} ms\n",
+        )
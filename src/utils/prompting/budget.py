@@ -0,0 +1,261 @@
+"""
+Token accounting and per-round spending limits for the AI players.
+
+Every completion's actual usage (from the API response) is recorded per stage and round in
+memory. Inside a lobby each AI adds its totals to the lobby's ledger, `<lobby_dir>/token_usage.json`,
+once per round (`TokenAccountant.flush`, when its chat round ends), for the cost report at the
+end of the game:
+
+    {"rounds": {"1": {"OTTER": {"prompt": 41200, "completion": 380, "tokens": 41580,
+                                "cost_usd": 0.0171, "calls": 14}}}}
+
+The ledger is updated under its lock like the other lobby files. Since the AIs only write it
+between rounds, none of them sees the others' spend live: the lobby's round budget is split
+evenly between the AIs still in the game.
+
+Before a dialogue the AI estimates its prompt tokens with a local approximation of the BPE
+tokenizer (`estimate_tokens`). The estimate is corrected by how far off past estimates were.
+`TokenAccountant.plan` compares the projected spend with the AI's and the lobby's round
+budgets and picks a degradation level. Past a budget the AI degrades instead of failing:
+first a shorter transcript, then no stylizer, then a cheaper model, and only when the budget
+is used up does it stay silent until the next round.
+
+Budgets are opt-in: DOPPELBOT_AI_ROUND_TOKENS and DOPPELBOT_LOBBY_ROUND_TOKENS (default 0: unlimited).
+"""
+import os
+import re
+import threading
+from enum import IntEnum
+from typing import Dict, List, Optional, Tuple
+
+from utils.atomic_io import update_json
+from utils.json_cache import load_json
+from utils.metrics import BUDGET_DEGRADATIONS
+
+AI_ROUND_TOKENS = int(os.getenv("DOPPELBOT_AI_ROUND_TOKENS", "0"))
+LOBBY_ROUND_TOKENS = int(os.getenv("DOPPELBOT_LOBBY_ROUND_TOKENS", "0"))
+CHEAP_MODEL = os.getenv("DOPPELBOT_CHEAP_MODEL", "gpt-4.1-nano")
+SHORT_CONTEXT_LINES = 30
+LEDGER_NAME = "token_usage.json"
+
+# USD per million (prompt, completion) tokens
+PRICES_PER_MTOK: Dict[str, Tuple[float, float]] = {
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+class Degradation(IntEnum):
+    NONE = 0
+    SHORT_CONTEXT = 1   # only the last SHORT_CONTEXT_LINES lines of the transcript
+    NO_STYLIZER = 2     # the respond step's message is sent as is
+    CHEAP_MODEL = 3     # CHEAP_MODEL for every stage
+    SILENT = 4          # budget used up: no completions until the next round
+
+# Projected share of a budget at which each level starts
+DEGRADE_AT = (
+    (1.0, Degradation.SILENT),
+    (0.9, Degradation.CHEAP_MODEL),
+    (0.75, Degradation.NO_STYLIZER),
+    (0.6, Degradation.SHORT_CONTEXT),
+)
+
+# Words and numbers (split like the BPE vocabularies do) and single punctuation marks
+_PIECES = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximates the number of tokens the OpenAI tokenizers (cl100k/o200k) produce for `text`.
+
+    Common words up to ~8 letters are one token; longer words are split into ~4-letter pieces.
+    Numbers are split into groups of up to 3 digits, and other symbols are one token each.
+    """
+    return sum(1 if len(piece) <= 8 else (len(piece) + 3) // 4 for piece in _PIECES.findall(text))
+
+def estimate_message_tokens(messages: List[dict]) -> int:
+    """Approximate prompt tokens of a chat request, including the per-message framing."""
+    total = 3
+    for message in messages:
+        content = message["content"]
+        if not isinstance(content, str):  # text + image parts
+            content = " ".join(part.get("text", "") for part in content)
+        total += 4 + estimate_tokens(content)
+    return total
+
+def estimate_fixed_prompt_tokens(prompter) -> int:
+    """Approximate tokens a prompter sends on every call: system prompt, few-shot examples, instructions."""
+    total = 3 + 4 + estimate_tokens(prompter.system_prompt) + estimate_tokens(prompter.format_q_as_string({}))
+    for qa in prompter.examples:
+        total += 8 + estimate_tokens(f"{prompter.main_prompt_header}\n{qa.question}") + estimate_tokens(str(qa.answer))
+    return total
+
+def completion_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """USD cost of one completion (0.0 for models without a known price, e.g. the mock)."""
+    prompt_price, completion_price = PRICES_PER_MTOK.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+
+def lobby_ledger_path(chat_log_path: str) -> str:
+    return os.path.join(os.path.dirname(chat_log_path), LEDGER_NAME)
+
+def _empty_entry() -> Dict[str, float]:
+    return {"prompt": 0, "completion": 0, "tokens": 0, "cost_usd": 0.0, "calls": 0}
+
+class TokenAccountant:
+    """Tracks one AI player's token spend and decides how much to degrade to stay in budget."""
+
+    def __init__(self, ai_round_tokens: int = AI_ROUND_TOKENS, lobby_round_tokens: int = LOBBY_ROUND_TOKENS):
+        """
+        Args:
+            ai_round_tokens (int): This AI's budget per round (0: unlimited).
+            lobby_round_tokens (int): The lobby's budget per round, split between its AIs (0: unlimited).
+        """
+        self.ai_round_tokens = ai_round_tokens
+        self.lobby_round_tokens = lobby_round_tokens
+        self.owner = "AI"
+        self.ledger_path: Optional[str] = None
+        self.round_number = 0
+        self.lobby_ais = 1
+        self.calibration = 1.0  # actual / estimated prompt tokens, smoothed
+        self.usage: Dict[str, Dict[str, float]] = {}  # per stage, over the whole game
+        self._round_tokens: Dict[int, int] = {}
+        # (ledger, owner, round) -> totals; usage from before the first `bind` waits under (None, None, round)
+        self._unflushed: Dict[Tuple[Optional[str], Optional[str], int], Dict[str, float]] = {}
+        self._level = Degradation.NONE
+        self._lock = threading.Lock()
+
+    def bind(self, owner: str, chat_log_path: Optional[str], round_number: int, lobby_ais: int = 1) -> None:
+        """
+        Sets whose spend this is, which lobby ledger it goes to, the current round and how many
+        AIs share the lobby's budget. Usage recorded before the AI knew its lobby (e.g. the first
+        icebreaker prefetch during setup) is moved to this ledger.
+        """
+        with self._lock:
+            self.owner = owner
+            self.ledger_path = lobby_ledger_path(chat_log_path) if chat_log_path else None
+            self.round_number = round_number
+            self.lobby_ais = max(1, lobby_ais)
+            if self.ledger_path is not None:
+                for key in [key for key in self._unflushed if key[0] is None]:
+                    totals = self._unflushed.pop(key)
+                    entry = self._unflushed.setdefault((self.ledger_path, owner, key[2]), _empty_entry())
+                    for field, value in totals.items():
+                        entry[field] += value
+
+    # --- Planning ---
+
+    def spent_this_round(self) -> int:
+        """Tokens this AI has spent this round."""
+        return self._round_tokens.get(self.round_number, 0)
+
+    def round_limit(self) -> int:
+        """This AI's token limit for the round: its own budget or its share of the lobby's (0: none)."""
+        limits = [self.ai_round_tokens] if self.ai_round_tokens > 0 else []
+        if self.lobby_round_tokens > 0:
+            limits.append(self.lobby_round_tokens // self.lobby_ais)
+        return min(limits, default=0)
+
+    def plan(self, estimated_tokens: int) -> Degradation:
+        """
+        Picks the degradation level for a request of about `estimated_tokens` tokens.
+
+        Args:
+            estimated_tokens (int): Local estimate of the tokens the request will use.
+
+        Returns:
+            Degradation: The highest level called for by either budget.
+        """
+        limit = self.round_limit()
+        share = (self.spent_this_round() + estimated_tokens * self.calibration) / limit if limit > 0 else 0.0
+        level = next((level for threshold, level in DEGRADE_AT if share >= threshold), Degradation.NONE)
+        if level > Degradation.NONE:
+            BUDGET_DEGRADATIONS.labels(level.name.lower()).inc()
+        self._level = level
+        return level
+
+    @property
+    def level(self) -> Degradation:
+        """The level picked by the last `plan`."""
+        return self._level
+
+    # --- Recording ---
+
+    def record(self, stage: str, model: str, prompt_tokens: int, completion_tokens: int,
+               estimated_prompt_tokens: Optional[int] = None) -> None:
+        """
+        Records the actual usage of one completion (called from the prompter's worker thread).
+
+        Args:
+            stage (str): Pipeline stage of the completion.
+            model (str): Model that served it.
+            prompt_tokens (int): Prompt tokens reported by the API.
+            completion_tokens (int): Completion tokens reported by the API.
+            estimated_prompt_tokens (Optional[int]): The local estimate for the same prompt,
+                used to correct future estimates.
+        """
+        tokens = prompt_tokens + completion_tokens
+        cost = completion_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            stats = self.usage.setdefault(stage, {"prompt": 0, "completion": 0, "cost_usd": 0.0, "calls": 0})
+            stats["prompt"] += prompt_tokens
+            stats["completion"] += completion_tokens
+            stats["cost_usd"] += cost
+            stats["calls"] += 1
+            self._round_tokens[self.round_number] = self._round_tokens.get(self.round_number, 0) + tokens
+            if estimated_prompt_tokens:
+                self.calibration = 0.8 * self.calibration + 0.2 * (prompt_tokens / estimated_prompt_tokens)
+            if self.ledger_path is None:
+                key = (None, None, self.round_number)
+            else:
+                key = (self.ledger_path, self.owner, self.round_number)
+            entry = self._unflushed.setdefault(key, _empty_entry())
+            entry["prompt"] += prompt_tokens
+            entry["completion"] += completion_tokens
+            entry["tokens"] += tokens
+            entry["cost_usd"] += cost
+            entry["calls"] += 1
+
+    def flush(self) -> None:
+        """
+        Adds the usage recorded since the last flush to the lobby ledger(s), one locked write
+        per ledger. Called when the AI's chat round ends and before the cost report. Usage
+        recorded before the first `bind` stays until the AI knows its ledger.
+        """
+        with self._lock:
+            pending = {key: totals for key, totals in self._unflushed.items() if key[0] is not None}
+            self._unflushed = {key: totals for key, totals in self._unflushed.items() if key[0] is None}
+        by_ledger: Dict[str, List[Tuple[str, int, Dict[str, float]]]] = {}
+        for (ledger_path, owner, round_number), totals in pending.items():
+            by_ledger.setdefault(ledger_path, []).append((owner, round_number, totals))
+
+        for ledger_path, entries in by_ledger.items():
+            def add(ledger: dict) -> None:
+                rounds = ledger.setdefault("rounds", {})
+                for owner, round_number, totals in entries:
+                    entry = rounds.setdefault(str(round_number), {}).setdefault(owner, _empty_entry())
+                    for key in ("prompt", "completion", "tokens", "calls"):
+                        entry[key] += totals[key]
+                    entry["cost_usd"] = round(entry["cost_usd"] + totals["cost_usd"], 6)
+
+            update_json(ledger_path, add, separators=(",", ":"))
+
+def game_cost_report(ledger_path: str) -> List[str]:
+    """
+    Summarizes a lobby's ledger: tokens and cost per round and AI, and the game total.
+
+    Returns:
+        List[str]: Report lines (empty if no completion was recorded).
+    """
+    rounds = load_json(ledger_path, default={}).get("rounds", {})
+    lines = []
+    total_tokens, total_cost = 0, 0.0
+    for round_key in sorted(rounds, key=int):
+        for owner, entry in sorted(rounds[round_key].items()):
+            lines.append(f"Round {round_key} {owner}: {entry['calls']} calls, {entry['prompt']} prompt + "
+                         f"{entry['completion']} completion tokens, ${entry['cost_usd']:.4f}")
+            total_tokens += entry["tokens"]
+            total_cost += entry["cost_usd"]
+    if lines:
+        lines.append(f"Game total: {total_tokens} tokens, ${total_cost:.4f}")
+    return lines
@@ -0,0 +1,168 @@
+"""
+Hedged LLM requests: a slow completion gets a duplicate, and the first answer wins.
+
+API latency has a long tail, and an AI that takes 15 seconds to answer stands out. For a stage
+with hedging enabled, `OpenAIPrompter` sends each request through `Hedger.run`. If the request
+has not returned after the stage's usual latency (the `percentile`-th percentile of its recent
+completions), an identical request is sent and whichever finishes first is used. The
+synchronous OpenAI client cannot abort a request in flight, so the slower one is abandoned:
+its answer is dropped, but its tokens are still paid for and counted as the hedge's extra cost.
+
+Hedges are capped by a process-wide budget: at most `budget_ratio` extra requests per request
+sent by a hedged stage (10% by default). A stage needs `min_samples` completions before its
+percentile is trusted, so the first calls of a process are never hedged.
+
+Configured from the environment, like the rest of the LLM settings:
+    DOPPELBOT_HEDGE_STAGES      stages to hedge, e.g. "respond,decide_to_respond" (default: none)
+    DOPPELBOT_HEDGE_BUDGET      extra requests per request (default 0.1)
+    DOPPELBOT_HEDGE_PERCENTILE  latency percentile that triggers a hedge (default 90)
+
+Published as `doppelbot_llm_hedges_total{stage,outcome}` (won: the duplicate answered first,
+lost: the original did, no_budget: a hedge was due but over budget) and the abandoned requests'
+`doppelbot_llm_hedge_extra_tokens_total` / `doppelbot_llm_hedge_extra_cost_usd_total`.
+"""
+import contextvars
+import math
+import os
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Callable, Dict, Iterable, Optional, TypeVar
+
+from utils.clock import get_clock
+from utils.metrics import LLM_HEDGES
+
+T = TypeVar("T")
+
+class Hedger:
+    """Decides when to hedge a stage's requests and runs the race."""
+
+    def __init__(self, stages: Iterable[str] = (), budget_ratio: float = 0.1, percentile: float = 90.0,
+                 min_samples: int = 20, min_delay: float = 0.25, window: int = 200, max_workers: int = 64):
+        """
+        Args:
+            stages (Iterable[str]): Pipeline stages to hedge.
+            budget_ratio (float): Maximum extra requests per request of a hedged stage.
+            percentile (float): Latency percentile after which a request is hedged.
+            min_samples (int): Completions a stage needs before it is hedged.
+            min_delay (float): Never hedge sooner than this many seconds.
+            window (int): Recent completions the percentile is computed over.
+            max_workers (int): Threads running hedged requests (the original and its duplicate).
+        """
+        self.stages = frozenset(stages)
+        self.budget_ratio = budget_ratio
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.requests = 0
+        self.hedges = 0
+        self._latencies: Dict[str, deque] = {stage: deque(maxlen=window) for stage in self.stages}
+        self._max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Hedger":
+        stages = os.getenv("DOPPELBOT_HEDGE_STAGES", "")
+        return cls(
+            stages=[stage.strip() for stage in stages.split(",") if stage.strip()],
+            budget_ratio=float(os.getenv("DOPPELBOT_HEDGE_BUDGET", "0.1")),
+            percentile=float(os.getenv("DOPPELBOT_HEDGE_PERCENTILE", "90")),
+        )
+
+    def enabled(self, stage: str) -> bool:
+        return stage in self.stages
+
+    def observe(self, stage: str, latency: float) -> None:
+        """Records the latency of a successful completion of `stage`."""
+        latencies = self._latencies.get(stage)
+        if latencies is not None:
+            latencies.append(latency)
+
+    def delay(self, stage: str) -> Optional[float]:
+        """Seconds after which a request of `stage` is hedged (None until enough samples)."""
+        latencies = sorted(self._latencies.get(stage, ()))
+        if len(latencies) < self.min_samples:
+            return None
+        index = max(0, math.ceil(self.percentile / 100 * len(latencies)) - 1)
+        return max(self.min_delay, latencies[index])
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.budget_ratio * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def _submit(self, send: Callable[[], T]) -> Future:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="llm-hedge")
+        # Each request runs in a copy of the caller's context (clock, tracer, console)
+        return self._pool.submit(contextvars.copy_context().run, send)
+
+    def run(self, stage: str, send: Callable[[], T], on_abandoned: Callable[[T], None]) -> T:
+        """
+        Calls `send()`, and once more in parallel if the first call is slow; returns the first result.
+
+        Args:
+            stage (str): Pipeline stage of the request.
+            send (Callable[[], T]): Sends the request and returns the response (thread-safe).
+            on_abandoned (Callable[[T], None]): Called (in a worker thread) with the response of
+                the request that lost the race, once it arrives.
+
+        Returns:
+            T: The first successful response. If both requests fail, the later error is raised.
+        """
+        with self._lock:
+            self.requests += 1
+        delay = self.delay(stage)
+        if delay is None:
+            return send()
+
+        original = self._submit(send)
+        try:
+            return original.result(timeout=get_clock().real_seconds(delay))
+        except FutureTimeout:
+            pass
+        if not self._take_budget():
+            LLM_HEDGES.labels(stage, "no_budget").inc()
+            return original.result()
+
+        duplicate = self._submit(send)
+        done, _ = wait([original, duplicate], return_when=FIRST_COMPLETED)
+        first = original if original in done else duplicate
+        second = duplicate if first is original else original
+        if first.exception() is not None:
+            # The first one failed: the race is the other one's to win (or lose with an error)
+            first = second
+        else:
+            second.add_done_callback(lambda f: self._abandoned(f, on_abandoned))
+            second.cancel()   # only stops it if it has not started yet
+        response = first.result()
+        LLM_HEDGES.labels(stage, "won" if first is duplicate else "lost").inc()
+        return response
+
+    @staticmethod
+    def _abandoned(future: Future, on_abandoned: Callable) -> None:
+        if not future.cancelled() and future.exception() is None:
+            on_abandoned(future.result())
+
+    def stats(self) -> dict:
+        """Requests of hedged stages and hedges sent so far in this process."""
+        with self._lock:
+            return {"requests": self.requests, "hedges": self.hedges,
+                    "hedge_ratio": self.hedges / self.requests if self.requests else 0.0}
+
+_hedger: Optional[Hedger] = None
+_hedger_lock = threading.Lock()
+
+def get_hedger() -> Hedger:
+    """Returns the process-wide hedger, configured from the environment on first use."""
+    global _hedger
+    if _hedger is None:
+        with _hedger_lock:
+            if _hedger is None:
+                _hedger = Hedger.from_env()
+    return _hedger
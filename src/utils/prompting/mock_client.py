@@ -0,0 +1,119 @@
+"""
+Offline stand-in for `openai.Client`, for simulations and load tests.
+
+Implements only what `OpenAIPrompter` uses: `chat.completions.create`, `models.list` and
+`with_options`. Each call sleeps for a configurable latency (in the calling worker thread, like
+a real HTTP request, and on the game clock of `utils.clock`, so it scales with a fast virtual
+clock) and returns a canned answer in the format the AI pipeline expects:
+
+    decide_to_respond → "I will ```RESPOND``` because I think that ***...***" (or STAY SILENT)
+    respond           → "```... <MOCK_MARKER> ...```"
+    stylizer          → the response it was asked to restyle, unchanged
+
+Every generated chat message contains `MOCK_MARKER`, so a harness can tell AI lines apart.
+Token usage is estimated at ~4 characters per token.
+
+Selected with DOPPELBOT_LLM_BACKEND=mock (see `utils.prompting.prompter.shared_client`).
+Tuned with DOPPELBOT_MOCK_LATENCY_MS, DOPPELBOT_MOCK_JITTER_MS and DOPPELBOT_MOCK_RESPOND_RATE.
+DOPPELBOT_MOCK_MODEL_LATENCY_MS (e.g. "gpt-4.1-nano=6000,gpt-4o-mini=400") makes single models
+slower or faster, to exercise model routing. A request's `timeout` (or one set with
+`with_options`) is honored: a completion slower than it raises TimeoutError once the timeout
+has passed. Retries are not simulated.
+"""
+import itertools
+import os
+import random
+import re
+import threading
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from utils.clock import get_clock
+
+MOCK_MARKER = "(mock)"
+
+_STYLIZE_FIELD = re.compile(r"(?:RESPONSE|MESSAGE YOU WILL STYLIZE):\s*(.*?)\nAnswer the question", re.S)
+
+class _Completions:
+    def __init__(self, client: "MockChatClient", timeout: Optional[float] = None):
+        self._client = client
+        self._timeout = timeout
+
+    def create(self, model: str, messages: List[dict], timeout: Optional[float] = None, **kwargs) -> SimpleNamespace:
+        return self._client._complete(model, messages, self._timeout if timeout is None else timeout)
+
+class _Models:
+    def list(self) -> list:
+        return []
+
+class MockChatClient:
+    """Answers chat completions locally after a simulated network + generation delay."""
+
+    def __init__(self, latency_ms: float = 300.0, jitter_ms: float = 100.0, respond_rate: float = 0.5,
+                 seed: Optional[int] = None, model_latency_ms: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            latency_ms (float): Mean time per completion.
+            jitter_ms (float): Uniform +/- spread around the mean.
+            respond_rate (float): Probability that decide_to_respond says RESPOND.
+            seed (Optional[int]): Seed for reproducible decisions and delays.
+            model_latency_ms (Optional[Dict[str, float]]): Mean time per completion of specific
+                models, instead of `latency_ms`.
+        """
+        self.latency_ms = latency_ms
+        self.model_latency_ms = model_latency_ms or {}
+        self.jitter_ms = jitter_ms
+        self.respond_rate = respond_rate
+        self.chat = SimpleNamespace(completions=_Completions(self))
+        self.models = _Models()
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._replies = itertools.count(1)
+
+    @classmethod
+    def from_env(cls) -> "MockChatClient":
+        return cls(
+            latency_ms=float(os.getenv("DOPPELBOT_MOCK_LATENCY_MS", "300")),
+            jitter_ms=float(os.getenv("DOPPELBOT_MOCK_JITTER_MS", "100")),
+            respond_rate=float(os.getenv("DOPPELBOT_MOCK_RESPOND_RATE", "0.5")),
+            model_latency_ms={
+                model.strip(): float(ms)
+                for model, ms in (
+                    item.split("=") for item in os.getenv("DOPPELBOT_MOCK_MODEL_LATENCY_MS", "").split(",") if item
+                )
+            },
+        )
+
+    def with_options(self, timeout: Optional[float] = None, **kwargs):
+        """This client, with `timeout` as the default of its requests (other options are ignored)."""
+        if timeout is None:
+            return self
+        return SimpleNamespace(chat=SimpleNamespace(completions=_Completions(self, timeout)), models=self.models)
+
+    def _complete(self, model: str, messages: List[dict], timeout: Optional[float] = None) -> SimpleNamespace:
+        latency_ms = self.model_latency_ms.get(model, self.latency_ms)
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            respond = self._rng.random() < self.respond_rate
+        if timeout is not None and delay > timeout:
+            get_clock().sleep_sync(timeout)
+            raise TimeoutError(f"Mock completion on {model} timed out after {timeout}s")
+        get_clock().sleep_sync(delay)
+
+        system = messages[0]["content"] if messages else ""
+        user = messages[-1]["content"] if messages else ""
+        if "decide whether or not you should respond" in system:
+            decision = "RESPOND" if respond else "STAY SILENT"
+            content = f"I will ```{decision}``` because I think that ***the conversation calls for it***"
+        elif "style-matching assistant" in system:
+            match = _STYLIZE_FIELD.search(user if isinstance(user, str) else "")
+            content = match.group(1).strip() if match else f"sounds good {MOCK_MARKER}"
+        else:
+            content = f"```sounds good to me {MOCK_MARKER} #{next(self._replies)}```"
+        message = SimpleNamespace(role="assistant", content=content)
+        prompt_chars = sum(len(m["content"]) for m in messages if isinstance(m["content"], str))
+        usage = SimpleNamespace(prompt_tokens=prompt_chars // 4 + 1, completion_tokens=len(content) // 4 + 1)
+        usage.total_tokens = usage.prompt_tokens + usage.completion_tokens
+        return SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, message=message)], usage=usage)
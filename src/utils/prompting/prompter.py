@@ -12,6 +12,7 @@ import json
 from typing import List, Dict, Optional, Tuple, Type, Union
 from abc import ABC, abstractmethod
 from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
 import time
 from pydantic import BaseModel
 from tqdm import tqdm
@@ -23,6 +24,71 @@ import openai
 #     AutoTokenizer, BitsAndBytesConfig, AutoModelForCausalLM)
 
 from utils.logging_utils import MasterLogger
+from utils.json_cache import CachedJSONLoader
+from utils.metrics import LLM_CALLS, LLM_HEDGE_EXTRA_COST, LLM_HEDGE_EXTRA_TOKENS, LLM_LATENCY, LLM_TOKENS
+from utils.prompting.budget import completion_cost, estimate_message_tokens
+from utils.prompting.hedging import get_hedger
+from utils.prompting.routing import StageRoute, get_router
+from utils.clock import get_clock
+
+# Prompt YAML files are parsed once per process (re-parsed only if the file changes), no matter
+# how many prompters are built from them.
+prompt_cache = CachedJSONLoader(name="prompt_yaml")
+
+_shared_clients: Dict[str, openai.Client] = {}
+_shared_clients_lock = threading.Lock()
+
+# "openai" (default) or "mock" (utils.prompting.mock_client, for simulations and load tests).
+# Read from the environment so that server worker processes pick it up too.
+LLM_BACKEND_ENV = "DOPPELBOT_LLM_BACKEND"
+
+def llm_backend() -> str:
+    return os.getenv(LLM_BACKEND_ENV, "openai").lower()
+
+def shared_client(api_key: str) -> openai.Client:
+    """
+    Returns the process-wide OpenAI client for `api_key`.
+
+    Sharing one client means sharing one HTTP connection pool, however many prompters (and
+    lobbies, in server mode) the process hosts. With DOPPELBOT_LLM_BACKEND=mock this is a
+    `MockChatClient` that answers locally instead.
+    """
+    with _shared_clients_lock:
+        if llm_backend() == "mock":
+            client = _shared_clients.get("mock")
+            if client is None:
+                from utils.prompting.mock_client import MockChatClient
+                client = _shared_clients["mock"] = MockChatClient.from_env()
+            return client
+        client = _shared_clients.get(api_key)
+        if client is None:
+            client = _shared_clients[api_key] = openai.Client(api_key=api_key)
+        return client
+
+class CompletionLimiter:
+    """
+    Caps how many completions are in flight at once across the whole process.
+
+    Completions run in worker threads, so this is a thread semaphore. The limit can be
+    changed with `configure` while no completion is running (e.g. at server start).
+    """
+
+    def __init__(self, max_concurrent: int):
+        self.configure(max_concurrent)
+
+    def configure(self, max_concurrent: int) -> None:
+        self.max_concurrent = max_concurrent
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def __enter__(self):
+        self._slots.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._slots.release()
+        return False
+
+completion_limiter = CompletionLimiter(int(os.getenv("DOPPELBOT_MAX_CONCURRENT_LLM", "32")))
 
 class QAs(BaseModel):
     question: Dict[str, str]  # Multiple inputs as a dictionary
@@ -42,6 +108,9 @@ class Prompter(ABC):
         system_prompt (str): The system message for chat-based models.
         main_prompt_header (str): Optional string prepended to each prompt.
         is_structured_output (bool): Whether output should be parsed as structured JSON.
+        stage (str): Pipeline stage this prompter serves (labels its metrics).
+        accountant (Optional[TokenAccountant]): Records each completion's token usage, if set
+            (see utils.prompting.budget).
     """
 
     def __init__(
@@ -51,7 +120,8 @@ class Prompter(ABC):
         prompt_headers: Dict[str, str],
         llm_model: str = "gpt-4o-mini",
         temperature: float = 0.1,
-        show_prompts = False
+        show_prompts = False,
+        stage: str = "other"
     ):
         """
         Initializes the prompter by loading the YAML config, few-shot examples, and model schema.
@@ -61,8 +131,11 @@ class Prompter(ABC):
             prompt_headers (Dict[str, str]): Dictionary of display names for input fields.
             llm_model (str): Name or ID of the language model (default "gpt-4o-mini").
             temperature (float): Temperature for generation sampling.
+            stage (str): Pipeline stage name used to label metrics (e.g. "respond").
         """
         self.llm_model = llm_model
+        self.stage = stage
+        self.accountant = None
         self.prompt_path = prompt_path
         self.prompt_headers = prompt_headers
         self.temperature = temperature
@@ -96,8 +169,10 @@ class Prompter(ABC):
                 - A dict of prompt headers
                 - A bool indicating structured output mode
         """
-        with open(self.prompt_path, encoding="utf-8") as f:
-            raw = yaml.safe_load(f)
+        # Shared, cached parse: treat `raw` as read-only
+        raw = prompt_cache.load(self.prompt_path, parse=yaml.safe_load)
+        if raw is None:
+            raise FileNotFoundError(self.prompt_path)
 
 
         meta = raw.get("__meta__", {})
@@ -206,8 +281,8 @@ class OpenAIPrompter(Prompter):
     Concrete implementation of the Prompter base class using OpenAI's chat completion API.
     """
     def __init__(self, llm_model="gpt-4o-mini", **kwargs):
-        super().__init__(**kwargs)
-        self.client = openai.Client(api_key=self._load_env())
+        super().__init__(llm_model=llm_model, **kwargs)
+        self.client = shared_client(self._load_env())
 
     def _load_env(self) -> str:
         """
@@ -221,10 +296,33 @@ class OpenAIPrompter(Prompter):
         """
         load_dotenv("./resources/.env")
         api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key and llm_backend() == "mock":
+            return "mock"
         if not api_key:
             raise ValueError(f"API Key not found. Set OPENAI_API_KEY=xxxx in ./resources/.env")
         return api_key
     
+    def warm_connection(self, timeout: float = 5.0) -> bool:
+        """
+        Opens (and pools) the HTTPS connection to the API with a cheap request that uses no tokens.
+
+        Later completions reuse the pooled connection and skip the TCP/TLS handshake.
+
+        Args:
+            timeout (float): Seconds to wait before giving up.
+
+        Returns:
+            bool: True if the API answered, False otherwise (errors are logged, not raised).
+        """
+        try:
+            self.client.with_options(max_retries=0, timeout=timeout).models.list()
+            return True
+        except Exception as e:
+            logger = MasterLogger.get_instance()
+            if logger:
+                logger.warning(f"Could not warm OpenAI connection: {e}")
+            return False
+
     def parse_output(self, llm_output) -> Union[str, dict]:
         """
         Parses the LLM output depending on whether structured mode is active.
@@ -306,7 +404,8 @@ class OpenAIPrompter(Prompter):
         return messages
 
     def get_completion(
-            self, input_texts: Dict[str, str], parse=True, verbose=False) -> Union[dict, None]:
+            self, input_texts: Dict[str, str], parse=True, verbose=False,
+            llm_model: Optional[str] = None) -> Union[dict, None]:
         """
         Sends a prompt to the OpenAI chat API and returns the parsed or raw response.
 
@@ -314,13 +413,14 @@ class OpenAIPrompter(Prompter):
             input_texts (Dict[str, str]): Dictionary of input fields for the prompt.
             parse (bool): Whether to parse the response or return raw.
             verbose (bool): Whether to print the response to console.
+            llm_model (Optional[str]): Model to use for this call instead of `self.llm_model`
+                (e.g. a cheaper one when over budget). Bypasses the stage's model route.
 
         Returns:
             Union[dict, None]: The parsed response, or None on failure.
         """
         input_text_str = self._build_messages(input_texts)
         completion_kwargs = {
-            "model": self.llm_model,
             "messages": input_text_str,
             "temperature": self.temperature,
         }
@@ -328,7 +428,37 @@ class OpenAIPrompter(Prompter):
         if self.is_structured_output:
             completion_kwargs["response_format"] = {"type": "json_object"}
 
-        response = self.client.chat.completions.create(**completion_kwargs)
+        # Without an explicit model, the stage's route picks one (see utils.prompting.routing)
+        route = None if llm_model else get_router().route(self.stage)
+        models = route.attempts() if route else [llm_model or self.llm_model]
+        client = self.client
+        if route:
+            # One attempt is one request: the client's own retries would stretch it past the
+            # timeout (and the breaker's latency window) before the fallback model is tried
+            options = {"max_retries": 0}
+            if route.settings.timeout_seconds:
+                options["timeout"] = route.settings.timeout_seconds
+            client = client.with_options(**options)
+        hedger = get_hedger()
+        for attempt, model in enumerate(models, start=1):
+            try:
+                if hedger.enabled(self.stage):
+                    # A slow request gets a duplicate (see utils.prompting.hedging)
+                    response = hedger.run(
+                        self.stage,
+                        lambda model=model: self._create(completion_kwargs, model, route, client),
+                        lambda abandoned, model=model: self._record_abandoned(abandoned, model),
+                    )
+                else:
+                    response = self._create(completion_kwargs, model, route, client)
+                break
+            except Exception as e:
+                if attempt == len(models):
+                    raise
+                logger = MasterLogger.get_instance()
+                if logger:
+                    logger.warning(f"{self.stage} completion on {model} failed ({e}); retrying on {models[attempt]}")
+        self._record_usage(response, model, estimate_message_tokens(input_text_str))
 
 
         final_resp = self.parse_output(response) if parse else response
@@ -341,6 +471,58 @@ class OpenAIPrompter(Prompter):
 
         return [final_resp]
     
+    def _create(self, completion_kwargs: dict, model: str, route: Optional[StageRoute] = None, client=None):
+        """
+        Sends one completion request to `model` and records its latency and outcome.
+
+        Args:
+            completion_kwargs (dict): Request arguments other than the model.
+            model (str): Model to send it to.
+            route (Optional[StageRoute]): The stage's route, told how the model did.
+            client: Client to send it with (defaults to the prompter's own).
+
+        Returns:
+            The API response.
+        """
+        clock = get_clock()
+        queued = clock.monotonic()
+        ok = False
+        with completion_limiter:
+            started = clock.monotonic()
+            try:
+                response = (client or self.client).chat.completions.create(model=model, **completion_kwargs)
+                ok = True
+            finally:
+                finished = clock.monotonic()
+                LLM_LATENCY.labels(self.stage).observe(finished - queued)
+                LLM_CALLS.labels(self.stage, "ok" if ok else "error").inc()
+                if route is not None:
+                    # The model's own latency: waiting for a free slot is not its fault
+                    route.report(model, finished - started, ok)
+        if ok:
+            get_hedger().observe(self.stage, finished - started)
+        return response
+
+    def _record_usage(self, response, model: str, estimated_prompt_tokens: Optional[int] = None) -> None:
+        """Counts a response's tokens in the metrics and the token accountant."""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        LLM_TOKENS.labels(self.stage, "prompt").inc(usage.prompt_tokens)
+        LLM_TOKENS.labels(self.stage, "completion").inc(usage.completion_tokens)
+        if self.accountant is not None:
+            self.accountant.record(self.stage, model, usage.prompt_tokens, usage.completion_tokens,
+                                   estimated_prompt_tokens)
+
+    def _record_abandoned(self, response, model: str) -> None:
+        """Accounts for the request that lost a hedge race: its tokens were spent all the same."""
+        self._record_usage(response, model)
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            LLM_HEDGE_EXTRA_TOKENS.labels(self.stage).inc(usage.prompt_tokens + usage.completion_tokens)
+            LLM_HEDGE_EXTRA_COST.labels(self.stage).inc(
+                completion_cost(model, usage.prompt_tokens, usage.completion_tokens))
+
     def batch_generate(
         self,
         inputs: List[Dict[str, str]],
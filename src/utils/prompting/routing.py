@@ -0,0 +1,202 @@
+"""
+Per-stage model routing with latency SLOs and circuit breakers.
+
+`resources/model_routing.yaml` gives each stage of the AI pipeline a chain of models (a primary
+and its fallbacks) and a latency SLO. Every model in a chain has a circuit breaker that watches
+its recent calls. When their p95 latency exceeds the SLO, or too many of them fail, the breaker
+opens and the stage's calls go to the next model in the chain. Every `probe_interval_seconds`
+one live call is sent to the open model again; if it comes back within the SLO the breaker
+closes and traffic returns to it. A call that fails is retried once on each later model in the
+chain, so a broken primary costs one reply at most a timeout, not the whole round.
+
+The breakers are shared by every AI in the process (one slow model slows them all), and
+published as metrics: `doppelbot_llm_route_state`, `doppelbot_llm_route_p95_seconds`,
+`doppelbot_llm_breaker_trips_total` and `doppelbot_llm_model_calls_total`.
+
+A stage without a route (or a process without the YAML file) uses its prompter's own model.
+DOPPELBOT_MODEL_ROUTING points to another routing file.
+"""
+import math
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass, fields
+from enum import IntEnum
+from typing import Dict, List, Optional
+
+import yaml
+
+from utils.clock import get_clock
+from utils.logging_utils import MasterLogger
+from utils.metrics import LLM_BREAKER_TRIPS, LLM_MODEL_CALLS, LLM_ROUTE_P95, LLM_ROUTE_STATE
+
+ROUTING_PATH_ENV = "DOPPELBOT_MODEL_ROUTING"
+DEFAULT_ROUTING_PATH = "./resources/model_routing.yaml"
+
+class BreakerState(IntEnum):
+    CLOSED = 0      # taking traffic
+    OPEN = 1        # skipped until the next probe
+    HALF_OPEN = 2   # one probe call in flight
+
+@dataclass
+class RouteSettings:
+    """Thresholds of one stage's breakers (the YAML's `defaults`, overridden per stage)."""
+    slo_p95_seconds: float = 5.0
+    max_error_rate: float = 0.25
+    window: int = 20                    # recent calls the p95 and error rate are computed over
+    min_calls: int = 5                  # calls needed in the window before the breaker can trip
+    probe_interval_seconds: float = 30.0
+    timeout_seconds: Optional[float] = None   # per attempt; a timeout counts as an error
+
+    @classmethod
+    def from_dict(cls, raw: dict, base: Optional["RouteSettings"] = None) -> "RouteSettings":
+        names = {f.name for f in fields(cls)}
+        unknown = set(raw) - names
+        if unknown:
+            raise ValueError(f"Unknown model routing settings: {sorted(unknown)}")
+        values = {name: getattr(base, name) for name in names} if base else {}
+        values.update(raw)
+        return cls(**values)
+
+class CircuitBreaker:
+    """Watches one model's calls for one stage."""
+
+    def __init__(self, stage: str, model: str, settings: RouteSettings):
+        self.stage = stage
+        self.model = model
+        self.settings = settings
+        self.state = BreakerState.CLOSED
+        self.opened_at = 0.0
+        self._samples = deque(maxlen=settings.window)   # (latency seconds, succeeded)
+        self._lock = threading.Lock()
+        self._state_gauge = LLM_ROUTE_STATE.labels(stage, model)
+        self._p95_gauge = LLM_ROUTE_P95.labels(stage, model)
+        self._state_gauge.set(BreakerState.CLOSED)
+
+    def p95(self) -> float:
+        if not self._samples:
+            return 0.0
+        latencies = sorted(latency for latency, _ in self._samples)
+        return latencies[math.ceil(0.95 * len(latencies)) - 1]
+
+    def error_rate(self) -> float:
+        if not self._samples:
+            return 0.0
+        return sum(1 for _, ok in self._samples if not ok) / len(self._samples)
+
+    def _set_state(self, state: BreakerState, now: float) -> None:
+        self.state = state
+        if state == BreakerState.OPEN:
+            self.opened_at = now
+        self._state_gauge.set(state)
+
+    def allow(self, now: float) -> bool:
+        """Whether the next call may use this model (an open breaker lets one probe through when due)."""
+        with self._lock:
+            if self.state == BreakerState.CLOSED:
+                return True
+            if self.state == BreakerState.OPEN and now - self.opened_at >= self.settings.probe_interval_seconds:
+                self._set_state(BreakerState.HALF_OPEN, now)
+                return True
+            return False
+
+    def report(self, latency: float, ok: bool, now: float) -> None:
+        """Records a finished call and opens or closes the breaker accordingly."""
+        settings = self.settings
+        with self._lock:
+            if self.state == BreakerState.HALF_OPEN:
+                if ok and latency <= settings.slo_p95_seconds:
+                    self._samples.clear()
+                    self._p95_gauge.set(latency)
+                    self._set_state(BreakerState.CLOSED, now)
+                    event = f"closed (probe took {latency:.2f}s)"
+                else:
+                    self._set_state(BreakerState.OPEN, now)
+                    event = None
+            elif self.state == BreakerState.OPEN:
+                return  # started before the breaker opened
+            else:
+                self._samples.append((latency, ok))
+                p95, error_rate = self.p95(), self.error_rate()
+                self._p95_gauge.set(p95)
+                event = None
+                if len(self._samples) >= settings.min_calls and (
+                        p95 > settings.slo_p95_seconds or error_rate > settings.max_error_rate):
+                    self._set_state(BreakerState.OPEN, now)
+                    LLM_BREAKER_TRIPS.labels(self.stage, self.model).inc()
+                    event = f"opened (p95 {p95:.2f}s, SLO {settings.slo_p95_seconds}s, errors {error_rate:.0%})"
+        if event:
+            logger = MasterLogger.get_instance()
+            if logger:
+                logger.warning(f"Model route {self.stage}/{self.model} {event}")
+
+class StageRoute:
+    """The model chain of one stage."""
+
+    def __init__(self, stage: str, models: List[str], settings: RouteSettings):
+        if not models:
+            raise ValueError(f"Model route for {stage} has no models")
+        self.stage = stage
+        self.settings = settings
+        self.breakers = [CircuitBreaker(stage, model, settings) for model in models]
+
+    @property
+    def models(self) -> List[str]:
+        return [breaker.model for breaker in self.breakers]
+
+    def attempts(self) -> List[str]:
+        """
+        Models to try for the next call, in order: the first one whose breaker allows it, then
+        the later fallbacks. If every breaker is open, only the last fallback is tried.
+        """
+        now = get_clock().monotonic()
+        for i, breaker in enumerate(self.breakers):
+            if breaker.allow(now):
+                return self.models[i:]
+        return self.models[-1:]
+
+    def report(self, model: str, latency: float, ok: bool) -> None:
+        LLM_MODEL_CALLS.labels(self.stage, model, "ok" if ok else "error").inc()
+        for breaker in self.breakers:
+            if breaker.model == model:
+                breaker.report(latency, ok, get_clock().monotonic())
+                return
+
+class ModelRouter:
+    """The routes of every stage, as configured in the routing YAML."""
+
+    def __init__(self, routes: Optional[Dict[str, StageRoute]] = None):
+        self.routes = routes or {}
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "ModelRouter":
+        defaults = RouteSettings.from_dict(raw.get("defaults") or {})
+        routes = {}
+        for stage, spec in (raw.get("stages") or {}).items():
+            spec = dict(spec)
+            models = [spec.pop("primary")] + list(spec.pop("fallbacks", []))
+            routes[stage] = StageRoute(stage, models, RouteSettings.from_dict(spec, base=defaults))
+        return cls(routes)
+
+    @classmethod
+    def from_yaml(cls, path: str) -> "ModelRouter":
+        """Loads the routing file (a missing file means no routing)."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(yaml.safe_load(f) or {})
+
+    def route(self, stage: str) -> Optional[StageRoute]:
+        return self.routes.get(stage)
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+def get_router() -> ModelRouter:
+    """Returns the process-wide router, loading the routing file on first use."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ModelRouter.from_yaml(os.getenv(ROUTING_PATH_ENV, DEFAULT_ROUTING_PATH))
+    return _router
@@ -0,0 +1,155 @@
+"""
+Compact, versioned snapshot encoding for PlayerState and GameState.
+
+Players are stored column-wise: the field names are written once in a header and every player
+becomes a positional row. The JSON is written without indentation or extra whitespace.
+The voted-off history of a GameState is embedded as a nested, still-encoded string so readers
+that only need the active players never pay to decode it.
+"""
+import json
+from typing import Iterable, List, Optional, Union
+
+from utils.states import GameState, PlayerState
+
+SNAPSHOT_VERSION = 1
+
+# Separators for packed JSON (no whitespace after ',' or ':')
+_PACKED = (",", ":")
+
+# GameState fields carried by a snapshot besides the player collections
+_GAME_STATE_FIELDS = (
+    "round_number", "last_vote_outcome", "chat_log_path", "voting_path", "start_time_path",
+    "player_path", "vote_records", "chat_complete", "voting_complete", "round_complete",
+    "number_of_human_players", "ice_asked", "icebreakers", "clock_offset",
+)
+
+class SnapshotVersionError(ValueError):
+    """Raised when a snapshot was written by a newer, unknown encoding version."""
+
+def _check_version(payload: dict) -> None:
+    version = payload.get("v")
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotVersionError(
+            f"Unsupported snapshot version {version!r} (expected {SNAPSHOT_VERSION})")
+
+def _players_payload(players: Iterable[PlayerState]) -> dict:
+    columns = PlayerState.record_fields()
+    rows = []
+    for player in players:
+        record = player.to_record()
+        rows.append([record[name] for name in columns])
+    return {"v": SNAPSHOT_VERSION, "fields": list(columns), "rows": rows}
+
+def _players_from_payload(payload: dict) -> List[PlayerState]:
+    _check_version(payload)
+    columns = payload["fields"]
+    known = PlayerState.record_fields()
+    if not set(columns) <= set(known):
+        return [PlayerState.from_record(dict(zip(columns, row))) for row in payload["rows"]]
+    # Fast path: every column is a known field, so rows can be passed straight through
+    return [PlayerState(**dict(zip(columns, row))) for row in payload["rows"]]
+
+def encode_players(players: Iterable[PlayerState]) -> str:
+    """
+    Encodes players as packed, column-wise JSON.
+
+    Args:
+        players (Iterable[PlayerState]): The players to encode.
+
+    Returns:
+        str: The encoded snapshot text.
+    """
+    return json.dumps(_players_payload(players), separators=_PACKED)
+
+def decode_players(data: Union[str, bytes, list, dict]) -> List[PlayerState]:
+    """
+    Decodes players from a snapshot produced by `encode_players`.
+
+    Legacy `players.json` files (an indented list of per-player dicts) are still accepted,
+    so lobbies written by older versions keep loading.
+
+    Args:
+        data: Snapshot text/bytes, or an already-parsed JSON object.
+
+    Returns:
+        List[PlayerState]: The decoded players.
+
+    Raises:
+        SnapshotVersionError: If the snapshot version is not supported.
+    """
+    payload = json.loads(data) if isinstance(data, (str, bytes)) else data
+    if isinstance(payload, list):
+        return [PlayerState.from_record(p) for p in payload]
+    return _players_from_payload(payload)
+
+class GameStateSnapshot:
+    """
+    A decoded GameState snapshot whose voted-off history is decoded lazily.
+
+    The active players and scalar fields are decoded up front. `players_voted_off` stays
+    an encoded string until it is first accessed.
+    """
+    __slots__ = ("fields", "players", "_voted_off_raw", "_voted_off")
+
+    def __init__(self, fields: dict, players: List[PlayerState], voted_off_raw: str):
+        self.fields = fields
+        self.players = players
+        self._voted_off_raw = voted_off_raw
+        self._voted_off: Optional[List[PlayerState]] = None
+
+    @property
+    def players_voted_off(self) -> List[PlayerState]:
+        """The voted-off players, decoded on first access and cached afterwards."""
+        if self._voted_off is None:
+            self._voted_off = decode_players(self._voted_off_raw)
+            self._voted_off_raw = ""
+        return self._voted_off
+
+    def to_game_state(self) -> GameState:
+        """Materializes a full GameState (this decodes the voted-off history)."""
+        gs = GameState(round_number=self.fields["round_number"])
+        for name, value in self.fields.items():
+            setattr(gs, name, value)
+        gs.players = self.players
+        gs.players_voted_off = list(self.players_voted_off)
+        return gs
+
+def encode_game_state(gs: GameState) -> bytes:
+    """
+    Encodes a GameState (including its players) as a versioned, packed JSON snapshot.
+
+    Args:
+        gs (GameState): The game state to encode.
+
+    Returns:
+        bytes: UTF-8 encoded snapshot.
+    """
+    payload = {
+        "v": SNAPSHOT_VERSION,
+        "gs": {name: getattr(gs, name) for name in _GAME_STATE_FIELDS},
+        "players": _players_payload(gs.players),
+        # Nested as a string so that decoding it can be deferred
+        "voted_off": encode_players(gs.players_voted_off),
+    }
+    return json.dumps(payload, separators=_PACKED).encode("utf-8")
+
+def decode_game_state(data: Union[str, bytes]) -> GameStateSnapshot:
+    """
+    Decodes a snapshot produced by `encode_game_state`.
+
+    Args:
+        data (Union[str, bytes]): The encoded snapshot.
+
+    Returns:
+        GameStateSnapshot: The decoded snapshot. Call `to_game_state()` for a GameState.
+
+    Raises:
+        SnapshotVersionError: If the snapshot version is not supported.
+    """
+    payload = json.loads(data)
+    _check_version(payload)
+    return GameStateSnapshot(
+        fields=payload["gs"],
+        players=_players_from_payload(payload["players"]),
+        voted_off_raw=payload["voted_off"],
+    )
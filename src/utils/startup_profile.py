@@ -0,0 +1,95 @@
+"""
+Import-time profiling for game startup.
+
+Runs the imports in a fresh interpreter with `python -X importtime` and condenses its
+per-module output into a per-package breakdown: the time spent importing each top-level package
+(self time of all its submodules), sorted slowest first.
+"""
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+@dataclass
+class PackageImportTime:
+    package: str
+    self_us: int     # time spent in the package's own modules
+    modules: int     # number of modules imported from the package
+
+@dataclass
+class ImportProfile:
+    total_us: int                      # cumulative time of the top-level imports
+    packages: List[PackageImportTime]  # slowest first
+
+def parse_importtime(stderr: str) -> ImportProfile:
+    """
+    Summarizes `-X importtime` output by top-level package.
+
+    Args:
+        stderr (str): Captured stderr of a `python -X importtime` run.
+
+    Returns:
+        ImportProfile: Total time and the per-package breakdown.
+    """
+    per_package: Dict[str, PackageImportTime] = {}
+    total_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_col, cumulative_col, name_col = line[len("import time:"):].split("|", 2)
+        depth = (len(name_col) - len(name_col.lstrip())) // 2
+        name = name_col.strip()
+        package = name.split(".", 1)[0]
+        entry = per_package.setdefault(package, PackageImportTime(package, 0, 0))
+        entry.self_us += int(self_col)
+        entry.modules += 1
+        if depth == 0:
+            total_us += int(cumulative_col)
+    packages = sorted(per_package.values(), key=lambda p: p.self_us, reverse=True)
+    return ImportProfile(total_us=total_us, packages=packages)
+
+def profile_imports(code: str, src_dir: str) -> ImportProfile:
+    """
+    Runs `code` in a fresh interpreter with `-X importtime` and summarizes the result.
+
+    Args:
+        code (str): Python statements to profile, e.g. "import main".
+        src_dir (str): Directory added to sys.path (the game's `src` folder).
+
+    Returns:
+        ImportProfile: Total time and the per-package breakdown.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src_dir, env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Profiled startup failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+def format_report(profile: ImportProfile, top: int = 15, heavy: Sequence[str] = ()) -> str:
+    """
+    Renders an `ImportProfile` as a small table.
+
+    Args:
+        profile (ImportProfile): The summarized profile.
+        top (int): Number of packages to list.
+        heavy (Sequence[str]): Packages to flag if they were imported at all.
+
+    Returns:
+        str: The report text.
+    """
+    lines = [
+        f"Startup imports: {profile.total_us / 1000:.1f} ms total",
+        f"{'package':<28}{'self ms':>10}{'modules':>9}",
+    ]
+    for entry in profile.packages[:top]:
+        lines.append(f"{entry.package:<28}{entry.self_us / 1000:>10.1f}{entry.modules:>9}")
+    loaded = {entry.package for entry in profile.packages}
+    flagged = [name for name in heavy if name in loaded]
+    if flagged:
+        lines.append(f"Heavy packages loaded at startup: {', '.join(flagged)}")
+    return "\n".join(lines)
@@ -1,8 +1,8 @@
 from __future__ import annotations
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Union
 
 class ScreenEnum(Enum):
     INTRO = 0
@@ -12,7 +12,7 @@ class ScreenEnum(Enum):
     SCORE = 4
     DEBUG = 5
 
-@dataclass
+@dataclass(slots=True)
 class PlayerState:
     lobby_id: str
     first_name: str
@@ -25,12 +25,38 @@ class PlayerState:
     extra_info: str
     is_human: bool 
     color_name: str     
-    starttime: str = "" # Start time of the game
+    starttime: float = 0.0 # Round start time, epoch seconds on the lobby's shared clock
     voted: bool = False # Flag to indicate if the player has voted
     ai_doppleganger: Optional[AIPlayer] = None # type: ignore
     written_to_file: bool = False # Flag to indicate if the player has been written to a file
     timekeeper: bool = False # Flag to indicate if the player is a timekeeper
     still_in_game: bool = True # Flag to indicate if the player is still in the game
+    logger: Optional[object] = None # Logger attached at setup time (never persisted)
+
+    # Fields that only make sense inside the running process and are never written to disk
+    RUNTIME_FIELDS = ("ai_doppleganger", "logger")
+
+    @classmethod
+    def record_fields(cls) -> tuple:
+        """Names of the persisted fields, in declaration order."""
+        return tuple(f.name for f in fields(cls) if f.name not in cls.RUNTIME_FIELDS)
+
+    def to_record(self) -> dict:
+        """
+        Converts the player to a JSON-serializable dict of its persisted fields.
+
+        Unlike `asdict`, this never deep-copies the AI doppelganger or the logger.
+        """
+        record = {name: getattr(self, name) for name in self.record_fields()}
+        if isinstance(self.starttime, datetime):
+            record["starttime"] = self.starttime.isoformat()
+        return record
+
+    @classmethod
+    def from_record(cls, record: dict) -> PlayerState:
+        """Rebuilds a player from a persisted record, ignoring runtime-only and unknown keys."""
+        known = cls.record_fields()
+        return cls(**{k: v for k, v in record.items() if k in known})
 
     def to_dict(self) -> dict:
         return {
@@ -67,11 +93,202 @@ class PlayerState:
             "extra_info": self.extra_info,
         }
 
-@dataclass
+class PlayerRegistry:
+    """
+    An indexed, list-compatible collection of the players still in the game.
+
+    `GameState.players` used to be a plain list, so every code-name lookup was a linear scan
+    (once per rendered chat message, once per vote). The registry keeps the same list-style API
+    (iteration, `len`, indexing, `append`, `+`, ...) on an ordered list, and also maintains
+    dictionaries keyed by code name, split into human and AI partitions, so lookups are
+    constant time.
+
+    Players removed with `vote_off` leave the active players and go into a voted-off index,
+    also keyed by code name, so `GameState.find_player` stays constant time for them too.
+    `GameState.players_voted_off` is a list-style view over that index.
+    """
+    __slots__ = ("_order", "_active", "_humans", "_ais", "_voted_off")
+
+    def __init__(self, players: Optional[Iterable[PlayerState]] = None):
+        """
+        Builds the registry from an optional iterable of players.
+
+        Args:
+            players (Iterable[PlayerState], optional): Players to register, in display order.
+                A later player with an already-registered code name replaces the earlier one.
+        """
+        self._order: List[PlayerState] = []
+        self._active: Dict[str, PlayerState] = {}
+        self._humans: Dict[str, PlayerState] = {}
+        self._ais: Dict[str, PlayerState] = {}
+        self._voted_off: Dict[str, PlayerState] = {}   # in the order they were voted off
+        for player in players or []:
+            self.append(player)
+
+    # --- list compatibility ---
+    def __iter__(self) -> Iterator[PlayerState]:
+        return iter(self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __getitem__(self, index):
+        return self._order[index]
+
+    def __contains__(self, item: Union[str, PlayerState]) -> bool:
+        code_name = item.code_name if isinstance(item, PlayerState) else item
+        return code_name in self._active
+
+    def __add__(self, other: Iterable[PlayerState]) -> List[PlayerState]:
+        return self._order + list(other)
+
+    def __radd__(self, other: Iterable[PlayerState]) -> List[PlayerState]:
+        return list(other) + self._order
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PlayerRegistry):
+            other = other._order
+        return self._order == other
+
+    def __repr__(self) -> str:
+        return f"PlayerRegistry({self._order!r})"
+
+    def append(self, player: PlayerState) -> None:
+        """Registers a player, replacing (in place) any active player with the same code name."""
+        current = self._active.get(player.code_name)
+        if current is None:
+            self._order.append(player)
+        else:
+            self._order[self._order.index(current)] = player
+        self._active[player.code_name] = player
+        self._voted_off.pop(player.code_name, None)
+        partition, other = (self._humans, self._ais) if player.is_human else (self._ais, self._humans)
+        partition[player.code_name] = player
+        other.pop(player.code_name, None)
+
+    def extend(self, players: Iterable[PlayerState]) -> None:
+        for player in players:
+            self.append(player)
+
+    def remove(self, player: Union[str, PlayerState]) -> PlayerState:
+        """
+        Removes a player from the registry.
+
+        Raises:
+            ValueError: If no active player has that code name (mirrors `list.remove`).
+        """
+        code_name = player.code_name if isinstance(player, PlayerState) else player
+        if code_name not in self._active:
+            raise ValueError(f"{code_name} is not an active player")
+        self._humans.pop(code_name, None)
+        self._ais.pop(code_name, None)
+        removed = self._active.pop(code_name)
+        self._order.remove(removed)
+        return removed
+
+    # --- indexed access ---
+    def get(self, code_name: str) -> Optional[PlayerState]:
+        """Returns the active player with this code name, or None."""
+        return self._active.get(code_name)
+
+    def vote_off(self, code_name: str) -> Optional[PlayerState]:
+        """
+        Removes an active player, marks them as out of the game and records them as voted off.
+
+        Returns:
+            Optional[PlayerState]: The voted-off player, or None if the code name is not active.
+        """
+        if code_name not in self._active:
+            return None
+        player = self.remove(code_name)
+        player.still_in_game = False
+        self._voted_off[code_name] = player
+        return player
+
+    def get_voted_off(self, code_name: str) -> Optional[PlayerState]:
+        """Returns the voted-off player with this code name, or None."""
+        return self._voted_off.get(code_name)
+
+    def add_voted_off(self, player: PlayerState) -> None:
+        """Records a player as voted off without touching the active players (e.g. when restoring)."""
+        self._voted_off[player.code_name] = player
+
+    def set_voted_off(self, players: Iterable[PlayerState]) -> None:
+        """Replaces the voted-off record with `players`, in order."""
+        self._voted_off = {player.code_name: player for player in players}
+
+    @property
+    def voted_off(self) -> "VotedOffPlayers":
+        """List-style view of the voted-off players, in the order they were voted off."""
+        return VotedOffPlayers(self)
+
+    @property
+    def humans(self) -> List[PlayerState]:
+        """Active human players."""
+        return list(self._humans.values())
+
+    @property
+    def ais(self) -> List[PlayerState]:
+        """Active AI players."""
+        return list(self._ais.values())
+
+    @property
+    def num_humans(self) -> int:
+        return len(self._humans)
+
+    @property
+    def num_ais(self) -> int:
+        return len(self._ais)
+
+class VotedOffPlayers:
+    """
+    Read-mostly list view of a `PlayerRegistry`'s voted-off players.
+
+    This is what `GameState.players_voted_off` holds, so existing list code (iteration, `len`,
+    indexing, `+`, `append`) keeps working while lookups go through the registry's index.
+    """
+    __slots__ = ("_registry",)
+
+    def __init__(self, registry: PlayerRegistry):
+        self._registry = registry
+
+    def __iter__(self) -> Iterator[PlayerState]:
+        return iter(list(self._registry._voted_off.values()))
+
+    def __len__(self) -> int:
+        return len(self._registry._voted_off)
+
+    def __getitem__(self, index):
+        return list(self._registry._voted_off.values())[index]
+
+    def __contains__(self, item: Union[str, PlayerState]) -> bool:
+        code_name = item.code_name if isinstance(item, PlayerState) else item
+        return code_name in self._registry._voted_off
+
+    def __add__(self, other: Iterable[PlayerState]) -> List[PlayerState]:
+        return list(self) + list(other)
+
+    def __radd__(self, other: Iterable[PlayerState]) -> List[PlayerState]:
+        return list(other) + list(self)
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"VotedOffPlayers({list(self)!r})"
+
+    def append(self, player: PlayerState) -> None:
+        self._registry.add_voted_off(player)
+
+    def extend(self, players: Iterable[PlayerState]) -> None:
+        for player in players:
+            self.append(player)
+
+@dataclass(slots=True)
 class GameState:
     round_number: int
-    players: List[PlayerState] = field(default_factory=list)
-    players_voted_off: List[PlayerState] = field(default_factory=list)
+    players: PlayerRegistry = field(default_factory=PlayerRegistry)
+    players_voted_off: List[PlayerState] = field(default_factory=list)   # view over `players`, see `find_player`
     last_vote_outcome: str = ""     # The outcome of the last vote
     chat_log_path: str = ""         # Path to the chat log file
     voting_path: str = ""           # Path to the voting file
@@ -86,6 +303,33 @@ class GameState:
     number_of_human_players: int = 0
     ice_asked: int = 0
     icebreakers: list = field(default_factory=lambda: ["your_values"])
+    clock_offset: float = 0.0       # This terminal's offset from the lobby's shared clock (seconds)
+
+    def __setattr__(self, name, value):
+        # Keep `gs.players = [...]` and `gs.players_voted_off = [...]` working everywhere while
+        # always storing an indexed registry, with the voted-off players kept inside it
+        if name == "players":
+            if not isinstance(value, PlayerRegistry):
+                value = PlayerRegistry(value)
+            previous = getattr(self, "players", None)
+            if previous is not None and previous is not value:
+                value.set_voted_off(previous.voted_off)
+            object.__setattr__(self, name, value)
+            if getattr(self, "players_voted_off", None) is not None:
+                object.__setattr__(self, "players_voted_off", value.voted_off)
+            return
+        if name == "players_voted_off":
+            if not (isinstance(value, VotedOffPlayers) and value._registry is self.players):
+                self.players.set_voted_off(list(value))
+            value = self.players.voted_off
+        object.__setattr__(self, name, value)
+
+    def find_player(self, code_name: str) -> Optional[PlayerState]:
+        """Returns the player with this code name, whether still in the game or voted off."""
+        player = self.players.get(code_name)
+        if player is None:
+            player = self.players.get_voted_off(code_name)
+        return player
 
     def to_dict(self) -> dict:
         def serialize(value):
@@ -96,7 +340,7 @@ class GameState:
         return {
             "round_number": self.round_number,
             "players": [player.to_dict() if isinstance(player, PlayerState) else player for player in self.players],
-            "players_voted_off": self.players_voted_off,
+            "players_voted_off": list(self.players_voted_off),
             "last_vote_outcome": self.last_vote_outcome,
             "chat_log_path": self.chat_log_path,
             "voting_path": self.voting_path,
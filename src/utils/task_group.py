@@ -0,0 +1,62 @@
+"""
+`TaskGroup` for structured concurrency on every Python version we support.
+
+Python 3.11+ uses `asyncio.TaskGroup` directly. The documented setup (Python 3.10) gets a small
+fallback with the same contract: leaving the `async with` block waits for every child; if a
+child fails, the siblings and the block body are cancelled and the error is re-raised. The
+fallback raises the first error instead of an ExceptionGroup.
+"""
+import asyncio
+from typing import Coroutine, List, Optional, Set
+
+class _FallbackTaskGroup:
+    def __init__(self):
+        self._tasks: Set[asyncio.Task] = set()
+        self._errors: List[BaseException] = []
+        self._parent: Optional[asyncio.Task] = None
+        self._aborting = False
+
+    async def __aenter__(self):
+        self._parent = asyncio.current_task()
+        return self
+
+    def create_task(self, coro: Coroutine, *, name: Optional[str] = None) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(coro, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        return task
+
+    def _abort(self) -> None:
+        self._aborting = True
+        for task in self._tasks:
+            if not task.done():
+                task.cancel()
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        if task.cancelled() or task.exception() is None:
+            return
+        self._errors.append(task.exception())
+        if not self._aborting:
+            self._abort()
+            if self._parent is not None and not self._parent.done():
+                self._parent.cancel()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None and not self._aborting:
+            self._abort()
+        cancelled = False
+        while True:
+            try:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+                break
+            except asyncio.CancelledError:
+                # Keep waiting so children never outlive the group, then propagate
+                cancelled = True
+                self._abort()
+        if self._errors:
+            raise self._errors[0]
+        if cancelled:
+            raise asyncio.CancelledError()
+        return False
+
+TaskGroup = getattr(asyncio, "TaskGroup", _FallbackTaskGroup)
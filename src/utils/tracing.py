@@ -0,0 +1,154 @@
+"""
+Lightweight tracing spans exported in the Chrome trace event format (chrome://tracing, Perfetto).
+
+Code marks the work it does with `span(name, category)`: screens, LLM stages, disk reads and
+writes, and the round and vote barriers where a terminal waits for the others. While no tracer
+is set (the default) a span costs one context variable lookup. `main.py --trace` sets one per
+terminal and saves `trace.json` next to the other diagnostics (see utils.profiling).
+
+Timestamps come from the game clock (`utils.clock`). Each trace records the terminal's offset
+from the lobby's shared clock (`utils.clock_sync`), so `merge_traces` (and `src/merge_traces.py`)
+can line up every terminal of a lobby on one timeline: a slow round shows up as one terminal
+waiting on the vote barrier while another is still waiting on the API or the disk.
+
+Like the console, the current tracer is a context variable, so each session of a game server
+can trace separately; worker threads started with `asyncio.to_thread` inherit it.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from utils.clock import get_clock
+
+class Tracer:
+    """Collects the spans of one terminal."""
+
+    def __init__(self, name: str = "terminal"):
+        """
+        Args:
+            name (str): Shown as the process name on the timeline (e.g. the player's code name).
+        """
+        self.name = name
+        self.clock_offset = 0.0
+        self.pid = os.getpid()
+        self.events: List[dict] = []
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def _now_us(self) -> float:
+        return get_clock().time() * 1e6
+
+    def _record(self, event: dict, args: Optional[dict]) -> None:
+        # Spans are nested per thread (the event loop's, or a worker's for the LLM stages)
+        thread = threading.current_thread()
+        event["pid"], event["tid"] = self.pid, thread.ident
+        if args:
+            event["args"] = args
+        with self._lock:
+            self._threads.setdefault(thread.ident, thread.name)
+            self.events.append(event)
+
+    def add_span(self, name: str, cat: str, start_us: float, end_us: float, args: Optional[dict] = None) -> None:
+        self._record({"name": name, "cat": cat, "ph": "X", "ts": round(start_us, 1),
+                      "dur": round(end_us - start_us, 1)}, args)
+
+    def instant(self, name: str, cat: str, **args) -> None:
+        """Marks a moment (e.g. a round deadline) on the timeline."""
+        self._record({"name": name, "cat": cat, "ph": "i", "s": "p", "ts": round(self._now_us(), 1)}, args)
+
+    @contextmanager
+    def span(self, name: str, cat: str, **args) -> Iterator[dict]:
+        """Records the enclosed block; the yielded dict can be filled with more args."""
+        start = self._now_us()
+        try:
+            yield args
+        finally:
+            self.add_span(name, cat, start, self._now_us(), args)
+
+    def to_chrome_trace(self) -> dict:
+        with self._lock:
+            events = list(self.events)
+            threads = list(self._threads.items())
+        metadata = [{"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": self.name}}]
+        metadata += [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+                     for tid, name in threads]
+        return {
+            "traceEvents": metadata + events,
+            "displayTimeUnit": "ms",
+            "otherData": {"terminal": self.name, "clock_offset": self.clock_offset},
+        }
+
+    def dump(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+        os.replace(tmp_path, path)
+
+_current_tracer: ContextVar[Optional[Tracer]] = ContextVar("tracer", default=None)
+
+def get_tracer() -> Optional[Tracer]:
+    """Returns the tracer of the current context (None while tracing is off)."""
+    return _current_tracer.get()
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    """Sets the tracer for the current context (and the tasks and threads it starts)."""
+    _current_tracer.set(tracer)
+
+@contextmanager
+def span(name: str, cat: str, **args) -> Iterator[dict]:
+    """
+    Records the enclosed block on the current tracer, if any.
+
+    Args:
+        name (str): What is being done (e.g. "decide_to_respond").
+        cat (str): Its category: "screen", "llm", "disk" or "barrier".
+        **args: Details shown with the span.
+
+    Yields:
+        dict: The span's args, which the block may add to (e.g. the number of lines read).
+    """
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield args
+        return
+    with tracer.span(name, cat, **args) as span_args:
+        yield span_args
+
+def merge_traces(traces: List[dict]) -> dict:
+    """
+    Puts several terminals' traces on one timeline.
+
+    Each trace is shifted by its terminal's offset to the shared clock and gets its own process
+    row (terminals served by one game server share an OS pid). Times are made relative to the
+    earliest event.
+
+    Args:
+        traces (List[dict]): Traces written by `Tracer.dump`.
+
+    Returns:
+        dict: One Chrome trace.
+    """
+    shifted = []
+    for row, trace in enumerate(traces, start=1):
+        offset_us = trace.get("otherData", {}).get("clock_offset", 0.0) * 1e6
+        for event in trace["traceEvents"]:
+            event = dict(event, pid=row)
+            if "ts" in event:
+                event["ts"] = event["ts"] + offset_us
+            shifted.append(event)
+    origin = min((e["ts"] for e in shifted if "ts" in e), default=0.0)
+    for event in shifted:
+        if "ts" in event:
+            event["ts"] = round(event["ts"] - origin, 1)
+    return {
+        "traceEvents": shifted,
+        "displayTimeUnit": "ms",
+        "otherData": {
+            "terminals": [t.get("otherData", {}).get("terminal") for t in traces],
+            "origin_epoch": origin / 1e6,
+        },
+    }
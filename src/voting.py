@@ -7,11 +7,17 @@ How to run:
 
 import json
 import os
-from time import sleep
 from typing import Tuple
 from utils.states import GameState, ScreenEnum, PlayerState
 from utils.asthetics import dramatic_print, format_gm_message, clear_screen
 from utils.file_io import synchronize_start_time
+from utils.json_cache import load_json, stat_key, wait_for_change
+from utils.console import ainput, cprint, emit_event
+from utils.atomic_io import create_exclusive, update_json
+from utils.lobby_registry import LobbyStatus, report_status
+from utils.tracing import span
+from utils.metrics import VOTE_WAIT
+from utils.clock import get_clock
 from colorama import Fore, Style
 
 # Load or initialize voting data
@@ -19,40 +25,35 @@ def get_vote_records(gs: GameState) -> dict:
     """
     Loads or initializes the vote_records dictionary from the voting file.
 
-    If it exists, it loads the detailed vote records (as a list per round).
+    If it exists, it loads the detailed vote records (as a list per round). The parsed file
+    is cached and only re-read when it changes, so polling it every second is cheap.
     Otherwise, it initializes it as an empty dict and writes it to disk.
 
     Returns:
-        dict: The full vote records dictionary.
+        dict: The full vote records dictionary (shared, do not modify in place).
     """
-    if os.path.exists(gs.voting_path):
-        with open(gs.voting_path, 'r') as f:
-            vote_records = json.load(f)
-    else:
-        vote_records = {}
-        with open(gs.voting_path, 'w') as f:
-            json.dump(vote_records, f, indent=4)
-    return vote_records
+    if not os.path.exists(gs.voting_path):
+        # Only one terminal gets to create the file; the others just read it
+        create_exclusive(gs.voting_path, json.dumps({}, indent=4))
+    return load_json(gs.voting_path, default={})
 
 def update_vote_records(gs: GameState, vote_record: dict) -> dict:
     """
     Appends a single vote record to the vote log for this round.
 
+    The voting file is read, updated and atomically replaced while holding its lock, so
+    players voting at the same moment never drop each other's votes.
+
     Returns:
         dict: The updated vote records dictionary.
     """
     vote_key = f"votes_r{gs.round_number}"
-    vote_records = get_vote_records(gs)
-
-    if vote_key not in vote_records:
-        vote_records[vote_key] = []
 
-    vote_records[vote_key].append(vote_record)
+    def add_vote(vote_records: dict) -> None:
+        vote_records.setdefault(vote_key, []).append(vote_record)
 
-    with open(gs.voting_path, 'w') as f:
-        json.dump(vote_records, f, indent=4)
-
-    return vote_records
+    with span("write vote", "disk", round=gs.round_number):
+        return update_json(gs.voting_path, add_vote, indent=4)
 
 # Display the voting prompt
 def display_voting_prompt(gs) -> str:
@@ -72,7 +73,7 @@ def display_voting_prompt(gs) -> str:
     return f'Select a player to vote out by number:\n' + '\n'.join(voting_options) + '\n> '
 
 # Collect the player's vote
-def collect_vote(gs: GameState, ps: PlayerState) -> str:
+async def collect_vote(gs: GameState, ps: PlayerState) -> str:
     eligible_players = sorted(gs.players, key=lambda x: x.code_name)
     voting_str = display_voting_prompt(gs)
 
@@ -81,13 +82,15 @@ def collect_vote(gs: GameState, ps: PlayerState) -> str:
     if vote_key not in gs.vote_records:
         gs.vote_records[vote_key] = []
 
+    options = [{"choice": idx + 1, "code_name": p.code_name} for idx, p in enumerate(eligible_players)]
     while True:
         try:
-            vote_index = int(input(voting_str)) - 1
+            emit_event("vote_prompt", round=gs.round_number, options=options)
+            vote_index = int(await ainput(voting_str)) - 1
             voted_player = eligible_players[vote_index]
 
             if voted_player.code_name == ps.code_name:
-                print("You cannot vote for yourself.")
+                cprint("You cannot vote for yourself.")
                 continue
 
             # Determine display name
@@ -111,7 +114,7 @@ def collect_vote(gs: GameState, ps: PlayerState) -> str:
             return voted_player.code_name
 
         except (ValueError, IndexError):
-            print("Invalid choice. Please enter a number from the list.")
+            cprint("Invalid choice. Please enter a number from the list.")
     
 # Count votes and determine the outcome
 from collections import Counter
@@ -175,15 +178,12 @@ def process_voting_result(
 
     # If we have a clear winner (only one player with the max votes)
     voted_out_code_name = players_voted_for_the_most[0]
-    voted_out_player = next((p for p in gs.players if p.code_name == voted_out_code_name), None)
+    # Mark the voted-out player as no longer in the game and move them out of the active registry
+    voted_out_player = gs.players.vote_off(voted_out_code_name)
 
     # if there wasn't a bug and we found a player to vote out
     if voted_out_player:
-        # Mark the voted-out player as no longer in the game in the global state
-        # Update the game state
-        voted_out_player.still_in_game = False
-        gs.players = [p for p in gs.players if p.code_name != voted_out_code_name]
-        gs.players_voted_off.append(voted_out_player)
+        # Update the game state (vote_off already recorded them in gs.players_voted_off)
         gs.last_vote_outcome = f'{voted_out_code_name} has been voted out.'
         
         # Update the specific player state if the current player is the one voted out
@@ -233,25 +233,23 @@ def should_transition_to_score(gs: GameState) -> bool:
     """
 
     # Condition 1: No human players left
-    human_players = [p for p in gs.players if p.is_human]
-    if len(human_players) == 0:
-        print(format_gm_message('All human players have been voted out. Transitioning to score screen...'))
+    if gs.players.num_humans == 0:
+        cprint(format_gm_message('All human players have been voted out. Transitioning to score screen...'))
         return True
 
     # Condition 2: No AI players left
-    ai_players = [p for p in gs.players if not p.is_human]
-    if len(ai_players) == 0:
-        print(format_gm_message('All AI players have been voted out. Transitioning to score screen...'))
+    if gs.players.num_ais == 0:
+        cprint(format_gm_message('All AI players have been voted out. Transitioning to score screen...'))
         return True
 
     # Condition 3: At least half of the total players have been voted out
     if gs.round_number >= gs.number_of_human_players:
-        print(format_gm_message(f'{gs.round_number} Rounds have passed. Transitioning to score screen...'))
+        cprint(format_gm_message(f'{gs.round_number} Rounds have passed. Transitioning to score screen...'))
         return True
     return False
 
 # Main voting round function
-def voting_round(ss: ScreenEnum, gs: GameState, ps: PlayerState) -> tuple[ScreenEnum, GameState, PlayerState]:
+async def voting_round(ss: ScreenEnum, gs: GameState, ps: PlayerState) -> tuple[ScreenEnum, GameState, PlayerState]:
     """
     Executes a full voting round from prompting to result processing.
 
@@ -267,65 +265,73 @@ def voting_round(ss: ScreenEnum, gs: GameState, ps: PlayerState) -> tuple[Screen
     Returns:
         tuple[ScreenEnum, GameState, PlayerState]: The next screen, updated game state, and player state.
     """
+    report_status(gs, LobbyStatus.VOTING)
     # print(format_gm_message('Waiting for players to be ready to vote...'))
     # Collect the current player's vote if still in the game
     if ps.still_in_game:
-        who_player_voted_for = collect_vote(gs, ps)
+        who_player_voted_for = await collect_vote(gs, ps)
         # pass
     else:
-        print(
+        cprint(
             Fore.YELLOW +
             f"YOU ({ps.code_name}) HAVE BEEN VOTED OUT. YOU ARE NOW OBSERVING.".upper() +
             Style.RESET_ALL)
 
     # Update the list of human players actively in the game
-    human_players = [p for p in gs.players if p.is_human and p.still_in_game]
-
-    print('Waiting for all players to vote...')
-    print_str = ''
-    while True:
-        # Refresh the vote data
-        vote_dict = get_vote_records(gs)
-        current_round_vote_lst = vote_dict.get(f'votes_r{gs.round_number}', {})
-
-        # Count the total number of votes cast
-        # print(current_round_vote_lst)
-        # input(f"Press Enter to continue to next phase... {ps.code_name} has voted for {who_player_voted_for}")
-        num_votes = len(current_round_vote_lst)
-
-        # Update the printed message only if it changes
-        new_str = f'{num_votes}/{len(human_players)} players have voted.'
-        if print_str != new_str:
-            print(new_str)
-            print_str = new_str
-
-        # Check if we have collected votes from all players
-        if num_votes >= len(human_players):
-            break
-
-        # Add a small delay to reduce CPU usage
-        sleep(1)
-
-    print('All votes received. Proceeding to counting...')
+    human_players = [p for p in gs.players.humans if p.still_in_game]
+
+    cprint('Waiting for all players to vote...')
+    wait_started = get_clock().monotonic()
+    with span('wait for votes', 'barrier', round=gs.round_number):
+        print_str = ''
+        while True:
+            # Refresh the vote data
+            seen = stat_key(gs.voting_path)
+            vote_dict = get_vote_records(gs)
+            current_round_vote_lst = vote_dict.get(f'votes_r{gs.round_number}', {})
+
+            # Count the total number of votes cast
+            # print(current_round_vote_lst)
+            # input(f"Press Enter to continue to next phase... {ps.code_name} has voted for {who_player_voted_for}")
+            num_votes = len(current_round_vote_lst)
+
+            # Update the printed message only if it changes
+            new_str = f'{num_votes}/{len(human_players)} players have voted.'
+            if print_str != new_str:
+                cprint(new_str)
+                print_str = new_str
+
+            # Check if we have collected votes from all players
+            if num_votes >= len(human_players):
+                break
+
+            # Wait (without blocking the event loop) until another vote is written
+            await wait_for_change(gs.voting_path, seen, timeout=1)
+
+    VOTE_WAIT.observe(get_clock().monotonic() - wait_started)
+    cprint('All votes received. Proceeding to counting...')
 
     # Count votes and process the result
     max_votes, players_voted_for_the_most, = count_votes(vote_dict, gs)
     result = process_voting_result(gs, ps, max_votes, players_voted_for_the_most)
+    voted_out = players_voted_for_the_most[0] if max_votes > 0 and len(players_voted_for_the_most) == 1 else None
+    emit_event("vote_result", round=gs.round_number, voted_out=voted_out, outcome=gs.last_vote_outcome)
 
     # Verify if the current player has been voted out
-    if ps.code_name not in [p.code_name for p in gs.players if p.still_in_game]:
+    active_player = gs.players.get(ps.code_name)
+    if active_player is None or not active_player.still_in_game:
         ps.still_in_game = False
 
     # Print the result of the voting round
-    dramatic_print(result)
+    await dramatic_print(result)
 
     # Increment the round number after processing the result
     gs.round_number += 1
 
     # Synchronize the start time for the next round
 
-    input(Fore.MAGENTA + "Press Enter to continue to next phase..." + Style.RESET_ALL)
-    synchronize_start_time(gs, ps)
+    await ainput(Fore.MAGENTA + "Press Enter to continue to next phase..." + Style.RESET_ALL)
+    await synchronize_start_time(gs, ps)
     gs.round_complete = False
     clear_screen()
 
@@ -0,0 +1,47 @@
+"""
+Shared fixtures. The game's modules import each other as top-level packages (`utils`,
+`server`, ...) from `src/`, the way `python ./src/<script>.py` runs them, and read
+`./resources`: run the tests from the repository root (`python -m pytest -q`).
+"""
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+# Never call the real API; the mock answers instantly (see utils.prompting.mock_client)
+os.environ["DOPPELBOT_LLM_BACKEND"] = "mock"
+os.environ.setdefault("DOPPELBOT_MOCK_LATENCY_MS", "0")
+
+@pytest.fixture
+def lobby_dirs(tmp_path, monkeypatch):
+    """Points the runtime and debug lobby registries at a temporary directory."""
+    from utils import lobby_registry
+
+    for registry, name in ((lobby_registry.runtime_registry, "runtime"), (lobby_registry.debug_registry, "debug")):
+        base_dir = str(tmp_path / name / "lobbies")
+        monkeypatch.setattr(registry, "base_dir", base_dir)
+        monkeypatch.setattr(registry, "path", os.path.join(base_dir, "registry.json"))
+        monkeypatch.setattr(registry, "finished_path", os.path.join(base_dir, "finished.jsonl"))
+    return tmp_path
+
+@pytest.fixture(autouse=True, scope="session")
+def master_logger(tmp_path_factory):
+    """The game logs through the MasterLogger singleton; tests write it to a temporary file."""
+    from utils.logging_utils import MasterLogger
+
+    return MasterLogger(log_path=str(tmp_path_factory.mktemp("logs") / "master.log"), init=True)
+
+@pytest.fixture
+def make_player():
+    """Builds a PlayerState with the given code name (everything else filled in)."""
+    from utils.states import PlayerState
+
+    def make(code_name: str, is_human: bool = True, lobby_id: str = "1") -> PlayerState:
+        return PlayerState(
+            lobby_id=lobby_id, first_name=code_name.title(), last_initial="X", code_name=code_name,
+            grade="9", favorite_food="pizza", favorite_animal="otter", hobby="chess", extra_info="",
+            is_human=is_human, color_name="RED",
+        )
+    return make
@@ -0,0 +1,40 @@
+import multiprocessing
+import threading
+
+from utils.atomic_io import update_json
+
+INCREMENTS = 50
+
+def _increment(path: str, writer: str) -> None:
+    def mutate(data):
+        data["count"] = data.get("count", 0) + 1
+        data.setdefault("writers", []).append(writer)
+
+    for _ in range(INCREMENTS):
+        update_json(path, mutate)
+
+def test_concurrent_threads_lose_no_updates(tmp_path):
+    path = str(tmp_path / "counter.json")
+    threads = [threading.Thread(target=_increment, args=(path, f"t{i}")) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    data = update_json(path, lambda data: None)
+    assert data["count"] == 8 * INCREMENTS
+    assert sorted(set(data["writers"])) == [f"t{i}" for i in range(8)]
+
+def test_concurrent_processes_lose_no_updates(tmp_path):
+    path = str(tmp_path / "counter.json")
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_increment, args=(path, f"p{i}")) for i in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+    assert [worker.exitcode for worker in workers] == [0] * 4
+
+    data = update_json(path, lambda data: None)
+    assert data["count"] == 4 * INCREMENTS
+    assert len(data["writers"]) == 4 * INCREMENTS
@@ -0,0 +1,24 @@
+import json
+
+from utils.prompting.budget import Degradation, TokenAccountant
+
+def test_usage_before_bind_reaches_the_ledger(tmp_path):
+    accountant = TokenAccountant(ai_round_tokens=0, lobby_round_tokens=0)
+    accountant.record("respond", "gpt-4.1-mini", 100, 10)   # e.g. the setup-time prefetch
+    accountant.flush()
+    chat_log = tmp_path / "lobby_1" / "chat_log.txt"
+    chat_log.parent.mkdir()
+    accountant.bind("OTTER", str(chat_log), 0)
+    accountant.record("respond", "gpt-4.1-mini", 50, 5)
+    accountant.flush()
+    ledger = json.loads((chat_log.parent / "token_usage.json").read_text())
+    entry = ledger["rounds"]["0"]["OTTER"]
+    assert (entry["tokens"], entry["calls"]) == (165, 2)
+
+def test_lobby_budget_is_split_between_its_ais():
+    accountant = TokenAccountant(ai_round_tokens=0, lobby_round_tokens=1000)
+    accountant.bind("OTTER", None, 1, lobby_ais=4)
+    assert accountant.round_limit() == 250
+    assert accountant.plan(100) == Degradation.NONE
+    accountant.record("respond", "gpt-4.1-mini", 200, 0)
+    assert accountant.plan(100) == Degradation.SILENT
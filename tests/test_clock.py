@@ -0,0 +1,31 @@
+import asyncio
+
+from game import countdown_timer
+from utils.clock import VirtualClock, set_clock
+from utils.constants import blank_game_state, blank_player_state
+
+def test_virtual_clock_runs_a_full_countdown_round(tmp_path):
+    chat_log = tmp_path / "chat_log.txt"
+    chat_log.write_text("")
+
+    async def scenario():
+        # Speed 1: game time only moves when the test advances it
+        clock = VirtualClock(speed=1.0)
+        set_clock(clock)
+        gs, ps = blank_game_state(), blank_player_state()
+        ps.starttime, ps.timekeeper = clock.time(), True
+        timer = asyncio.create_task(countdown_timer(60, gs, ps, str(chat_log)))
+
+        await asyncio.sleep(0.05)
+        clock.advance(30)
+        await asyncio.sleep(0.05)
+        halfway = (timer.done(), gs.round_complete)
+
+        clock.advance(30)
+        await asyncio.wait_for(timer, timeout=1)
+        return halfway, gs.round_complete
+
+    halfway, complete = asyncio.run(scenario())
+    assert halfway == (False, False)
+    assert complete
+    assert "Time's up" in chat_log.read_text()
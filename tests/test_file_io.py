@@ -0,0 +1,25 @@
+import json
+
+import pytest
+
+from utils.file_io import save_player_to_lobby_file
+from utils.snapshot import decode_players
+
+def test_players_are_added_once(tmp_path, monkeypatch, make_player):
+    monkeypatch.chdir(tmp_path)
+    for code_name in ("LION", "OTTER", "LION"):
+        save_player_to_lobby_file(make_player(code_name))
+    path = tmp_path / "data" / "runtime" / "lobbies" / "lobby_1" / "players.json"
+    assert [p.code_name for p in decode_players(path.read_text())] == ["LION", "OTTER"]
+
+def test_corrupt_roster_is_not_overwritten(tmp_path, monkeypatch, make_player):
+    monkeypatch.chdir(tmp_path)
+    save_player_to_lobby_file(make_player("LION"))
+    path = tmp_path / "data" / "runtime" / "lobbies" / "lobby_1" / "players.json"
+    corrupt = path.read_text()[:-5]
+    path.write_text(corrupt)
+    with pytest.raises(ValueError):
+        save_player_to_lobby_file(make_player("OTTER"))
+    assert path.read_text() == corrupt
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(corrupt)
@@ -0,0 +1,19 @@
+import asyncio
+
+from server.game_server import GameServer
+from server.session import ClientSession
+
+def test_concurrent_joins_never_overfill_a_lobby(lobby_dirs):
+    async def scenario():
+        server = GameServer(lobby_size=2)
+        serving = asyncio.create_task(server.serve())
+        sessions = await asyncio.gather(*(server.join(ClientSession()) for _ in range(7)))
+        seated = {lobby_id: len(lobby.sessions) for lobby_id, lobby in server.lobbies.items()}
+        lobby_ids = [session.lobby_id for session in sessions]
+        server.stop()
+        await asyncio.wait_for(serving, timeout=10)
+        return seated, lobby_ids
+
+    seated, lobby_ids = asyncio.run(scenario())
+    assert all(count <= 2 for count in seated.values())
+    assert sorted(lobby_ids.count(lobby_id) for lobby_id in set(lobby_ids)) == [1, 2, 2, 2]
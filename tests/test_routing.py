@@ -0,0 +1,26 @@
+from utils.prompting.mock_client import MockChatClient
+from utils.prompting.routing import ModelRouter
+
+def test_routed_attempt_is_bounded_by_its_timeout_and_falls_back(monkeypatch):
+    from utils.prompting import prompter as prompter_module
+
+    router = ModelRouter.from_dict({
+        "defaults": {"min_calls": 100},
+        "stages": {"respond": {"primary": "slow-model", "fallbacks": ["fast-model"], "timeout_seconds": 0.05}},
+    })
+    monkeypatch.setattr(prompter_module, "get_router", lambda: router)
+    client = MockChatClient(latency_ms=1, jitter_ms=0, model_latency_ms={"slow-model": 5000})
+    prompter = prompter_module.OpenAIPrompter(
+        prompt_path="./resources/prompts/v0/respond.yaml",
+        prompt_headers={"feedback": "F", "persona": "P", "minutes": "M", "reasoning": "R"},
+        stage="respond",
+    )
+    options = []
+    with_options = client.with_options
+    monkeypatch.setattr(client, "with_options", lambda **kwargs: options.append(kwargs) or with_options(**kwargs))
+    prompter.client = client
+    prompter.get_completion({"feedback": "", "persona": "", "minutes": "", "reasoning": ""})
+    assert options == [{"max_retries": 0, "timeout": 0.05}]   # the client must not retry inside an attempt
+    assert client.calls == 2   # one timed-out attempt on the primary, one on the fallback
+    breaker = router.route("respond").breakers[0]
+    assert breaker.error_rate() == 1.0
@@ -0,0 +1,40 @@
+import asyncio
+
+from game import chat_event
+from server.session import ClientSession
+from utils.console import emit_event, set_console
+
+def drain(session: ClientSession) -> list:
+    async def read_all():
+        session.close()
+        items = []
+        while (item := await session.read_output_batch()) is not None:
+            items.append(item)
+        return items
+    return asyncio.run(read_all())
+
+def test_events_are_delivered_in_order_with_the_text():
+    session = ClientSession(events=True)
+    set_console(session)
+    session.print("a")
+    session.print("b")
+    emit_event("vote_prompt", round=1, options=[])
+    session.print("c")
+    assert drain(session) == ["a\nb\n", {"type": "vote_prompt", "round": 1, "options": []}, "c\n"]
+
+def test_text_sessions_drop_events():
+    session = ClientSession()
+    set_console(session)
+    session.print("a")
+    emit_event("round_start", round=1, icebreaker="?")
+    assert drain(session) == ["a\n"]
+
+def test_chat_lines_become_chat_events():
+    session = ClientSession(events=True)
+    set_console(session)
+    for line in ("\x1b[33m" + "*" * 50 + "\x1b[39m", "\x1b[33mGAME MASTER: Favourite snack?\x1b[39m", "LION: chips"):
+        chat_event(line)
+    assert drain(session) == [
+        {"type": "chat", "sender": "GAME MASTER", "text": "Favourite snack?"},
+        {"type": "chat", "sender": "LION", "text": "chips"},
+    ]
@@ -0,0 +1,39 @@
+import asyncio
+
+from server.session import ClientSession
+from server.sharding import ShardSupervisor
+
+class RecordingChannel:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+
+def test_supervisor_forwards_at_most_the_unread_input_limit():
+    async def scenario():
+        supervisor = ShardSupervisor(num_workers=1)
+        worker = supervisor.workers[0]
+        worker.channel = RecordingChannel()
+        session = ClientSession("s1", max_pending_input=2)
+        supervisor.placement[7] = 0
+        supervisor.sessions["s1"] = session
+        supervisor._session_lobby["s1"] = 7
+        forwarder = asyncio.create_task(supervisor._forward_input(session))
+        for i in range(5):
+            session.feed(f"line {i}")
+        await asyncio.sleep(0.05)
+        first = [m for m in worker.channel.sent if m[0] == "input"]
+
+        supervisor._on_worker_message(worker, ("input_taken", "s1"))
+        await asyncio.sleep(0.05)
+        second = [m for m in worker.channel.sent if m[0] == "input"]
+
+        session.close()
+        supervisor._drop_session("s1")
+        await asyncio.wait_for(forwarder, timeout=1)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert [m[2] for m in first] == ["line 0", "line 1"]
+    assert [m[2] for m in second] == ["line 0", "line 1", "line 2"]
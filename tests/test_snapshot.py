@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from utils.snapshot import (SnapshotVersionError, decode_game_state, decode_players,
+                            encode_game_state, encode_players)
+from utils.states import GameState, PlayerRegistry
+
+def test_registry_indexes_players_by_code_name_and_kind(make_player):
+    lion, otter, bot = make_player("LION"), make_player("OTTER"), make_player("BEAR", is_human=False)
+    registry = PlayerRegistry([lion, otter, bot])
+
+    assert [p.code_name for p in registry] == ["LION", "OTTER", "BEAR"] and len(registry) == 3
+    assert registry.get("OTTER") is otter and registry[2] is bot
+    assert registry.humans == [lion, otter] and registry.ais == [bot]
+    assert (registry.num_humans, registry.num_ais) == (2, 1)
+
+    # Re-registering a code name replaces the player in place, switching partitions if needed
+    lion_bot = make_player("LION", is_human=False)
+    registry.append(lion_bot)
+    assert registry[0] is lion_bot and registry.humans == [otter] and registry.num_ais == 2
+
+    assert registry.remove("OTTER") is otter and "OTTER" not in registry
+    with pytest.raises(ValueError):
+        registry.remove("OTTER")
+    assert registry == [lion_bot, bot]
+
+def test_players_round_trip_and_legacy_list_format(make_player):
+    players = [make_player("LION"), make_player("BEAR", is_human=False)]
+    assert decode_players(encode_players(players)) == players
+
+    # Older versions wrote players.json as an indented list of `asdict(player)` dicts
+    legacy = json.dumps([dict(player.to_record(), ai_doppleganger=None, logger=None)
+                         for player in players], indent=2)
+    assert decode_players(legacy) == players
+    assert decode_players(json.loads(legacy)) == players
+
+    with pytest.raises(SnapshotVersionError):
+        decode_players(json.dumps({"v": 99, "fields": [], "rows": []}))
+
+def test_game_state_round_trip_keeps_voted_off_history(make_player):
+    gs = GameState(round_number=2, players=[make_player("LION"), make_player("OTTER"),
+                                            make_player("BEAR", is_human=False)])
+    gs.players.vote_off("OTTER")
+    gs.last_vote_outcome, gs.vote_records = "OTTER has been voted out.", {"LION": "OTTER"}
+
+    snapshot = decode_game_state(encode_game_state(gs))
+    assert [p.code_name for p in snapshot.players] == ["LION", "BEAR"]
+    restored = snapshot.to_game_state()
+    assert restored.round_number == 2 and restored.vote_records == {"LION": "OTTER"}
+    assert restored.last_vote_outcome == "OTTER has been voted out."
+    assert restored.players.humans == gs.players.humans and restored.players.ais == gs.players.ais
+    otter = restored.find_player("OTTER")
+    assert otter is not None and not otter.still_in_game
+    assert list(restored.players_voted_off) == list(gs.players_voted_off)
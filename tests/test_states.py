@@ -0,0 +1,31 @@
+from utils.states import GameState, PlayerRegistry
+
+def test_vote_off_moves_player_to_voted_off_index(make_player):
+    gs = GameState(round_number=0, players=[make_player("LION"), make_player("OTTER", is_human=False)])
+    lion = gs.players.vote_off("LION")
+
+    assert lion is not None and not lion.still_in_game
+    assert "LION" not in gs.players and gs.players.get("LION") is None
+    assert gs.players.get_voted_off("LION") is lion
+    assert gs.find_player("LION") is lion
+    assert gs.find_player("OTTER") is gs.players.get("OTTER")
+    assert gs.find_player("BEAR") is None
+    assert list(gs.players_voted_off) == [lion] and len(gs.players_voted_off) == 1
+    assert "LION" in gs.players_voted_off
+    assert gs.players.vote_off("LION") is None
+
+def test_voted_off_view_survives_reassignment(make_player):
+    gs = GameState(round_number=0, players=[make_player("LION"), make_player("OTTER")])
+    lion = gs.players.vote_off("LION")
+
+    # Screens reload the roster with `gs.players = [...]`; the voted-off record carries over
+    gs.players = [make_player("OTTER"), make_player("BEAR")]
+    assert gs.find_player("LION") is lion
+    assert list(gs.players_voted_off) == [lion]
+
+    wolf = make_player("WOLF")
+    gs.players_voted_off = [wolf]
+    assert isinstance(gs.players, PlayerRegistry)
+    assert gs.find_player("WOLF") is wolf and gs.find_player("LION") is None
+    assert [p.code_name for p in gs.players + gs.players_voted_off] == ["OTTER", "BEAR", "WOLF"]
+    assert gs.to_dict()["players_voted_off"] == [wolf]